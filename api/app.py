@@ -1,136 +1,217 @@
+import time
+_import_started = time.perf_counter()
 
-
-from flask import Flask, request
-from src.config import Config
-from src.database import mongo
-from src.routes.auth_routes import auth_bp
-import sys
-import pymongo
-# print(f"DEBUG: Python: {sys.executable}")
-# print(f"DEBUG: PyMongo: {pymongo.version}")
-
+import os
+import logging
+from flask import Flask, request, current_app
 from flask_cors import CORS
+from src.config import Config, config_by_name
+from src.database import mongo
+from src.utils.security import PasswordHashingBusy
+from src.utils.log_setup import configure_logging, init_request_logging, parse_sample_rates
+from src.utils.json_provider import OrjsonProvider
+from src.utils.compression import init_compression
+from src.utils.metrics import init_metrics
+from src.utils.query_budget import init_query_budget
+
+logger = logging.getLogger('eventify')
+
+_imports_ms = (time.perf_counter() - _import_started) * 1000
+
+
+def create_app(config_name=None):
+    """
+    Build the Flask app. config_name is one of config_by_name
+    ('development', 'production', 'testing'), defaulting to APP_ENV.
+    """
+    started = time.perf_counter()
+    phases = {"imports": _imports_ms}
+    last = started
+
+    def mark(phase):
+        nonlocal last
+        now = time.perf_counter()
+        phases[phase] = (now - last) * 1000
+        last = now
+
+    config_name = config_name or os.getenv('APP_ENV', 'production')
+    app = Flask(__name__)
+    # ObjectId / datetime aware, so routes can jsonify documents as they come from Mongo
+    app.json = OrjsonProvider(app)
+    app.config.from_object(config_by_name[config_name])
+    app.config['LOG_ROUTE_SAMPLE_RATES'] = parse_sample_rates(app.config['LOG_ROUTE_SAMPLE_RATES'])
+
+    configure_logging(app.config['LOG_LEVEL'], app.config['LOG_FORMAT'], app.config['LOG_QUEUE_SIZE'])
+    init_request_logging(app)
+    # Before mongo.init_app: the pymongo listeners only apply to clients created afterwards
+    init_metrics(app)
+    # Registered after the access log so it runs first and the log sees the compressed size
+    init_compression(app)
+    # Runs before compression so an over-budget 500 replaces the body it would compress
+    init_query_budget(app)
+    mark("config")
+
+    logger.info("Starting Eventify API (%s)...", config_name)
+    logger.info("MongoDB URI present: %s", bool(app.config.get('MONGO_URI')))
+
+    # Initialize CORS with support for frontend origin and credentials
+    # Allow all local network IPs and localhost
+    CORS(app,
+         origins=[
+             "http://localhost:5173", "http://localhost:5174", "http://localhost:5175", "http://localhost:5176",
+             "https://eventify.fun", "https://organizer.eventify.fun",
+             r"http://192\.168\.\d{1,3}\.\d{1,3}:\d{4}",  # Wildcard for any local IP/Port
+             r"http://127\.0\.0\.1:\d{4}"
+         ],
+         supports_credentials=True,
+         allow_headers=["Content-Type", "Authorization", "X-Requested-With", "X-Queue-Token", "X-Admission-Token",
+                        "Idempotency-Key"],
+         expose_headers=["Content-Type", "Authorization", "Idempotent-Replayed"])
+
+    # Initialize extensions
+    mongo.init_app(app)
+    from src.utils.limiter import limiter
+    limiter.init_app(app)
+    mark("extensions")
+
+    # Indexes are a versioned migration (flask --app app db migrate), not a per-worker boot step
+    if app.config.get('AUTO_MIGRATE'):
+        from src.utils.migrations import run_migrations
+        with app.app_context():
+            run_migrations(mongo.db)
+        mark("migrations")
+
+    register_blueprints(app)
+    mark("blueprints")
+
+    # Maintenance commands (flask --app app <group> <command>)
+    from src.commands.media_commands import media_cli
+    from src.commands.db_commands import db_cli
+    from src.commands.data_commands import data_cli
+    app.cli.add_command(media_cli)
+    app.cli.add_command(db_cli)
+    app.cli.add_command(data_cli)
+
+    register_core_routes(app)
+    mark("routes")
+
+    total_ms = (time.perf_counter() - started) * 1000 + _imports_ms
+    app.extensions['startup_timing'] = {"total_ms": round(total_ms, 1),
+                                        **{k: round(v, 1) for k, v in phases.items()}}
+    logger.info("Startup completed in %.1f ms", total_ms,
+                extra={"startup": app.extensions['startup_timing'], "pid": os.getpid()})
+    return app
+
+
+def register_blueprints(app):
+    from src.routes.auth_routes import auth_bp
+    from src.routes.user_routes import user_bp
+    from src.routes.event_routes import event_bp, public_bp
+    from src.routes.upload_routes import upload_bp
+    #
+    app.register_blueprint(auth_bp, url_prefix='/api/auth')
+    app.register_blueprint(user_bp, url_prefix='/api/user')
+    app.register_blueprint(event_bp, url_prefix='/api/events')
+    app.register_blueprint(public_bp, url_prefix='/api')
+    app.register_blueprint(upload_bp, url_prefix='/api/upload')
+    #
+    from src.routes.registration_routes import registration_bp
+    app.register_blueprint(registration_bp, url_prefix='/api/registrations')
+
+    from src.routes.waiting_room_routes import waiting_room_bp
+    app.register_blueprint(waiting_room_bp, url_prefix='/api/waiting-room')
+
+    from src.routes.payment_routes import payment_bp
+    app.register_blueprint(payment_bp, url_prefix='/api/payments')
+
+    from src.routes.ticket_routes import ticket_bp
+    app.register_blueprint(ticket_bp, url_prefix='/api/tickets')
+
+    from src.routes.organizer_routes import organizer_bp
+    app.register_blueprint(organizer_bp, url_prefix='/api/organizer')
+
+    # from src.routes.analytics_routes import analytics_bp
+    # app.register_blueprint(analytics_bp, url_prefix='/api/analytics')
+
+    from src.routes.form_routes import form_bp
+    app.register_blueprint(form_bp, url_prefix='/api/forms')
+    #
+    # from src.routes.promotion_routes import promotion_bp
+    # app.register_blueprint(promotion_bp, url_prefix='/api/promotions')
+    #
+    # from src.routes.merchandise_routes import merchandise_bp
+    # app.register_blueprint(merchandise_bp, url_prefix='/api/merchandise')
+    #
+    from src.routes.team_routes import team_bp
+    app.register_blueprint(team_bp, url_prefix='/api/team')
+
+    from src.routes.follow_routes import follow_bp
+    app.register_blueprint(follow_bp, url_prefix='/api/follows')
+
+    from src.routes.host_application_routes import host_application_bp
+    app.register_blueprint(host_application_bp, url_prefix='/api/host-applications')
+
+    from src.routes.admin_routes import admin_bp
+    app.register_blueprint(admin_bp, url_prefix='/api/admin')
+
+
+def register_core_routes(app):
+    @app.route("/uploads/<path:filename>")
+    def uploaded_file(filename):
+        from flask import send_from_directory, redirect
+        from src.services.storage_service import get_storage
+        storage = get_storage()
+        # Object storage: send the client straight to the bucket
+        if storage.name == 's3':
+            url = storage.url_for(filename)
+            if url.startswith('/uploads/'):
+                url = storage.presigned_get_url(filename)
+            return redirect(url, code=302)
+        # Serve files from the uploads directory
+        return send_from_directory(Config.UPLOAD_FOLDER, filename)
+
+    @app.route("/")
+    def home():
+        return {"status": "ok", "message": "Eventify API is running"}
+
+    @app.route("/healthz")
+    def healthz():
+        return {"status": "ok"}, 200
+
+    @app.route("/debug/db")
+    def debug_db():
+        try:
+            db_name = mongo.db.name
+            collections = mongo.db.list_collection_names()
+            event_count = mongo.db.events.count_documents({})
+            featured_count = mongo.db.events.count_documents({"is_featured": True})
+            published_count = mongo.db.events.count_documents({"status": "published"})
+            return {
+                "db_name": db_name,
+                "collections": collections,
+                "event_count": event_count,
+                "featured_count": featured_count,
+                "published_count": published_count,
+                "uri_masked": "present" if current_app.config.get('MONGO_URI') else "missing"
+            }
+        except Exception as e:
+            return {"error": str(e)}, 500
+
+    @app.errorhandler(PasswordHashingBusy)
+    def handle_hashing_busy(e):
+        # Shed load instead of letting logins queue behind each other
+        return {"message": "Server is busy, please try again shortly."}, 503, {"Retry-After": "2"}
+
+    @app.errorhandler(404)
+    def handle_404(e):
+        # Log the exact path that failed
+        logger.info("404 Error: %s %s", request.method, request.path)
+        return {"error": "not_found", "path": request.path, "message": "The requested URL was not found on the server."}, 404
 
-app = Flask(__name__)
-app.config.from_object(Config)
-
-print("Starting Eventify API...")
-print(f"MongoDB URI present: {bool(app.config.get('MONGO_URI'))}")
-
-# Initialize CORS with support for frontend origin and credentials
-# Allow all local network IPs and localhost
-CORS(app, 
-     origins=[
-         "http://localhost:5173", "http://localhost:5174", "http://localhost:5175", "http://localhost:5176",
-         "https://eventify.fun", "https://organizer.eventify.fun",
-         r"http://192\.168\.\d{1,3}\.\d{1,3}:\d{4}",  # Wildcard for any local IP/Port
-         r"http://127\.0\.0\.1:\d{4}"
-     ],
-     supports_credentials=True,
-     allow_headers=["Content-Type", "Authorization", "X-Requested-With"],
-     expose_headers=["Content-Type", "Authorization"])
-
-# Initialize extensions
-mongo.init_app(app)
-from src.utils.limiter import limiter
-limiter.init_app(app)
-
-with app.app_context():
-    from src.utils.indexes import create_indexes
-    create_indexes()
-
-# Register blueprints
-# Register blueprints
-from src.routes.auth_routes import auth_bp
-from src.routes.user_routes import user_bp
-from src.routes.event_routes import event_bp, public_bp
-from src.routes.upload_routes import upload_bp
-# 
-app.register_blueprint(auth_bp, url_prefix='/api/auth')
-app.register_blueprint(user_bp, url_prefix='/api/user')
-app.register_blueprint(event_bp, url_prefix='/api/events')
-app.register_blueprint(public_bp, url_prefix='/api')
-app.register_blueprint(upload_bp, url_prefix='/api/upload')
-# 
-from src.routes.registration_routes import registration_bp
-app.register_blueprint(registration_bp, url_prefix='/api/registrations')
-
-from src.routes.ticket_routes import ticket_bp
-app.register_blueprint(ticket_bp, url_prefix='/api/tickets')
-
-from src.routes.organizer_routes import organizer_bp
-app.register_blueprint(organizer_bp, url_prefix='/api/organizer')
-
-# from src.routes.analytics_routes import analytics_bp
-# app.register_blueprint(analytics_bp, url_prefix='/api/analytics')
-
-from src.routes.form_routes import form_bp
-app.register_blueprint(form_bp, url_prefix='/api/forms')
-# 
-# from src.routes.promotion_routes import promotion_bp
-# app.register_blueprint(promotion_bp, url_prefix='/api/promotions')
-# 
-# from src.routes.merchandise_routes import merchandise_bp
-# app.register_blueprint(merchandise_bp, url_prefix='/api/merchandise')
-# 
-from src.routes.team_routes import team_bp
-app.register_blueprint(team_bp, url_prefix='/api/team')
-
-from src.routes.follow_routes import follow_bp
-app.register_blueprint(follow_bp, url_prefix='/api/follows')
-
-from src.routes.host_application_routes import host_application_bp
-app.register_blueprint(host_application_bp, url_prefix='/api/host-applications')
-
-from src.routes.admin_routes import admin_bp
-app.register_blueprint(admin_bp, url_prefix='/api/admin')
-
-
-@app.route("/uploads/<path:filename>")
-def uploaded_file(filename):
-    from flask import send_from_directory
-    import os
-    # Serve files from the uploads directory
-    uploads_dir = os.path.join(os.path.dirname(__file__), 'uploads')
-    return send_from_directory(uploads_dir, filename)
-
-@app.before_request
-def log_request_info():
-    print(f"Request: {request.method} {request.path}")
-
-@app.route("/")
-def home():
-    return {"status": "ok", "message": "Eventify API is running"}
-
-@app.route("/healthz")
-def healthz():
-    return {"status": "ok"}, 200
-
-@app.route("/debug/db")
-def debug_db():
-    try:
-        db_name = mongo.db.name
-        collections = mongo.db.list_collection_names()
-        event_count = mongo.db.events.count_documents({})
-        featured_count = mongo.db.events.count_documents({"is_featured": True})
-        published_count = mongo.db.events.count_documents({"status": "published"})
-        return {
-            "db_name": db_name,
-            "collections": collections,
-            "event_count": event_count,
-            "featured_count": featured_count,
-            "published_count": published_count,
-            "uri_masked": "present" if app.config.get('MONGO_URI') else "missing"
-        }
-    except Exception as e:
-        return {"error": str(e)}, 500
-
-
-@app.errorhandler(404)
-def handle_404(e):
-    # Log the exact path that failed
-    print(f"404 Error: {request.method} {request.path}")
-    return {"error": "not_found", "path": request.path, "message": "The requested URL was not found on the server."}, 404
 
 if __name__ == "__main__":
-    app.run(host='0.0.0.0', debug=True, port=5000)
+    # Local development server (python app.py)
+    create_app(os.getenv('APP_ENV', 'development')).run(host='0.0.0.0', debug=True, port=5000)
+else:
+    # gunicorn app:app / flask --app app
+    app = create_app()
@@ -0,0 +1,167 @@
+"""
+Checkout write path benchmark: separate writes vs one transaction.
+
+Simulated buyers check out free tickets with a promo code, so every
+checkout takes seats, redeems the code, inserts the registration and
+issues its tickets. Two modes:
+
+- separate:    those writes one after another, as create_registration did
+               before src/services/checkout_service.py
+- transaction: checkout_service.place_registration (one transaction,
+               committed with w:majority)
+
+Afterwards every mode is checked for consistency: one registration per
+checkout, its tickets, one promo use each and no seats lost or oversold.
+
+Usage:
+    python bench_checkout.py [--mongodb-uri mongodb://localhost:27017/eventify_bench?directConnection=true]
+                             [--checkouts 2000] [--threads 32] [--slots 16] [--modes separate,transaction]
+
+Needs a single-node replica set (transactions don't run on a standalone mongod):
+    mongod --replSet rs0 --dbpath /tmp/rs0 && mongosh --eval 'rs.initiate()'
+The benchmark event, its registrations, tickets, counters and promo code are
+removed before every run.
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+os.environ.setdefault('JWT_SECRET', 'bench-checkout-secret-not-for-production-use')
+
+from bson.objectid import ObjectId
+
+PROMO_CODE = 'BENCHCHECKOUT'
+
+
+def separate_writes(new_reg, event, promo_code):
+    """The write sequence create_registration used before the checkout transaction"""
+    from src.database import mongo
+    from src.services.checkout_service import redeem_promo
+    from src.utils.inventory import release, reserve
+    from src.utils.ticket_utils import generate_tickets_for_registration
+
+    reg = dict(new_reg)
+    reg["inventory_holds"] = reserve(event, reg["ticket_type"], reg["quantity"])
+    try:
+        reg["promo_code"] = redeem_promo(promo_code, event)['code']
+        registration_id = str(mongo.db.registrations.insert_one(reg).inserted_id)
+    except Exception:
+        release(reg["inventory_holds"])
+        raise
+    ticket_ids = generate_tickets_for_registration(registration_id, reg["user_id"], reg["event_id"],
+                                                   reg["quantity"], reg["ticket_type"])
+    return registration_id, ticket_ids
+
+
+def reset(db, event):
+    from src.utils.inventory import INVENTORY_COLLECTION
+    event_id = str(event['_id'])
+    db.events.replace_one({"_id": event['_id']}, event, upsert=True)
+    db.registrations.delete_many({"event_id": event_id})
+    db.tickets.delete_many({"event_id": event_id})
+    db[INVENTORY_COLLECTION].delete_many({"event_id": event_id})
+    db.promotions.replace_one({"code": PROMO_CODE},
+                              {"code": PROMO_CODE, "event_id": event_id, "type": "fixed", "amount": 0,
+                               "usage_limit": 0, "used_count": 0, "status": "active"}, upsert=True)
+
+
+def run(app, mode, event, checkouts, threads, seed):
+    from src.database import mongo
+    from src.services import checkout_service
+    from src.utils import inventory
+
+    place = checkout_service.place_registration if mode == 'transaction' else separate_writes
+    reset(mongo.db, event)
+    event_id = str(event['_id'])
+    latencies = []
+    counts = {"errors": 0, "tickets": 0}
+    counts_lock = threading.Lock()
+
+    def buyer(i):
+        rng = random.Random(f"{seed}:{i}")
+        quantity = rng.choice([1, 1, 1, 2, 4])
+        new_reg = {"user_id": f"bench-user-{i}", "event_id": event_id, "ticket_type": "General", "price": 0,
+                   "quantity": quantity, "payment_method": "Card", "status": "confirmed", "payment_status": "paid",
+                   "registered_at": datetime.utcnow()}
+        with app.app_context():
+            started = time.perf_counter()
+            try:
+                place(new_reg, event, PROMO_CODE)
+                with counts_lock:
+                    counts["tickets"] += quantity
+            except Exception:
+                with counts_lock:
+                    counts["errors"] += 1
+            finally:
+                latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(buyer, range(checkouts)))
+    elapsed = time.perf_counter() - started
+
+    db = mongo.db
+    registrations = db.registrations.count_documents({"event_id": event_id})
+    tickets = db.tickets.count_documents({"event_id": event_id})
+    promo_uses = db.promotions.find_one({"code": PROMO_CODE})['used_count']
+    remaining = {}
+    for doc in db[inventory.INVENTORY_COLLECTION].find({"event_id": event_id}):
+        remaining[doc['key']] = remaining.get(doc['key'], 0) + doc['remaining']
+    held = sum(reg['quantity'] for reg in db.registrations.find({"event_id": event_id}, {"quantity": 1}))
+    limits = inventory.limits(event)
+    consistent = (registrations == checkouts - counts["errors"] == promo_uses and tickets == counts["tickets"]
+                  and all(held + remaining.get(key, 0) == total for key, total in limits.items()))
+    latencies.sort()
+    return {
+        "rps": checkouts / elapsed,
+        "p50": latencies[len(latencies) // 2] * 1000,
+        "p99": latencies[int(len(latencies) * 0.99)] * 1000,
+        "errors": counts["errors"],
+        "consistent": consistent,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--mongodb-uri', default='mongodb://localhost:27017/eventify_bench?directConnection=true')
+    parser.add_argument('--checkouts', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--slots', type=int, default=16, help='Inventory counter slots of the benchmark event')
+    parser.add_argument('--modes', default='separate,transaction')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    os.environ['MONGODB_URI'] = args.mongodb_uri
+    from app import create_app
+    from src.database import mongo
+    from src.utils.migrations import run_migrations
+    app = create_app('testing')
+    run_migrations(mongo.db)
+
+    # Enough seats that nobody sells out; the counters are still written on every checkout
+    event = {"_id": ObjectId(), "title": "Checkout benchmark", "capacity": args.checkouts * 10,
+             "tickets": [{"name": "General", "price": 0, "quantity": args.checkouts * 5}],
+             "inventory_slots": args.slots}
+
+    print(f"{args.checkouts:,} checkouts, {args.threads} threads, {args.slots} inventory slots\n")
+    print(f"{'mode':<12}  {'checkouts/s':>11}  {'p50 ms':>7}  {'p99 ms':>7}  {'errors':>6}  consistent")
+    results = {}
+    for mode in args.modes.split(','):
+        result = results[mode] = run(app, mode, event, args.checkouts, args.threads, args.seed)
+        print(f"{mode:<12}  {result['rps']:>11,.0f}  {result['p50']:>7.2f}  {result['p99']:>7.2f}  "
+              f"{result['errors']:>6}  {'yes' if result['consistent'] else 'NO'}")
+    if 'separate' in results and 'transaction' in results:
+        print(f"\ntransaction / separate throughput: {results['transaction']['rps'] / results['separate']['rps']:.2f}x")
+    sys.exit(0 if all(r['consistent'] for r in results.values()) else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Response compression benchmark.
+
+Serves organizer-sized JSON payloads through the real compression hook and
+reports bytes on the wire, server-side time and the estimated time to
+deliver the response over mobile links.
+
+Usage:
+    python bench_compression.py [--docs 50,200,1000] [--rounds 30] [--levels]
+
+--levels also sweeps gzip/brotli levels to show why 5 / 4 are the defaults.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+from flask import Flask, jsonify
+from bench_json import make_events
+from src.utils import compression
+from src.utils.compression import init_compression
+from src.utils.json_provider import OrjsonProvider, dumps_bytes
+
+# Effective downlink throughput (bits/s) at a crowded venue
+LINKS = {"3g": 1_600_000, "4g": 10_000_000}
+
+
+def build_app(docs):
+    app = Flask(__name__)
+    app.json = OrjsonProvider(app)
+    init_compression(app)
+
+    @app.route('/payload')
+    def payload():
+        return jsonify([dict(d, id=d['_id']) for d in docs])
+
+    return app
+
+
+def measure(client, accept_encoding, rounds):
+    timings = []
+    size = 0
+    for _ in range(rounds):
+        started = time.perf_counter()
+        response = client.get('/payload', headers={"Accept-Encoding": accept_encoding})
+        timings.append(time.perf_counter() - started)
+        size = len(response.get_data())
+    return size, statistics.median(timings) * 1000
+
+
+def sweep_levels(docs):
+    raw = dumps_bytes([dict(d, id=d['_id']) for d in docs])
+    print(f"\nLevel sweep on {len(raw) / 1024:.0f} KiB of JSON")
+    levels = [('gzip', lvl) for lvl in (1, 5, 9)]
+    if compression.brotli is not None:
+        levels += [('br', lvl) for lvl in (1, 4, 6, 11)]
+    for encoding, level in levels:
+        started = time.perf_counter()
+        out = compression.compress(raw, encoding, gzip_level=level, br_level=level)
+        ms = (time.perf_counter() - started) * 1000
+        print(f"  {encoding:<4} level {level:<2}  {len(out) / 1024:8.1f} KiB  ratio {len(raw) / len(out):5.1f}x  {ms:7.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--docs', default='50,200,1000')
+    parser.add_argument('--rounds', type=int, default=30)
+    parser.add_argument('--levels', action='store_true')
+    args = parser.parse_args()
+
+    encodings = [('identity', 'identity'), ('gzip', 'gzip')]
+    if compression.brotli is not None:
+        encodings.append(('br', 'br, gzip'))
+    else:
+        print("brotli not installed, gzip only")
+
+    for count in [int(n) for n in args.docs.split(',')]:
+        docs = make_events(count)
+        client = build_app(docs).test_client()
+        print(f"\n{count} events")
+        for name, header in encodings:
+            size, server_ms = measure(client, header, args.rounds)
+            wire = "  ".join(f"{link}={size * 8 / bps * 1000 + server_ms:7.0f}ms" for link, bps in LINKS.items())
+            print(f"  {name:<9} {size / 1024:8.1f} KiB  server={server_ms:6.2f}ms  {wire}")
+
+    if args.levels:
+        sweep_levels(make_events(200))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Flash sale contention benchmark.
+
+Thousands of simulated buyers race for a small number of seats through
+src/utils/inventory.reserve (the same conditional $inc path as
+POST /api/registrations), once per slot count. Some buyers abandon their
+reservation and give the seats back, like expired checkouts. Checks that
+nothing is oversold: seats held by buyers plus seats left in the counters
+must equal the event's capacity.
+
+Usage:
+    python bench_inventory.py [--mongodb-uri mongodb://localhost:27017/eventify_bench]
+                              [--buyers 5000] [--threads 64] [--seats 500] [--slots 1,4,16]
+
+Needs a running mongod; the inventory documents of the benchmark event are
+removed before every run.
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+os.environ.setdefault('JWT_SECRET', 'bench-inventory-secret-not-for-production-use')
+
+from bson.objectid import ObjectId
+
+
+def run(app, event, buyers, threads, abandon_rate, seed):
+    from src.database import mongo
+    from src.utils import inventory
+
+    mongo.db[inventory.INVENTORY_COLLECTION].delete_many({"event_id": str(event['_id'])})
+    held = []
+    held_lock = threading.Lock()
+    latencies = []
+    sold_out = [0]
+
+    def buyer(i):
+        rng = random.Random(f"{seed}:{i}")
+        ticket_type = rng.choice([t['name'] for t in event['tickets']])
+        quantity = rng.choice([1, 1, 1, 2, 4])
+        with app.app_context():
+            started = time.perf_counter()
+            try:
+                holds = inventory.reserve(event, ticket_type, quantity)
+            except inventory.SoldOut:
+                with held_lock:
+                    sold_out[0] += 1
+                return
+            finally:
+                latencies.append(time.perf_counter() - started)
+            if rng.random() < abandon_rate:
+                inventory.release(holds)
+                return
+        with held_lock:
+            held.append((ticket_type, quantity))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(buyer, range(buyers)))
+    elapsed = time.perf_counter() - started
+
+    remaining = {}
+    for doc in mongo.db[inventory.INVENTORY_COLLECTION].find({"event_id": str(event['_id'])}):
+        remaining[doc['key']] = remaining.get(doc['key'], 0) + doc['remaining']
+    sold = {inventory.EVENT_WIDE: sum(q for _, q in held)}
+    for ticket_type, quantity in held:
+        sold[ticket_type] = sold.get(ticket_type, 0) + quantity
+
+    limits = inventory.limits(event)
+    oversold = sum(max(sold.get(key, 0) - total, 0) for key, total in limits.items())
+    # Every seat is either held by a buyer or still in a counter
+    balanced = all(sold.get(key, 0) + remaining.get(key, 0) == total for key, total in limits.items())
+    latencies.sort()
+    return {
+        "rps": buyers / elapsed,
+        "p50": latencies[len(latencies) // 2] * 1000,
+        "p99": latencies[int(len(latencies) * 0.99)] * 1000,
+        "sold": sold[inventory.EVENT_WIDE],
+        "sold_out": sold_out[0],
+        "oversold": oversold,
+        "balanced": balanced,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--mongodb-uri', default='mongodb://localhost:27017/eventify_bench')
+    parser.add_argument('--buyers', type=int, default=5000)
+    parser.add_argument('--threads', type=int, default=64)
+    parser.add_argument('--seats', type=int, default=500, help='Event capacity; split over three ticket types')
+    parser.add_argument('--slots', default='1,4,16')
+    parser.add_argument('--abandon-rate', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    os.environ['MONGODB_URI'] = args.mongodb_uri
+    from app import create_app
+    app = create_app('testing')
+
+    seats = args.seats
+    event = {
+        "_id": ObjectId(),
+        "capacity": seats,
+        # Type quantities add up to more than the capacity, so both limits are hit
+        "tickets": [{"name": "General", "quantity": seats // 2},
+                    {"name": "VIP", "quantity": seats // 4},
+                    {"name": "Early Bird", "quantity": seats // 2}],
+    }
+
+    print(f"{args.buyers:,} buyers, {args.threads} threads, {seats:,} seats, "
+          f"{args.abandon_rate:.0%} abandon their reservation\n")
+    print(f"{'slots':>5}  {'buyers/s':>9}  {'p50 ms':>7}  {'p99 ms':>7}  {'sold':>6}  {'sold out':>8}  "
+          f"{'oversold':>8}  balanced")
+    failed = False
+    for slots in [int(s) for s in args.slots.split(',')]:
+        result = run(app, {**event, "inventory_slots": slots}, args.buyers, args.threads, args.abandon_rate, args.seed)
+        failed |= result['oversold'] > 0 or not result['balanced']
+        print(f"{slots:>5}  {result['rps']:>9,.0f}  {result['p50']:>7.2f}  {result['p99']:>7.2f}  "
+              f"{result['sold']:>6,}  {result['sold_out']:>8,}  {result['oversold']:>8}  "
+              f"{'yes' if result['balanced'] else 'NO'}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
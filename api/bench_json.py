@@ -0,0 +1,106 @@
+"""
+JSON serialization benchmark.
+
+Compares Flask's default provider (stdlib json, after the per-route
+ObjectId/datetime conversion loops we used to run) with the orjson
+provider that encodes documents as they come from MongoDB.
+
+Usage:
+    python bench_json.py [--docs 500] [--rounds 50]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+from bson import ObjectId
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from src.utils.json_provider import OrjsonProvider
+
+
+WORDS = ("live music food drinks night festival stage tickets doors open venue parking artists dj "
+         "workshop talk community free entry dress code outdoor indoor family friendly").split()
+
+
+def make_events(count):
+    """Event documents shaped like the organizer/feed responses"""
+    now = datetime.utcnow()
+    docs = []
+    for i in range(count):
+        docs.append({
+            "_id": ObjectId(),
+            "title": f"Event {i}",
+            "description": " ".join(random.choice(WORDS) for _ in range(60)),
+            "start_date": "2026-07-15",
+            "start_time": "19:00",
+            "status": random.choice(["published", "draft"]),
+            "capacity": random.randint(0, 500),
+            "created_by": ObjectId(),
+            "created_at": now - timedelta(days=i),
+            "updated_at": now,
+            "gallery_images": [f"/uploads/events/img_{i}_{n}.webp" for n in range(4)],
+            "tickets": [{"name": "General", "price": 10.0, "quantity": 100},
+                        {"name": "VIP", "price": 50.0, "quantity": 20}],
+            "ticketsSold": random.randint(0, 100),
+            "revenue": random.random() * 1000
+        })
+    return docs
+
+
+def legacy_convert(docs):
+    # What routes did before the provider: copy + stringify every value
+    out = []
+    for doc in docs:
+        data = {k: str(v) if isinstance(v, ObjectId) else v for k, v in doc.items()}
+        data['id'] = data.pop('_id')
+        for field in ('created_at', 'updated_at'):
+            if isinstance(data.get(field), datetime):
+                data[field] = data[field].isoformat()
+        out.append(data)
+    return out
+
+
+def measure(name, encode, rounds):
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        encode()
+        timings.append(time.perf_counter() - started)
+    tracemalloc.start()
+    encode()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<28} median={statistics.median(timings) * 1000:8.2f}ms  peak alloc={peak / 1024:8.0f} KiB")
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--docs', type=int, default=500)
+    parser.add_argument('--rounds', type=int, default=50)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    default_provider = DefaultJSONProvider(app)
+    orjson_provider = OrjsonProvider(app)
+    docs = make_events(args.docs)
+
+    print(f"{args.docs} event documents, {args.rounds} rounds\n")
+    with app.app_context():
+        before = measure("stdlib + conversion loop",
+                         lambda: default_provider.response(legacy_convert(docs)), args.rounds)
+        after = measure("orjson provider",
+                        lambda: orjson_provider.response([dict(d, id=d['_id']) for d in docs]), args.rounds)
+    print(f"\nspeedup: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
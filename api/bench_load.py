@@ -0,0 +1,377 @@
+"""
+HTTP load suite.
+
+Seeds a throwaway database on a local mongod, starts the API under
+gunicorn.conf.py and runs each traffic scenario in turn with concurrent
+keep-alive clients:
+
+- feed               GET /api/events, /api/events?featured=true
+- event_detail       GET /api/events/<id>
+- checkout_guest     POST /api/registrations as a guest (paid ticket, stays pending)
+- checkout_auth      POST /api/registrations with a user token
+- confirm_payment    POST /api/registrations/<id>/confirm_payment (the registration is
+                     created first, untimed)
+- organizer          GET /api/organizer/dashboard, /stats, /events, /attendees
+- gate_scan          POST /api/tickets/validate; every client starts at once and each
+                     seeded ticket is scanned exactly once, like doors opening
+
+Every scenario reports p50/p95/p99 latency, throughput and errors. With
+--save-baseline the results are written to the baseline file; otherwise
+they are compared against it and the run exits 1 when a scenario
+regressed by more than --tolerance (p95, p99 or throughput) or its error
+rate went above 1%.
+
+Usage:
+    python bench_load.py [--scenarios feed,gate_scan] [--clients 16] [--duration 15] [--workers 2]
+                         [--mongodb-uri mongodb://localhost:27017/eventify_bench]
+                         [--baseline bench_baseline.json] [--save-baseline] [--tolerance 0.2]
+
+The database named in --mongodb-uri is dropped and re-seeded on every run
+(fixed --seed, so runs see the same data). Baselines are only comparable
+on the same machine with the same options.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+# The bench mints its own tokens, so it must share the server's secret
+os.environ.setdefault('JWT_SECRET', 'bench-load-secret-not-for-production-use')
+
+from bson import ObjectId
+from pymongo import MongoClient
+from bench_server_profiles import percentile, wait_until_ready
+from src.utils.security import Security
+from src.utils.migrations import run_migrations
+
+SCENARIOS = ['feed', 'event_detail', 'checkout_guest', 'checkout_auth', 'confirm_payment', 'organizer',
+             'gate_scan']
+MAX_ERROR_RATE = 0.01
+
+
+# ---- Data -----------------------------------------------------------------------------------------
+
+def seed_database(db, rng, organizers=5, attendees=200, events=60, registrations_per_event=40,
+                  scan_tickets=3000):
+    """Drop and re-create the bench data. Returns the ids the scenarios need."""
+    for name in ('users', 'events', 'registrations', 'tickets'):
+        db[name].drop()
+    now = datetime.utcnow()
+
+    organizer_ids = [ObjectId() for _ in range(organizers)]
+    attendee_ids = [ObjectId() for _ in range(attendees)]
+    db.users.insert_many(
+        [{"_id": oid, "name": f"Organizer {i}", "email": f"organizer{i}@bench.local", "is_organizer": True,
+          "organization_name": f"Bench Org {i}", "is_verified": True, "created_at": now}
+         for i, oid in enumerate(organizer_ids)] +
+        [{"_id": oid, "name": f"Attendee {i}", "email": f"attendee{i}@bench.local", "is_verified": True,
+          "created_at": now} for i, oid in enumerate(attendee_ids)],
+        ordered=False
+    )
+
+    event_docs = []
+    for i in range(events):
+        start = now + timedelta(days=rng.randint(1, 90))
+        event_docs.append({
+            "_id": ObjectId(),
+            "title": f"Bench Event {i}",
+            "description": "Live music, food and drinks. " * 20,
+            "start_date": start.strftime('%Y-%m-%d'),
+            "start_time": "19:00",
+            "venue": "Bench Hall",
+            "status": "published",
+            "is_featured": i % 10 == 0,
+            # Large enough that checkout scenarios never sell out (that path is bench_inventory.py's)
+            "capacity": 100000,
+            "created_by": organizer_ids[i % organizers],
+            "created_at": now - timedelta(minutes=i),
+            "tickets": [{"name": "General", "price": 500, "quantity": 90000},
+                        {"name": "VIP", "price": 2000, "quantity": 10000}]
+        })
+    db.events.insert_many(event_docs, ordered=False)
+    event_ids = [str(e['_id']) for e in event_docs]
+
+    registrations = []
+    tickets = []
+    for event_id in event_ids:
+        for _ in range(registrations_per_event):
+            reg_id = ObjectId()
+            user_id = str(rng.choice(attendee_ids))
+            registrations.append({"_id": reg_id, "event_id": event_id, "user_id": user_id, "ticket_type": "General",
+                                  "price": 500, "quantity": 1, "status": "confirmed", "payment_status": "paid",
+                                  "registered_at": now - timedelta(minutes=rng.randint(0, 10000))})
+            tickets.append({"ticket_id": f"TKT-{reg_id}", "registration_id": str(reg_id), "seq": 0, "user_id": user_id,
+                            "event_id": event_id, "qr_token": f"bench-{reg_id}", "status": "valid",
+                            "ticket_type": "General", "created_at": now, "used_at": None})
+
+    # One sold-out gate: every ticket for the first event of organizer 0 gets scanned once
+    gate_event = event_ids[0]
+    scan_tokens = []
+    for n in range(scan_tickets):
+        reg_id = ObjectId()
+        user_id = str(attendee_ids[n % attendees])
+        token = f"scan-{reg_id}"
+        scan_tokens.append(token)
+        registrations.append({"_id": reg_id, "event_id": gate_event, "user_id": user_id, "ticket_type": "General",
+                              "price": 500, "quantity": 1, "status": "confirmed", "payment_status": "paid",
+                              "registered_at": now})
+        tickets.append({"ticket_id": f"TKT-{reg_id}", "registration_id": str(reg_id), "seq": 0, "user_id": user_id,
+                        "event_id": gate_event, "qr_token": token, "status": "valid", "ticket_type": "General",
+                        "created_at": now, "used_at": None})
+
+    for chunk in range(0, len(registrations), 5000):
+        db.registrations.insert_many(registrations[chunk:chunk + 5000], ordered=False)
+    for chunk in range(0, len(tickets), 5000):
+        db.tickets.insert_many(tickets[chunk:chunk + 5000], ordered=False)
+    run_migrations(db)
+
+    rng.shuffle(scan_tokens)
+    return {
+        "event_ids": event_ids,
+        "gate_event": gate_event,
+        "organizer_id": str(organizer_ids[0]),
+        "attendee_id": str(attendee_ids[0]),
+        "organizer_token": Security.generate_token(str(organizer_ids[0])),
+        "attendee_tokens": [Security.generate_token(str(oid)) for oid in attendee_ids[:20]],
+        "scan_tokens": scan_tokens
+    }
+
+
+# ---- Scenarios ------------------------------------------------------------------------------------
+# Each one runs a single iteration: request(method, path, body, token, timed=True) sends one call
+# and records its latency under the scenario unless timed=False.
+
+def scenario_feed(request, fx, rng):
+    request('GET', '/api/events')
+    request('GET', '/api/events?featured=true')
+
+
+def scenario_event_detail(request, fx, rng):
+    request('GET', f"/api/events/{rng.choice(fx['event_ids'])}")
+
+
+def _registration(fx, rng, guest):
+    body = {"event_id": rng.choice(fx['event_ids']), "ticket_type": "General", "price": 500, "quantity": 1,
+            "payment_method": "bkash"}
+    if guest:
+        n = rng.randint(0, 1_000_000)
+        body.update(guest_name=f"Guest {n}", guest_email=f"guest{n}@bench.local", guest_phone="01700000000")
+    return body
+
+
+def scenario_checkout_guest(request, fx, rng):
+    request('POST', '/api/registrations', _registration(fx, rng, guest=True))
+
+
+def scenario_checkout_auth(request, fx, rng):
+    request('POST', '/api/registrations', _registration(fx, rng, guest=False), rng.choice(fx['attendee_tokens']))
+
+
+def scenario_confirm_payment(request, fx, rng):
+    token = rng.choice(fx['attendee_tokens'])
+    status, body = request('POST', '/api/registrations', _registration(fx, rng, guest=False), token, timed=False)
+    if status == 201:
+        request('POST', f"/api/registrations/{body['id']}/confirm_payment", None, token)
+
+
+def scenario_organizer(request, fx, rng):
+    token = fx['organizer_token']
+    for path in ('/api/organizer/dashboard', '/api/organizer/stats', '/api/organizer/events',
+                 '/api/organizer/attendees'):
+        request('GET', path, None, token)
+
+
+def scenario_gate_scan(request, fx, rng):
+    qr_token = fx['next_scan']()
+    if qr_token is None:
+        raise StopIteration
+    request('POST', '/api/tickets/validate', {"qr_token": qr_token, "event_id": fx['gate_event']},
+            fx['organizer_token'])
+
+
+# ---- Runner ---------------------------------------------------------------------------------------
+
+def run_scenario(name, port, fx, clients, duration, seed):
+    scenario = globals()[f"scenario_{name}"]
+    if name == 'gate_scan':
+        # Shared by all clients; the scenario ends once every ticket has been scanned
+        tokens = iter(fx['scan_tokens'])
+        tokens_lock = threading.Lock()
+
+        def next_scan():
+            with tokens_lock:
+                return next(tokens, None)
+        fx = dict(fx, next_scan=next_scan)
+
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    start_gate = threading.Barrier(clients)
+    stop_at = [0.0]
+
+    def client(client_seed):
+        rng = random.Random(client_seed)
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        local = []
+        local_errors = 0
+
+        def request(method, path, body=None, token=None, timed=True):
+            nonlocal conn, local_errors
+            headers = {"Accept-Encoding": "br, gzip"}
+            if body is not None:
+                headers["Content-Type"] = "application/json"
+                body = json.dumps(body)
+            if token:
+                headers["Authorization"] = f"Bearer {token}"
+            started = time.perf_counter()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                raw = response.read()
+                status = response.status
+                encoded = response.getheader('Content-Encoding')
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+                status, raw, encoded = 0, b'', None
+            if timed:
+                local.append(time.perf_counter() - started)
+                if status == 0 or status >= 500:
+                    local_errors += 1
+            # Small responses (like a new registration's id) are never compressed
+            if raw and not encoded and response_is_json(raw):
+                return status, json.loads(raw)
+            return status, None
+
+        start_gate.wait()
+        try:
+            while time.time() < stop_at[0]:
+                scenario(request, fx, rng)
+        except StopIteration:
+            pass
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=client, args=(seed * 1000 + i,)) for i in range(clients)]
+    stop_at[0] = time.time() + duration
+    started = time.time()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.time() - started
+
+    ms = sorted(v * 1000 for v in latencies)
+    return {
+        "requests": len(ms),
+        "rps": round(len(ms) / elapsed, 1),
+        "p50": round(percentile(ms, 0.50), 2),
+        "p95": round(percentile(ms, 0.95), 2),
+        "p99": round(percentile(ms, 0.99), 2),
+        "errors": errors[0]
+    }
+
+
+def response_is_json(raw):
+    return raw[:1] in (b'{', b'[')
+
+
+def compare(name, result, base, tolerance):
+    """Regressions of this scenario against its baseline entry, as printable strings"""
+    problems = []
+    if result['requests'] and result['errors'] / result['requests'] > MAX_ERROR_RATE:
+        problems.append(f"error rate {result['errors'] / result['requests']:.1%}")
+    if not base:
+        return problems
+    for key in ('p95', 'p99'):
+        if base[key] and result[key] > base[key] * (1 + tolerance):
+            problems.append(f"{key} {base[key]:.1f} -> {result[key]:.1f}ms")
+    if base['rps'] and result['rps'] < base['rps'] * (1 - tolerance):
+        problems.append(f"throughput {base['rps']:.0f} -> {result['rps']:.0f} req/s")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=15, help="seconds per scenario")
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--worker-class', default='gthread')
+    parser.add_argument('--port', type=int, default=5098)
+    parser.add_argument('--mongodb-uri', default='mongodb://localhost:27017/eventify_bench')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--scan-tickets', type=int, default=3000)
+    parser.add_argument('--baseline', default=os.path.join(current_dir, 'bench_baseline.json'))
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed regression, 0.2 = 20%%")
+    args = parser.parse_args()
+
+    names = [n.strip() for n in args.scenarios.split(',')]
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    db = MongoClient(args.mongodb_uri, serverSelectionTimeoutMS=3000).get_database()
+    print(f"Seeding {db.name}...")
+    fx = seed_database(db, random.Random(args.seed), scan_tickets=args.scan_tickets)
+
+    env = dict(os.environ, MONGODB_URI=args.mongodb_uri, APP_ENV='production', LOG_LEVEL='WARNING',
+               WEB_WORKER_CLASS=args.worker_class, WEB_CONCURRENCY=str(args.workers), PORT=str(args.port))
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app'],
+                              cwd=current_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    results = {}
+    try:
+        if not wait_until_ready(args.port):
+            sys.exit("server failed to start")
+        print(f"{args.workers} {args.worker_class} workers, {args.clients} clients, "
+              f"{args.duration:.0f}s per scenario\n")
+        for name in names:
+            results[name] = run_scenario(name, args.port, fx, args.clients, args.duration, args.seed)
+            r = results[name]
+            print(f"{name:<16} {r['rps']:8.1f} req/s  p50={r['p50']:7.1f}ms  p95={r['p95']:7.1f}ms  "
+                  f"p99={r['p99']:7.1f}ms  requests={r['requests']}  errors={r['errors']}")
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+    if args.save_baseline:
+        baseline = {"options": {"clients": args.clients, "duration": args.duration, "workers": args.workers,
+                                "worker_class": args.worker_class, "seed": args.seed},
+                    "scenarios": results}
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+        return
+
+    base = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            base = json.load(f).get('scenarios', {})
+    else:
+        print(f"\nNo baseline at {args.baseline}, run with --save-baseline to create one")
+
+    failed = False
+    for name, result in results.items():
+        problems = compare(name, result, base.get(name), args.tolerance)
+        if problems:
+            failed = True
+            print(f"REGRESSION {name}: {', '.join(problems)}")
+    if failed:
+        sys.exit(1)
+    print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
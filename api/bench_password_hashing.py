@@ -0,0 +1,84 @@
+"""
+Password hashing benchmark.
+
+Simulates a login spike against Security.check_password (the same code
+path /api/auth/login uses) and reports logins per second per core, plus
+how many requests were shed with 503.
+
+Usage:
+    python bench_password_hashing.py [--rounds 12] [--clients 64] [--seconds 10]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rounds', type=int, default=12)
+    parser.add_argument('--clients', type=int, default=64, help='Concurrent login attempts')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--workers', type=int, default=None, help='BCRYPT_WORKERS (default: CPU count)')
+    parser.add_argument('--max-pending', type=int, default=None, help='BCRYPT_MAX_PENDING')
+    args = parser.parse_args()
+
+    # Config is read at import time, so set the env before importing src
+    os.environ['BCRYPT_ROUNDS'] = str(args.rounds)
+    if args.workers:
+        os.environ['BCRYPT_WORKERS'] = str(args.workers)
+    if args.max_pending:
+        os.environ['BCRYPT_MAX_PENDING'] = str(args.max_pending)
+    from src.config import Config
+    from src.utils.security import Security, PasswordHashingBusy
+
+    cores = os.cpu_count() or 1
+    print(f"bcrypt rounds={Config.BCRYPT_ROUNDS} workers={Config.BCRYPT_WORKERS} "
+          f"max_pending={Config.BCRYPT_MAX_PENDING} clients={args.clients} cores={cores}")
+
+    hashed = Security.hash_password("correct horse battery staple")
+
+    ok = 0
+    shed = 0
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+
+    def client():
+        nonlocal ok, shed
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                Security.check_password(hashed, "correct horse battery staple")
+                with lock:
+                    ok += 1
+                    latencies.append(time.perf_counter() - started)
+            except PasswordHashingBusy:
+                with lock:
+                    shed += 1
+                # A real client would back off on 503 / Retry-After
+                time.sleep(0.05)
+
+    threads = [threading.Thread(target=client) for _ in range(args.clients)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0
+
+    print(f"Logins completed: {ok} in {elapsed:.1f}s")
+    print(f"Logins/sec: {ok / elapsed:.1f}")
+    print(f"Logins/sec/core: {ok / elapsed / cores:.1f}")
+    print(f"Shed with 503: {shed}")
+    print(f"Latency p50={pct(0.50):.0f}ms p95={pct(0.95):.0f}ms p99={pct(0.99):.0f}ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Rate limiter overhead benchmark.
+
+Measures the time one rate-limit check takes with each storage backend,
+using the same `limits` strategy Flask-Limiter runs on every request.
+
+Usage:
+    python bench_rate_limiter.py [--hits 20000]
+
+The MongoDB backend is only measured when MONGODB_URI is set and reachable.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import SlidingWindowCounterRateLimiter
+from src.config import Config
+import src.utils.ratelimit_storage
+
+def measure(name, storage, hits):
+    limiter = SlidingWindowCounterRateLimiter(storage)
+    # Generous limit so every hit takes the "allowed" path, like normal traffic
+    limit = parse("1000000 per minute")
+    samples = []
+    for i in range(hits):
+        started = time.perf_counter()
+        limiter.hit(limit, "bench", f"client-{i % 50}")
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    p50 = samples[len(samples) // 2] * 1e6
+    p99 = samples[int(len(samples) * 0.99)] * 1e6
+    print(f"{name:<24} mean={statistics.mean(samples) * 1e6:9.1f}us  p50={p50:9.1f}us  p99={p99:9.1f}us")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--hits', type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{args.hits} limit checks per backend\n")
+    measure("memory://", storage_from_string("memory://"), args.hits)
+    measure("synced+memory://", storage_from_string("synced+memory://"), args.hits)
+
+    uri = os.getenv('MONGODB_URI')
+    if not uri:
+        print("\nMONGODB_URI not set, skipping MongoDB backends")
+        return
+    try:
+        mongo_storage = storage_from_string(uri)
+        if not mongo_storage.check():
+            raise RuntimeError("check() failed")
+    except Exception as e:
+        print(f"\nMongoDB not reachable ({e}), skipping MongoDB backends")
+        return
+
+    # The network backend is slow, so use fewer hits
+    measure("mongodb:// (per request)", mongo_storage, max(args.hits // 20, 200))
+    measure("synced+mongodb://", storage_from_string(f"synced+{uri}", **Config.RATELIMIT_STORAGE_OPTIONS), args.hits)
+
+if __name__ == '__main__':
+    main()
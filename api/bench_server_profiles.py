@@ -0,0 +1,161 @@
+"""
+Gunicorn worker profile benchmark.
+
+Starts the API under each worker profile from gunicorn.conf.py and drives
+the same request mix at it with concurrent keep-alive clients:
+
+- GET /api/events                (feed, one Mongo query)
+- GET /api/events?featured=true  (homepage)
+- GET /api/events/<id>           (detail, two Mongo queries)
+- POST /api/auth/login           (bcrypt, only with --email/--password)
+
+Usage:
+    python bench_server_profiles.py [--profiles sync,gthread,gevent] [--clients 32] [--duration 20]
+                                    [--workers 2] [--email bench@example.com --password secret]
+                                    [--accept-encoding identity]
+
+Each line reports throughput, latency percentiles and the average response
+size on the wire (compressed unless --accept-encoding identity).
+
+Needs MONGODB_URI pointing at a database with some published events
+(seed_data.py). Run it on the instance size you deploy to; the numbers
+are only comparable between profiles of the same run.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct))]
+
+
+def wait_until_ready(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/healthz')
+            if conn.getresponse().status == 200:
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def build_requests(port, email, password):
+    """Weighted request mix, using real event ids from the feed"""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    conn.request('GET', '/api/events?limit=50')
+    response = conn.getresponse()
+    if response.status != 200:
+        raise RuntimeError(f"GET /api/events returned {response.status}, is MONGODB_URI reachable?")
+    events = json.loads(response.read()).get('events', [])
+    ids = [e['id'] for e in events] or ['000000000000000000000000']
+
+    mix = [('GET', '/api/events', None)] * 4 + [('GET', '/api/events?featured=true', None)] * 2
+    mix += [('GET', f'/api/events/{event_id}', None) for event_id in ids[:4]]
+    if email and password:
+        mix.append(('POST', '/api/auth/login', json.dumps({"email": email, "password": password})))
+    return mix
+
+
+def run_clients(port, mix, clients, duration, accept_encoding='br, gzip'):
+    latencies = []
+    errors = [0]
+    wire_bytes = [0]
+    lock = threading.Lock()
+    stop_at = time.time() + duration
+
+    def client():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        local = []
+        local_errors = 0
+        local_bytes = 0
+        while time.time() < stop_at:
+            method, path, body = random.choice(mix)
+            started = time.perf_counter()
+            try:
+                headers = {"Accept-Encoding": accept_encoding}
+                if body:
+                    headers["Content-Type"] = "application/json"
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                # Compressed size, as sent on the wire
+                local_bytes += len(response.read())
+                if response.status >= 500:
+                    local_errors += 1
+            except (OSError, http.client.HTTPException):
+                local_errors += 1
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+            wire_bytes[0] += local_bytes
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    started = time.time()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return sorted(latencies), errors[0], time.time() - started, wire_bytes[0]
+
+
+def bench_profile(profile, args, port):
+    env = dict(os.environ, WEB_WORKER_CLASS=profile, WEB_CONCURRENCY=str(args.workers),
+               PORT=str(port), LOG_LEVEL='WARNING', APP_ENV='production')
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', 'app:app'], cwd=current_dir, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        if not wait_until_ready(port):
+            print(f"{profile:<8} failed to start")
+            return
+        try:
+            mix = build_requests(port, args.email, args.password)
+        except RuntimeError as e:
+            print(f"{profile:<8} skipped: {e}")
+            return
+        latencies, errors, elapsed, wire_bytes = run_clients(port, mix, args.clients, args.duration,
+                                                             args.accept_encoding)
+        ms = [v * 1000 for v in latencies]
+        print(f"{profile:<8} {len(ms) / elapsed:8.1f} req/s  p50={percentile(ms, 0.50):7.1f}ms  "
+              f"p95={percentile(ms, 0.95):7.1f}ms  p99={percentile(ms, 0.99):7.1f}ms  "
+              f"{wire_bytes / max(len(ms), 1) / 1024:6.1f} KiB/resp  errors={errors}")
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--profiles', default='sync,gthread,gevent')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--port', type=int, default=5099)
+    parser.add_argument('--accept-encoding', default='br, gzip', help="'identity' to measure uncompressed")
+    parser.add_argument('--email')
+    parser.add_argument('--password')
+    args = parser.parse_args()
+
+    print(f"{args.workers} workers, {args.clients} clients, {args.duration:.0f}s per profile\n")
+    for profile in args.profiles.split(','):
+        bench_profile(profile.strip(), args, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Cold start benchmark.
+
+Boots the app in fresh interpreters (like a new gunicorn worker on Render)
+and reports the startup timing recorded by create_app().
+
+Usage:
+    python bench_startup.py [--runs 5] [--profile production]
+
+Add --importtime to list the slowest imports of one boot.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+BOOT = (
+    "import json, app; "
+    "print('STARTUP ' + json.dumps(app.app.extensions['startup_timing']))"
+)
+
+
+def boot_once(env, importtime=False):
+    cmd = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', BOOT]
+    result = subprocess.run(cmd, cwd=current_dir, env=env, capture_output=True, text=True)
+    timing = None
+    for line in result.stdout.splitlines():
+        if line.startswith('STARTUP '):
+            timing = json.loads(line[len('STARTUP '):])
+    if timing is None:
+        raise RuntimeError(f"App failed to boot:\n{result.stderr[-2000:]}")
+    return timing, result.stderr
+
+
+def slowest_imports(stderr, top=15):
+    # Lines look like "import time:   self_us | cumulative_us | <indent>module"
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        # Only modules imported directly by app.py (or by the interpreter);
+        # deeper ones are already counted in their parent
+        if name.startswith('    ') or name.strip() == 'app':
+            continue
+        rows.append((int(cumulative_us), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--profile', default='production')
+    parser.add_argument('--importtime', action='store_true')
+    args = parser.parse_args()
+
+    env = dict(os.environ, APP_ENV=args.profile, LOG_LEVEL='WARNING')
+    runs = [boot_once(env)[0] for _ in range(args.runs)]
+
+    print(f"{args.runs} cold starts, profile={args.profile}\n")
+    for phase in runs[0]:
+        values = [r.get(phase, 0) for r in runs]
+        print(f"{phase:<12} median={statistics.median(values):8.1f}ms  max={max(values):8.1f}ms")
+
+    if args.importtime:
+        _, stderr = boot_once(env, importtime=True)
+        print("\nSlowest imports (cumulative):")
+        for cumulative_us, name in slowest_imports(stderr):
+            print(f"  {cumulative_us / 1000:8.1f}ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Explain-plan regression check.
+
+Seeds a throwaway database (the same data as bench_load.py), calls every
+GET route in the blueprints plus the checkout and gate-scan writes through
+the Flask test client, and captures each distinct query shape the routes
+send (src/utils/query_budget.query_shape). Every shape is then run through
+explain("executionStats") and reported when the plan has
+
+- a COLLSCAN,
+- an in-memory (blocking) SORT, or
+- more than --max-ratio documents examined per document returned
+  (only once --min-examined documents were examined, so tiny lookups pass).
+
+Exits 1 when any shape is flagged, so it can gate index changes:
+
+    python check_query_plans.py [--mongodb-uri mongodb://localhost:27017/eventify_bench]
+                                [--max-ratio 10] [--min-examined 100] [--verbose]
+
+The database named in --mongodb-uri is dropped and re-seeded.
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+os.environ.setdefault('JWT_SECRET', 'bench-load-secret-not-for-production-use')
+
+from flask import has_request_context, request
+from pymongo import MongoClient, monitoring
+from bench_load import seed_database
+from src.utils.query_budget import query_shape
+
+EXPLAINABLE = {'find', 'aggregate', 'count', 'distinct', 'findAndModify', 'update', 'delete'}
+# Driver/session fields that explain rejects or doesn't need
+_SESSION_FIELDS = {'lsid', 'txnNumber', 'autocommit', 'startTransaction', 'writeConcern'}
+
+SKIP_ENDPOINTS = {'static', 'metrics', 'uploaded_file'}
+
+
+class ShapeRecorder(monitoring.CommandListener):
+    """First command seen for each shape, and the endpoints that sent it"""
+
+    def __init__(self):
+        self.shapes = {}
+        self.lock = threading.Lock()
+
+    def started(self, event):
+        if event.command_name not in EXPLAINABLE:
+            return
+        shape = query_shape(event.command_name, event.command)
+        endpoint = request.endpoint if has_request_context() else '-'
+        with self.lock:
+            entry = self.shapes.setdefault(shape, {"command": dict(event.command), "db": event.database_name,
+                                                   "endpoints": set()})
+            entry["endpoints"].add(endpoint)
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def route_requests(app, fx, ticket_id):
+    """(method, url, json, token) for every GET route, plus the main writes"""
+    # Route parameters, filled from the seeded data
+    params = {"event_id": fx['organizer_event'], "ticket_id": ticket_id, "target_id": fx['organizer_id'],
+              "form_id": fx['organizer_event'], "id": fx['organizer_event']}
+    calls = []
+    for rule in app.url_map.iter_rules():
+        if 'GET' not in rule.methods or rule.endpoint in SKIP_ENDPOINTS:
+            continue
+        try:
+            url = rule.build({arg: params[arg] for arg in rule.arguments}, append_unknown=False)[1]
+        except KeyError:
+            print(f"  skipping {rule.rule}: no value for its parameters")
+            continue
+        calls.append(('GET', url, None, fx['organizer_token']))
+        calls.append(('GET', url, None, fx['attendee_tokens'][0]))
+    registration = {"event_id": fx['organizer_event'], "ticket_type": "General", "price": 500, "quantity": 1}
+    calls.append(('POST', '/api/registrations', registration, fx['attendee_tokens'][0]))
+    calls.append(('POST', '/api/registrations',
+                  dict(registration, guest_name="Guest", guest_email="guest@bench.local"), None))
+    calls.append(('POST', '/api/tickets/validate', {"qr_token": fx['scan_tokens'][0]}, fx['organizer_token']))
+    return calls
+
+
+def explain(db, command):
+    cmd = {k: v for k, v in command.items() if not k.startswith('$') and k not in _SESSION_FIELDS}
+    return db.command({"explain": cmd, "verbosity": "executionStats"})
+
+
+def _walk(node, key):
+    """Every value stored under `key` anywhere in an explain document"""
+    if isinstance(node, dict):
+        for k, v in node.items():
+            if k == key:
+                yield v
+            yield from _walk(v, key)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _walk(item, key)
+
+
+def analyze(plan, max_ratio, min_examined):
+    """(summary, problems) for one explain result"""
+    winning = list(_walk(plan, 'winningPlan'))
+    stages = [s for w in winning for s in _walk(w, 'stage')]
+    problems = []
+    if 'COLLSCAN' in stages:
+        problems.append('COLLSCAN')
+    if 'SORT' in stages or any('$sort' in stage for stage in plan.get('stages', []) if isinstance(stage, dict)):
+        problems.append('in-memory sort')
+
+    examined = sum(s.get('totalDocsExamined', 0) for s in _walk(plan, 'executionStats') if isinstance(s, dict))
+    returned = sum(s.get('nReturned', 0) for s in _walk(plan, 'executionStats') if isinstance(s, dict))
+    ratio = examined / max(returned, 1)
+    if examined >= min_examined and ratio > max_ratio:
+        problems.append(f"examined/returned {ratio:.0f}")
+    summary = f"{'>'.join(reversed(list(dict.fromkeys(stages)))) or '?'}  examined={examined} returned={returned}"
+    return summary, problems
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--mongodb-uri', default='mongodb://localhost:27017/eventify_bench')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--max-ratio', type=float, default=10)
+    parser.add_argument('--min-examined', type=int, default=100)
+    parser.add_argument('--verbose', action='store_true', help="print every shape, not only flagged ones")
+    args = parser.parse_args()
+
+    # Before any client exists, like the app's own listeners
+    recorder = ShapeRecorder()
+    monitoring.register(recorder)
+
+    db = MongoClient(args.mongodb_uri, serverSelectionTimeoutMS=3000).get_database()
+    print(f"Seeding {db.name}...")
+    fx = seed_database(db, random.Random(args.seed), scan_tickets=50)
+    fx['organizer_event'] = fx['gate_event']
+    ticket = db.tickets.find_one({"user_id": fx['attendee_id']})
+    recorder.shapes.clear()
+
+    os.environ['MONGODB_URI'] = args.mongodb_uri
+    from app import create_app
+    app = create_app('testing')
+    # Over-budget routes should still run to completion here
+    app.config['QUERY_BUDGET_ENFORCE'] = False
+    client = app.test_client()
+
+    calls = route_requests(app, fx, str(ticket['_id']))
+    for method, url, body, token in calls:
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        client.open(url, method=method, json=body, headers=headers)
+    print(f"{len(calls)} requests, {len(recorder.shapes)} distinct query shapes\n")
+
+    flagged = 0
+    for shape, entry in sorted(recorder.shapes.items()):
+        try:
+            plan = explain(db.client[entry['db']], entry['command'])
+        except Exception as e:
+            print(f"?    {shape}\n       explain failed: {e}")
+            continue
+        summary, problems = analyze(plan, args.max_ratio, args.min_examined)
+        if problems:
+            flagged += 1
+        if problems or args.verbose:
+            print(f"{'FAIL' if problems else 'ok  '} {shape}\n       {summary}"
+                  f"{'  [' + ', '.join(problems) + ']' if problems else ''}\n"
+                  f"       from {', '.join(sorted(entry['endpoints']))}")
+
+    print(f"\n{flagged} of {len(recorder.shapes)} query shapes need an index")
+    if flagged:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
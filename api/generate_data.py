@@ -0,0 +1,324 @@
+"""
+Synthetic data generator.
+
+Builds a production-sized dataset: organizers, users, events with ticket
+types, registrations (paid, pending and guest), their tickets, follows,
+promotions and forms with form responses. Popularity is skewed: event
+demand follows a Zipf distribution (--skew), so a handful of viral events
+take a large share of registrations, like real on-sales.
+
+The output is deterministic for a given --seed: _ids come from
+(collection, index) and every chunk draws from its own seeded RNG, so two
+runs with the same options produce identical documents no matter how many
+--workers insert them. Timestamps are relative to a fixed --now.
+
+Documents are written with unordered insert_many batches from parallel
+processes, and indexes (the migrations) are built after the load, which
+is much faster than maintaining them during it.
+
+Usage:
+    python generate_data.py --mongodb-uri mongodb://localhost:27017/eventify_bench --drop
+    python generate_data.py --scale 10 --workers 8 --drop   # ~10M documents
+
+Every user and organizer can log in with password123 (user<n>@synthetic.local,
+organizer<n>@synthetic.local).
+"""
+import argparse
+import bisect
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+from bson import ObjectId
+from pymongo import MongoClient
+
+# bcrypt('password123') at 4 rounds; logins rehash it to BCRYPT_ROUNDS transparently
+PASSWORD_HASH = "$2b$04$Y2IWqDg8nYL9v6GsnRyDq.jnYQlG5V.7TrQCZNiqb/ZqNIEFZfAEK"
+
+COLLECTIONS = ('users', 'events', 'registrations', 'tickets', 'follows', 'promotions', 'forms')
+# One id space per collection: the first _id byte after the timestamp
+KINDS = {name: n for n, name in enumerate(COLLECTIONS, start=1)}
+
+# Counts at --scale 1 (about a million documents in total)
+BASE_COUNTS = {
+    "organizers": 1_000,
+    "users": 100_000,
+    "events": 10_000,
+    "registrations": 400_000,
+    "follows": 150_000,
+}
+
+CATEGORIES = ["Music", "Tech", "Business", "Sports", "Food", "Arts", "Education", "Community", "Nightlife"]
+CITIES = ["Dhaka", "Chattogram", "Sylhet", "Khulna", "Rajshahi", "Cox's Bazar"]
+TICKET_TYPES = [("General", 500), ("VIP", 2000), ("Early Bird", 300), ("Student", 200), ("Backstage", 5000)]
+FORM_FIELDS = [
+    {"id": "tshirt", "type": "select", "label": "T-shirt size", "required": True, "options": ["S", "M", "L", "XL"]},
+    {"id": "diet", "type": "select", "label": "Dietary needs", "required": False,
+     "options": ["None", "Vegetarian", "Vegan", "Halal"]},
+    {"id": "org", "type": "text", "label": "Organization", "required": False},
+]
+WORDS = ("live music food drinks night festival stage tickets doors open venue parking artists dj "
+         "workshop talk community free entry dress code outdoor indoor family friendly").split()
+
+
+def oid(collection, n, epoch):
+    """Deterministic ObjectId: 4-byte timestamp, 1-byte collection, 7-byte index"""
+    return ObjectId(int(epoch).to_bytes(4, 'big') + bytes([KINDS[collection]]) + n.to_bytes(7, 'big'))
+
+
+def zipf_weights(count, skew):
+    """Cumulative weights for rank 1..count; rank order is shuffled per seed so event 0 isn't always #1"""
+    return list(accumulate(1 / (rank ** skew) for rank in range(1, count + 1)))
+
+
+def event_ticket_types(n):
+    """General admission plus up to two more, derived from the index so registrations can pick a real one"""
+    return TICKET_TYPES[:1 + n % 3]
+
+
+def pick(rng, cumulative):
+    return bisect.bisect_left(cumulative, rng.random() * cumulative[-1])
+
+
+# ---- Generators. Each builds documents [start, end) for one chunk. ---------------------------------
+
+def gen_users(spec, start, end, rng):
+    docs = []
+    for n in range(start, end):
+        organizer = n < spec['organizers']
+        email = f"organizer{n}@synthetic.local" if organizer else f"user{n}@synthetic.local"
+        created = spec['now'] - timedelta(days=rng.randint(0, 900), seconds=rng.randint(0, 86400))
+        doc = {"_id": oid('users', n, spec['epoch']), "email": email, "password": PASSWORD_HASH,
+               "name": f"{'Organizer' if organizer else 'User'} {n}", "role": "user", "is_verified": True,
+               "is_organizer": organizer, "created_at": created, "metadata": {}}
+        if organizer:
+            doc["organization_name"] = f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} Events"
+        docs.append(doc)
+    return {'users': docs}
+
+
+def gen_events(spec, start, end, rng):
+    docs = []
+    for n in range(start, end):
+        organizer = spec['event_organizer'](n)
+        created = spec['now'] - timedelta(days=rng.randint(0, 720), seconds=rng.randint(0, 86400))
+        start_at = created + timedelta(days=rng.randint(7, 120))
+        tickets = []
+        for name, price in event_ticket_types(n):
+            ticket = {"name": name, "price": price, "quantity": rng.choice([50, 100, 200, 500, 1000])}
+            if n % 4 == 0:
+                ticket["form_id"] = str(oid('forms', organizer, spec['epoch']))
+            tickets.append(ticket)
+        docs.append({
+            "_id": oid('events', n, spec['epoch']),
+            "created_by": oid('users', organizer, spec['epoch']),
+            "title": f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {n}",
+            "description": " ".join(rng.choice(WORDS) for _ in range(rng.randint(30, 120))),
+            "category": rng.choice(CATEGORIES),
+            "city": rng.choice(CITIES),
+            "venue": f"{rng.choice(WORDS).title()} Hall",
+            "start_date": start_at.strftime('%Y-%m-%d'),
+            "start_time": f"{rng.randint(10, 21)}:00",
+            "tickets": tickets,
+            "capacity": sum(t["quantity"] for t in tickets),
+            "status": "published" if rng.random() < 0.9 else "draft",
+            "is_featured": rng.random() < 0.02,
+            "visibility": "public",
+            "created_at": created,
+            "updated_at": created,
+        })
+    return {'events': docs}
+
+
+def gen_registrations(spec, start, end, rng):
+    """Registrations and, for confirmed ones, their tickets"""
+    registrations, tickets = [], []
+    for n in range(start, end):
+        event_n = spec['event_rank'][pick(rng, spec['event_weights'])]
+        event_id = str(oid('events', event_n, spec['epoch']))
+        ticket_name, price = rng.choice(event_ticket_types(event_n))
+        quantity = rng.choices([1, 2, 3, 4], weights=[70, 20, 6, 4])[0]
+        guest = rng.random() < 0.1
+        user = None if guest else spec['organizers'] + rng.randrange(spec['users'] - spec['organizers'])
+        user_id = "guest" if guest else str(oid('users', user, spec['epoch']))
+        roll = rng.random()
+        status, payment_status = ("confirmed", "paid") if roll < 0.82 else \
+            ("pending", "pending") if roll < 0.97 else ("cancelled", "refunded")
+        registered = spec['now'] - timedelta(minutes=rng.randint(0, 720 * 24 * 60))
+        reg_id = oid('registrations', n, spec['epoch'])
+        reg = {"_id": reg_id, "event_id": event_id, "user_id": user_id, "ticket_type": ticket_name,
+               "price": price * quantity, "quantity": quantity, "payment_method": rng.choice(["bkash", "nagad", "Card"]),
+               "status": status, "payment_status": payment_status, "registered_at": registered,
+               "form_data": [], "guest_name": None, "guest_email": None, "guest_phone": None}
+        if guest:
+            reg.update(guest_name=f"Guest {n}", guest_email=f"guest{n}@synthetic.local", guest_phone="01700000000")
+        if event_n % 4 == 0:
+            # Events with a registration form (see gen_events) collect a response
+            reg["form_data"] = [{"field_id": "tshirt", "value": rng.choice(["S", "M", "L", "XL"])},
+                                {"field_id": "diet", "value": rng.choice(["None", "Vegetarian", "Vegan", "Halal"])}]
+        if status == "confirmed":
+            reg["paid_at"] = registered + timedelta(minutes=rng.randint(1, 30))
+            for i in range(quantity):
+                used = rng.random() < 0.3
+                tickets.append({
+                    "_id": oid('tickets', n * 4 + i, spec['epoch']),
+                    "ticket_id": f"TKT-{rng.getrandbits(64):016X}",
+                    "registration_id": str(reg_id), "user_id": user_id, "event_id": event_id,
+                    "qr_token": f"{rng.getrandbits(256):064x}", "status": "used" if used else "valid",
+                    "ticket_type": ticket_name, "created_at": reg["paid_at"],
+                    "used_at": reg["paid_at"] + timedelta(days=rng.randint(1, 60)) if used else None,
+                    "validated_by": None
+                })
+        registrations.append(reg)
+    return {'registrations': registrations, 'tickets': tickets}
+
+
+def gen_follows(spec, start, end, rng):
+    docs = []
+    organizers = spec['organizers']
+    for n in range(start, end):
+        follower = organizers + (n * 7919) % (spec['users'] - organizers)
+        followed = spec['organizer_rank'][pick(rng, spec['organizer_weights'])]
+        docs.append({"_id": oid('follows', n, spec['epoch']), "follower_id": oid('users', follower, spec['epoch']),
+                     "followed_id": oid('users', followed, spec['epoch']),
+                     "created_at": spec['now'] - timedelta(days=rng.randint(0, 700))})
+    return {'follows': docs}
+
+
+def gen_organizer_extras(spec, start, end, rng):
+    """One registration form per organizer, and 0-4 promo codes"""
+    forms, promotions = [], []
+    for n in range(start, end):
+        organizer = oid('users', n, spec['epoch'])
+        forms.append({"_id": oid('forms', n, spec['epoch']), "organizer_id": organizer,
+                      "title": "Attendee details", "fields": FORM_FIELDS,
+                      "created_at": spec['now'] - timedelta(days=rng.randint(30, 700)), "updated_at": spec['now']})
+        for i in range(rng.randint(0, 4)):
+            promotions.append({
+                "_id": oid('promotions', n * 4 + i, spec['epoch']), "created_by": organizer,
+                "code": f"SYN{n}X{i}", "type": rng.choice(["percentage", "fixed"]),
+                "amount": float(rng.choice([5, 10, 15, 20, 100, 200])),
+                "event_id": None, "description": "", "usage_limit": rng.choice([0, 50, 100, 500]),
+                "used_count": rng.randint(0, 50), "expiry_date": None, "status": "active",
+                "created_at": spec['now'] - timedelta(days=rng.randint(0, 365))
+            })
+    return {'forms': forms, 'promotions': promotions}
+
+
+GENERATORS = {
+    'users': gen_users,
+    'events': gen_events,
+    'registrations': gen_registrations,
+    'follows': gen_follows,
+    'organizer_extras': gen_organizer_extras,
+}
+
+
+# ---- Workers ---------------------------------------------------------------------------------------
+
+_db = None
+_spec = None
+
+
+def _init_worker(uri, spec):
+    # Sent once per process rather than with every chunk
+    global _db, _spec
+    _db = MongoClient(uri).get_database()
+    _spec = spec
+
+
+def build_spec(args):
+    counts = {k: int(v * args.scale) for k, v in BASE_COUNTS.items()}
+    now = datetime.fromisoformat(args.now)
+    spec = dict(counts, seed=args.seed, now=now, epoch=now.timestamp())
+    # Zipf ranks are shuffled by the seed, so which events go viral is part of the dataset
+    rng = random.Random(args.seed)
+    spec['event_rank'] = rng.sample(range(counts['events']), counts['events'])
+    spec['event_weights'] = zipf_weights(counts['events'], args.skew)
+    spec['organizer_rank'] = rng.sample(range(counts['organizers']), counts['organizers'])
+    spec['organizer_weights'] = zipf_weights(counts['organizers'], args.skew)
+    return spec
+
+
+def run_chunk(task, start, end, batch_size, dry_run):
+    """Generate and insert one chunk, returns {collection: inserted}"""
+    spec = _spec
+    rng = random.Random(f"{spec['seed']}:{task}:{start}")
+    # Events belong to organizers with a mild skew: a few organizers run many events
+    spec = dict(spec, event_organizer=lambda n: int(spec['organizers'] * (n / spec['events']) ** 2))
+    inserted = {}
+    for collection, docs in GENERATORS[task](spec, start, end, rng).items():
+        if not dry_run:
+            for i in range(0, len(docs), batch_size):
+                _db[collection].insert_many(docs[i:i + batch_size], ordered=False, bypass_document_validation=True)
+        inserted[collection] = len(docs)
+    return inserted
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--mongodb-uri', default='mongodb://localhost:27017/eventify_bench')
+    parser.add_argument('--scale', type=float, default=1.0, help="1 = ~1M documents")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--skew', type=float, default=1.1, help="Zipf exponent for event/organizer popularity")
+    parser.add_argument('--now', default='2026-06-01T00:00:00', help="anchor for all generated timestamps")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+    parser.add_argument('--chunk-size', type=int, default=20_000, help="documents generated per task")
+    parser.add_argument('--batch-size', type=int, default=5_000, help="documents per insert_many")
+    parser.add_argument('--drop', action='store_true', help="drop the generated collections first")
+    parser.add_argument('--dry-run', action='store_true', help="generate without inserting (measures the generator)")
+    args = parser.parse_args()
+
+    spec = build_spec(args)
+    db = MongoClient(args.mongodb_uri, serverSelectionTimeoutMS=3000).get_database() if not args.dry_run else None
+    if db is not None:
+        if args.drop:
+            for name in COLLECTIONS:
+                db[name].drop()
+        elif any(db[name].estimated_document_count() for name in COLLECTIONS):
+            sys.exit(f"{db.name} already has data, pass --drop to replace it")
+
+    # Tasks are fixed-size chunks, so the RNG stream (and the data) doesn't depend on --workers
+    plan = [('users', spec['users']), ('events', spec['events']), ('organizer_extras', spec['organizers']),
+            ('registrations', spec['registrations']), ('follows', spec['follows'])]
+    tasks = [(task, start, min(start + args.chunk_size, total))
+             for task, total in plan for start in range(0, total, args.chunk_size)]
+    print(f"{db.name if db is not None else 'dry run'}: scale {args.scale}, seed {args.seed}, "
+          f"{len(tasks)} chunks on {args.workers} workers")
+
+    totals = dict.fromkeys(COLLECTIONS, 0)
+    started = time.perf_counter()
+    with ProcessPoolExecutor(args.workers, initializer=_init_worker, initargs=(args.mongodb_uri, spec)) as pool:
+        futures = [pool.submit(run_chunk, task, start, end, args.batch_size, args.dry_run)
+                   for task, start, end in tasks]
+        for done, future in enumerate(as_completed(futures), start=1):
+            for collection, count in future.result().items():
+                totals[collection] += count
+            if done % max(1, len(futures) // 20) == 0 or done == len(futures):
+                elapsed = time.perf_counter() - started
+                print(f"  {done}/{len(futures)} chunks  {sum(totals.values()):>10,} docs  "
+                      f"{sum(totals.values()) / elapsed:>9,.0f} docs/s")
+    load_s = time.perf_counter() - started
+
+    for name in COLLECTIONS:
+        print(f"  {name:<14} {totals[name]:>10,}")
+    print(f"Loaded {sum(totals.values()):,} documents in {load_s:.1f}s")
+
+    if db is not None:
+        from src.utils.migrations import run_migrations
+        started = time.perf_counter()
+        # Fresh data: re-apply every migration's indexes, not only the unrecorded ones
+        db.schema_migrations.drop()
+        run_migrations(db)
+        print(f"Indexes built in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
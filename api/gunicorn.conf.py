@@ -0,0 +1,165 @@
+"""
+Gunicorn configuration (loaded automatically from the working directory).
+
+    gunicorn app:app                          # gthread profile, sized from CPU / memory
+    WEB_WORKER_CLASS=gevent gunicorn app:app  # cooperative I/O profile
+
+Every setting can be overridden with an environment variable:
+
+    WEB_WORKER_CLASS     gthread (default) | gevent | sync
+    WEB_CONCURRENCY      number of worker processes (default: derived, see below)
+    WEB_THREADS          threads per gthread worker (default 8)
+    WEB_CONNECTIONS      concurrent requests per gevent worker (default 200)
+    WEB_WORKER_MEMORY_MB expected RSS of one worker, caps the worker count (default 200)
+    WEB_PRELOAD          import the app once in the master and fork (default true, false for gevent)
+    WEB_TIMEOUT          seconds before a silent worker is killed (default 60)
+    WEB_GRACEFUL_TIMEOUT seconds a worker gets to finish in-flight requests on restart (default 30)
+    WEB_MAX_REQUESTS     recycle a worker after this many requests, 0 = never (default 2000)
+
+Profiles
+- gthread: each worker runs a pool of OS threads. pymongo, the Resend SDK
+  and bcrypt (on its own executor, see src/utils/security.py) all release
+  the GIL while they wait, so a slow query or email no longer stalls the
+  instance. Safe default.
+- gevent: monkey-patched cooperative I/O, hundreds of concurrent requests
+  per worker. Use when most time is spent waiting on Atlas / Resend.
+
+gevent audit
+- pymongo: supported under gevent once socket/threading are patched; the
+  patch must happen before pymongo is imported, which is why it is done at
+  the top of this file. Its monitor threads must be started in the worker,
+  hence no preload with gevent.
+- resend: uses requests/urllib3 over the patched socket module, cooperative.
+- dnspython (mongodb+srv lookups): uses the patched socket, cooperative.
+- bcrypt: CPU bound C code. A patched ThreadPoolExecutor would run it in a
+  greenlet and freeze the worker, so PasswordHasher switches to gevent's
+  native thread pool when it detects monkey-patching.
+- logging listener and rate limit sync threads become greenlets; both only
+  block on queue/event waits, which are patched.
+- Pillow WebP conversion in the upload routes is CPU bound and still runs
+  inline, so a large upload blocks other greenlets of that worker for
+  ~100 ms. Acceptable for the upload volume we have; gthread avoids it.
+"""
+import math
+import os
+
+worker_class = os.getenv('WEB_WORKER_CLASS', 'gthread')
+
+if worker_class == 'gevent':
+    # Must run before pymongo (or anything using sockets/threads) is imported
+    from gevent import monkey
+    monkey.patch_all()
+
+
+def _cpu_count():
+    # Respect the container's CPU quota (cgroup v2), not the host's core count
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            return max(1, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _memory_mb():
+    for path in ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes'):
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+            if value != 'max' and int(value) < 1 << 50:
+                return int(value) // (1024 * 1024)
+        except (OSError, ValueError):
+            pass
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') // (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def _default_workers():
+    cpus = _cpu_count()
+    # Threads/greenlets provide the I/O concurrency; processes only need to cover the CPUs
+    workers = cpus + 1 if worker_class != 'sync' else cpus * 2 + 1
+    memory = _memory_mb()
+    if memory:
+        # Leave ~25% headroom for the master, page cache and spikes
+        per_worker = int(os.getenv('WEB_WORKER_MEMORY_MB', 200))
+        workers = min(workers, int(memory * 0.75) // per_worker)
+    return max(1, workers)
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_CONCURRENCY') or _default_workers())
+threads = int(os.getenv('WEB_THREADS', 8)) if worker_class == 'gthread' else 1
+worker_connections = int(os.getenv('WEB_CONNECTIONS', 200))
+
+# Import once in the master: faster boots and shared memory pages.
+# Resources that can't cross a fork are re-created in post_fork below.
+# Not with gevent: threads started in the master (pymongo monitors, the
+# limiter's expiry timer) are greenlets there and crash when the child's hub
+# tries to resume them, so gevent workers import the app themselves.
+preload_app = os.getenv('WEB_PRELOAD', 'false' if worker_class == 'gevent' else 'true').lower() == 'true'
+
+timeout = int(os.getenv('WEB_TIMEOUT', 60))
+graceful_timeout = int(os.getenv('WEB_GRACEFUL_TIMEOUT', 30))
+# Render's proxy keeps connections open; don't make it reconnect for every request
+keepalive = 5
+
+# Recycle workers periodically (guards against slow leaks); the jitter keeps
+# them from all restarting at the same moment
+max_requests = int(os.getenv('WEB_MAX_REQUESTS', 2000))
+max_requests_jitter = max_requests // 10
+
+# Heartbeat file in memory, so a slow disk can't get healthy workers killed
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+# Prometheus multiprocess mode: workers write their metrics to files in this
+# directory and /metrics merges them (src/utils/metrics.py). Must be set up
+# here, before --preload imports prometheus_client. Files left by a previous
+# run would be merged into the new counters, so start from an empty directory.
+metrics_dir = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/eventify-metrics')
+os.makedirs(metrics_dir, exist_ok=True)
+for _name in os.listdir(metrics_dir):
+    if _name.endswith('.db'):
+        os.remove(os.path.join(metrics_dir, _name))
+
+# Access logs come from the app (src/utils/log_setup.py)
+accesslog = None
+errorlog = '-'
+
+
+def child_exit(server, worker):
+    # Drop the dead worker's live gauges (in-flight, pool, queue depth)
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def post_fork(server, worker):
+    """
+    Runs in each worker right after the fork. With preload_app the master
+    already created these, and they don't survive a fork:
+    - the logging listener thread (and its possibly locked queue)
+    - the MongoDB client (sockets and monitor threads)
+    The bcrypt executor and the rate limit sync thread check os.getpid() and
+    are started lazily in the worker, so they need nothing here.
+    """
+    from src.database import mongo
+    from src.utils.log_setup import restart_logging
+    restart_logging()
+    mongo.reconnect()
+
+
+def worker_exit(server, worker):
+    # Flush queued log records before the worker goes away
+    from src.utils.log_setup import stop_logging
+    stop_logging()
+
+
+def when_ready(server):
+    server.log.info("Serving with %s workers x %s (%s)", workers,
+                    threads if worker_class == 'gthread' else worker_connections, worker_class)
@@ -0,0 +1,133 @@
+"""
+Local payment webhook simulator.
+
+Sends signed payment events to a running API the way bKash, Nagad and
+card gateways would at sale time: a burst from concurrent connections,
+with provider retries (the same event id again) and some requests signed
+with the wrong secret. Reports the responses by status and the endpoint
+latency; the events are applied afterwards by
+`flask --app app data process-payments`.
+
+- Confirm real orders: --reference ORDER_ID (repeatable) with --amount
+  set to the order total; every event of the burst then pays one of them.
+- Without --reference the events point at made-up orders, which the
+  payments worker records as unknown_reference: a pure ingestion test.
+
+Usage:
+    python simulate_payment_webhooks.py [--provider bkash] [--secret $BKASH_WEBHOOK_SECRET]
+                                        [--url http://localhost:5000] [--burst 2000] [--threads 32]
+                                        [--reference ORDER_ID --amount 1400] [--type payment.succeeded]
+                                        [--duplicate-rate 0.1] [--bad-signature-rate 0.01]
+
+Expected: 202 for new events, 200 for duplicates, 401 for bad signatures.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from urllib.parse import urlparse
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+from bench_server_profiles import percentile
+from src.services.payment_service import EVENT_TYPES, PROVIDERS, SIGNATURE_HEADER, sign
+
+
+def build_events(args):
+    """(body, signature) for every request of the burst, retries and bad signatures included"""
+    rng = random.Random(args.seed)
+    run = uuid.uuid4().hex[:8]
+    requests, sent = [], []
+    for i in range(args.burst):
+        if sent and rng.random() < args.duplicate_rate:
+            body = rng.choice(sent)
+        else:
+            reference = rng.choice(args.reference) if args.reference else uuid.uuid4().hex[:24]
+            body = json.dumps({"id": f"evt_{run}_{i}", "type": args.type,
+                               "data": {"reference": reference, "amount": args.amount, "currency": "BDT",
+                                        "transaction_id": f"{args.provider.upper()}{run}{i}"}}).encode()
+            sent.append(body)
+        secret = args.secret if rng.random() >= args.bad_signature_rate else args.secret + '-wrong'
+        requests.append((body, sign(secret, body)))
+    return requests
+
+
+def send(url, provider, requests, threads):
+    """POST the requests over `threads` keep-alive connections; returns (status counts, latencies, seconds)"""
+    target = urlparse(url)
+    path = f"{target.path.rstrip('/')}/api/payments/webhooks/{provider}"
+    statuses = Counter()
+    latencies = []
+    lock = threading.Lock()
+    pending = list(reversed(requests))
+
+    def client():
+        conn = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=30)
+        while True:
+            with lock:
+                if not pending:
+                    break
+                body, signature = pending.pop()
+            started = time.perf_counter()
+            try:
+                conn.request('POST', path, body=body,
+                             headers={'Content-Type': 'application/json', SIGNATURE_HEADER: signature})
+                response = conn.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=30)
+                status = 'error'
+            elapsed = time.perf_counter() - started
+            with lock:
+                statuses[status] += 1
+                latencies.append(elapsed)
+        conn.close()
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=client) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return statuses, sorted(latencies), time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--provider', default='bkash', choices=PROVIDERS)
+    parser.add_argument('--secret', help="The provider's webhook secret (default: $<PROVIDER>_WEBHOOK_SECRET).")
+    parser.add_argument('--reference', action='append', help='Order or registration ID to pay (repeatable).')
+    parser.add_argument('--amount', type=float, help='Amount paid per event (the order total).')
+    parser.add_argument('--type', default='payment.succeeded', choices=EVENT_TYPES)
+    parser.add_argument('--burst', type=int, default=2000, help='Requests to send.')
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--duplicate-rate', type=float, default=0.1, help='Fraction of requests that are retries.')
+    parser.add_argument('--bad-signature-rate', type=float, default=0.01)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    args.secret = args.secret or os.getenv(f'{args.provider.upper()}_WEBHOOK_SECRET')
+    if not args.secret:
+        parser.error('--secret is required')
+
+    requests = build_events(args)
+    statuses, latencies, elapsed = send(args.url, args.provider, requests, args.threads)
+    print(f"{len(requests):,} webhooks to {args.provider}, {args.threads} connections, {elapsed:.1f}s "
+          f"({len(requests) / elapsed:,.0f}/s)")
+    print(f"p50 {percentile(latencies, 0.5) * 1000:.1f} ms  p99 {percentile(latencies, 0.99) * 1000:.1f} ms")
+    for status, count in sorted(statuses.items(), key=lambda item: str(item[0])):
+        print(f"  {status}: {count:,}")
+    sys.exit(1 if statuses.get('error') or any(str(s).startswith('5') for s in statuses) else 0)
+
+
+if __name__ == '__main__':
+    main()
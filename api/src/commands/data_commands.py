@@ -0,0 +1,422 @@
+"""
+Data repair commands, built on src/utils/batch_jobs.py.
+
+    flask --app app data dedupe-registrations [--dry-run]
+    flask --app app data dedupe-tickets
+    flask --app app data cleanup-orphaned-registrations
+    flask --app app data fix-user-names
+    flask --app app data fix-ticket-user-ids
+    flask --app app data events-to-future --days 1      # local/staging data only
+    flask --app app data integrity [--check tickets] [--repair]
+    flask --app app data archive-past-events --days 90
+    flask --app app data expire-reservations             # cron, every few minutes
+    flask --app app data process-payments [--follow]     # worker: apply payment webhooks
+    flask --app app data payment-events [--retry ID | --resolve ID --note "refunded"]
+    flask --app app data inventory-slots EVENT_ID 16     # before a flash sale
+    flask --app app data waiting-room EVENT_ID --rate 50 [--opens-at 2026-11-01T10:00] | --off
+
+Every batched job takes --chunk-size, --dry-run and --resume (continue
+from the last checkpoint after an interruption).
+
+Replaces cleanup_dup_regs.py, cleanup_duplicates.py,
+cleanup_orphaned_registrations.py, fix_all_user_names.py,
+fix_ticket_user_ids.py, update_all_events.py and analyze_orphaned_data.py.
+"""
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+import click
+from bson.objectid import ObjectId
+from flask.cli import AppGroup
+from pymongo import DeleteMany, ReplaceOne, UpdateOne
+from src.database import mongo, docs_by_id
+from src.utils import inventory
+from src.utils.archive import archive_of, ended_event_ids
+from src.utils.batch_jobs import find_source, run_batched
+from src.utils.reservations import expired_query, release_reservations
+
+data_cli = AppGroup('data', help='Data repair jobs.')
+
+# Registrations without an account all share these user_ids, they are not duplicates of each other
+GUEST_USER_IDS = ["guest", None, "", "None"]
+
+
+def job_options(f):
+    f = click.option('--resume', is_flag=True, help='Continue after the last checkpoint of this job.')(f)
+    f = click.option('--dry-run', is_flag=True, help='Count the writes without applying them.')(f)
+    f = click.option('--chunk-size', default=1000, show_default=True, help='Documents per chunk / bulk_write.')(f)
+    return f
+
+
+def aggregate_source(collection, pipeline, grouped=True):
+    """
+    Source for aggregation jobs. Grouped results are sorted by their group _id
+    so they resume like a find(); per-document pipelines (grouped=False) start
+    from the _id index and skip to the checkpoint before doing any work.
+    """
+    def source(after):
+        if grouped:
+            stages = pipeline + [{"$sort": {"_id": 1}}]
+            if after is not None:
+                stages.append({"$match": {"_id": {"$gt": after}}})
+        else:
+            stages = ([{"$match": {"_id": {"$gt": after}}}] if after is not None else []) + \
+                     [{"$sort": {"_id": 1}}] + pipeline
+        return collection.aggregate(stages, allowDiskUse=True, batchSize=1000)
+    return source
+
+
+@data_cli.command('dedupe-registrations')
+@job_options
+def dedupe_registrations(chunk_size, dry_run, resume):
+    """Keep the oldest registration per user and event, delete the rest, their tickets and seats."""
+    pipeline = [
+        # The lines of a cart order share user and event on purpose
+        {"$match": {"user_id": {"$nin": GUEST_USER_IDS}, "order_id": None}},
+        {"$sort": {"_id": 1}},
+        {"$group": {"_id": {"user_id": "$user_id", "event_id": "$event_id"},
+                    "reg_ids": {"$push": "$_id"}, "holds": {"$push": {"$ifNull": ["$inventory_holds", []]}},
+                    "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+    ]
+
+    def handler(groups):
+        extra = [reg_id for group in groups for reg_id in group['reg_ids'][1:]]
+        yield 'registrations', DeleteMany({"_id": {"$in": extra}})
+        yield 'tickets', DeleteMany({"registration_id": {"$in": [str(reg_id) for reg_id in extra]}})
+        for op in inventory.release_ops([hold for group in groups for holds in group['holds'][1:] for hold in holds]):
+            yield inventory.INVENTORY_COLLECTION, op
+
+    run_batched('dedupe-registrations', aggregate_source(mongo.db.registrations, pipeline), handler,
+                chunk_size, dry_run, resume)
+
+
+@data_cli.command('dedupe-tickets')
+@job_options
+def dedupe_tickets(chunk_size, dry_run, resume):
+    """Delete tickets beyond their registration's quantity (newest first)."""
+    pipeline = [
+        {"$sort": {"_id": 1}},
+        {"$group": {"_id": "$registration_id", "ticket_ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+    ]
+
+    def handler(groups):
+        registrations = docs_by_id(mongo.db.registrations, [g['_id'] for g in groups], {"quantity": 1})
+        extra = []
+        for group in groups:
+            reg = registrations.get(str(group['_id']))
+            if reg:
+                extra.extend(group['ticket_ids'][reg.get('quantity', 1):])
+        if extra:
+            yield 'tickets', DeleteMany({"_id": {"$in": extra}})
+
+    run_batched('dedupe-tickets', aggregate_source(mongo.db.tickets, pipeline), handler,
+                chunk_size, dry_run, resume)
+
+
+@data_cli.command('cleanup-orphaned-registrations')
+@job_options
+def cleanup_orphaned_registrations(chunk_size, dry_run, resume):
+    """Delete registrations whose event no longer exists."""
+    def handler(regs):
+        events = docs_by_id(mongo.db.events, {reg.get('event_id') for reg in regs}, {"_id": 1})
+        orphans = [reg['_id'] for reg in regs if str(reg.get('event_id')) not in events]
+        if orphans:
+            yield 'registrations', DeleteMany({"_id": {"$in": orphans}})
+
+    run_batched('cleanup-orphaned-registrations', find_source(mongo.db.registrations, {}, {"event_id": 1}),
+                handler, chunk_size, dry_run, resume)
+
+
+@data_cli.command('fix-user-names')
+@job_options
+def fix_user_names(chunk_size, dry_run, resume):
+    """Give users with a missing/blank/'N/A' name one derived from their email."""
+    query = {"$or": [{"name": {"$exists": False}}, {"name": {"$in": [None, "", "N/A"]}},
+                     {"name": {"$regex": r"^\s*$"}}]}
+
+    def handler(users):
+        for user in users:
+            name = user.get('email', '').split('@')[0].replace('.', ' ').replace('_', ' ').title()
+            if name:
+                yield 'users', UpdateOne({"_id": user['_id']}, {"$set": {"name": name}})
+
+    run_batched('fix-user-names', find_source(mongo.db.users, query, {"email": 1}), handler,
+                chunk_size, dry_run, resume)
+
+
+@data_cli.command('fix-ticket-user-ids')
+@job_options
+def fix_ticket_user_ids(chunk_size, dry_run, resume):
+    """Point tickets that reference a user by the legacy 'id' field at the user's _id."""
+    def handler(tickets):
+        user_ids = {t['user_id'] for t in tickets}
+        known = docs_by_id(mongo.db.users, user_ids, {"_id": 1})
+        unknown = [uid for uid in user_ids if str(uid) not in known]
+        if not unknown:
+            return
+        legacy = {u['id']: str(u['_id']) for u in mongo.db.users.find({"id": {"$in": unknown}}, {"id": 1})}
+        for ticket in tickets:
+            if ticket['user_id'] in legacy:
+                yield 'tickets', UpdateOne({"_id": ticket['_id']}, {"$set": {"user_id": legacy[ticket['user_id']]}})
+
+    query = {"user_id": {"$nin": GUEST_USER_IDS}}
+    run_batched('fix-ticket-user-ids', find_source(mongo.db.tickets, query, {"user_id": 1}), handler,
+                chunk_size, dry_run, resume)
+
+
+@data_cli.command('events-to-future')
+@click.option('--days', default=1, show_default=True, help='Move every event this many days from now.')
+@click.option('--dry-run', is_flag=True)
+def events_to_future(days, dry_run):
+    """Re-date every event (local/staging data only). One update_many, no per-event writes."""
+    target = datetime.now() + timedelta(days=days)
+    if dry_run:
+        click.echo(f"Would move {mongo.db.events.count_documents({}):,} events to {target:%Y-%m-%d}")
+        return
+    result = mongo.db.events.update_many({}, {"$set": {"target_date": target.isoformat(),
+                                                       "date": target.strftime('%Y-%m-%d'),
+                                                       "start_date": target.isoformat()}})
+    click.echo(f"Moved {result.modified_count:,} events to {target:%Y-%m-%d}")
+
+
+# ---- Referential integrity ------------------------------------------------------------------------
+# Each check is one aggregation over a collection, in _id order, that outputs only the broken documents
+# with a `problem`. References are stored as strings; $convert turns them back into ObjectIds (leaving
+# legacy string _ids as they are) so $lookup can use the _id index. Needs MongoDB 5.0+.
+
+def _as_object_id(field):
+    return {"$convert": {"input": f"${field}", "to": "objectId", "onError": f"${field}", "onNull": None}}
+
+
+# A tuple means any one of the fields will do
+REQUIRED_EVENT_FIELDS = ['title', 'created_by', ('start_date', 'date')]
+
+INTEGRITY_CHECKS = {
+    'registrations': ('registrations', [
+        {"$project": {"event_id": 1, "inventory_holds": 1, "event_ref": _as_object_id('event_id')}},
+        {"$lookup": {"from": "events", "localField": "event_ref", "foreignField": "_id",
+                     "pipeline": [{"$project": {"_id": 1}}], "as": "event"}},
+        {"$match": {"event": {"$size": 0}}},
+        {"$project": {"event_id": 1, "inventory_holds": 1, "problem": "registration_without_event"}},
+    ]),
+    'tickets': ('tickets', [
+        {"$project": {"user_id": 1, "registration_id": 1, "registration_ref": _as_object_id('registration_id')}},
+        {"$lookup": {"from": "registrations", "localField": "registration_ref", "foreignField": "_id",
+                     "pipeline": [{"$project": {"user_id": 1}}], "as": "registration"}},
+        {"$project": {"user_id": 1, "registration_id": 1,
+                      "registration_user_id": {"$first": "$registration.user_id"},
+                      "problem": {"$switch": {"branches": [
+                          {"case": {"$eq": [{"$size": "$registration"}, 0]}, "then": "ticket_without_registration"},
+                          {"case": {"$ne": [{"$toString": "$user_id"},
+                                            {"$toString": {"$first": "$registration.user_id"}}]},
+                           "then": "ticket_user_mismatch"}],
+                          "default": None}}}},
+        {"$match": {"problem": {"$ne": None}}},
+    ]),
+    'events': ('events', [
+        {"$match": {"$or": [
+            {"$and": [{name: {"$in": [None, ""]}} for name in field]} if isinstance(field, tuple)
+            else {field: {"$in": [None, ""]}}
+            for field in REQUIRED_EVENT_FIELDS
+        ]}},
+        {"$project": {"_id": 1, "problem": "event_missing_required_fields"}},
+    ]),
+}
+
+
+def integrity_repairs(docs):
+    """Write ops that fix a chunk of flagged documents. Events with missing fields need a human."""
+    orphans = {'registrations': [], 'tickets': []}
+    holds = []
+    for doc in docs:
+        if doc['problem'] == 'registration_without_event':
+            orphans['registrations'].append(doc['_id'])
+            holds.extend(doc.get('inventory_holds') or [])
+        elif doc['problem'] == 'ticket_without_registration':
+            orphans['tickets'].append(doc['_id'])
+        elif doc['problem'] == 'ticket_user_mismatch' and doc.get('registration_user_id') not in GUEST_USER_IDS:
+            yield 'tickets', UpdateOne({"_id": doc['_id']}, {"$set": {"user_id": str(doc['registration_user_id'])}})
+    for collection, ids in orphans.items():
+        if ids:
+            yield collection, DeleteMany({"_id": {"$in": ids}})
+    # Deleted registrations give their seats back, like an expired reservation
+    for op in inventory.release_ops(holds):
+        yield inventory.INVENTORY_COLLECTION, op
+
+
+@data_cli.command('integrity')
+@click.option('--check', 'checks', multiple=True, type=click.Choice(list(INTEGRITY_CHECKS)),
+              help='Run only these checks (repeatable). Default: all.')
+@click.option('--sample', default=10, show_default=True, help='Example _ids to print per problem.')
+@click.option('--repair', is_flag=True, help='Delete orphans and re-link mismatched tickets.')
+@click.option('--chunk-size', default=1000, show_default=True)
+@click.option('--resume', is_flag=True, help='Continue after the last checkpoint of each check.')
+def integrity(checks, sample, repair, chunk_size, resume):
+    """Report (and optionally repair) broken references between events, registrations and tickets."""
+    for check in checks or INTEGRITY_CHECKS:
+        collection, pipeline = INTEGRITY_CHECKS[check]
+        counts = {}
+        samples = {}
+
+        def handler(docs):
+            for doc in docs:
+                counts[doc['problem']] = counts.get(doc['problem'], 0) + 1
+                found = samples.setdefault(doc['problem'], [])
+                if len(found) < sample:
+                    found.append(str(doc['_id']))
+            return integrity_repairs(docs)
+
+        # Without --repair the fixes are only counted
+        run_batched(f"integrity-{check}", aggregate_source(mongo.db[collection], pipeline, grouped=False),
+                    handler, chunk_size, dry_run=not repair, resume=resume)
+        if not counts:
+            click.echo(f"  {check}: ok")
+        for problem, count in counts.items():
+            click.echo(f"  {problem}: {count:,}  e.g. {', '.join(samples[problem])}")
+
+
+# ---- Archival ----------------------------------------------------------------------------------------
+
+@data_cli.command('archive-past-events')
+@click.option('--days', default=90, show_default=True, help='Archive events that ended more than this many days ago.')
+@job_options
+def archive_past_events(days, chunk_size, dry_run, resume):
+    """Move registrations and tickets of past events to the archive collections."""
+    event_ids = ended_event_ids(datetime.utcnow() - timedelta(days=days))
+    click.echo(f"{len(event_ids):,} events ended more than {days} days ago")
+    if not event_ids:
+        return
+    # Some older registrations reference their event by ObjectId
+    query = {"event_id": {"$in": event_ids + [ObjectId(event_id) for event_id in event_ids
+                                              if ObjectId.is_valid(event_id)]}}
+
+    def handler(regs, session):
+        archived_at = datetime.utcnow()
+        # Re-read inside the transaction so the copies are exactly what gets deleted
+        regs = list(mongo.db.registrations.find({"_id": {"$in": [reg['_id'] for reg in regs]}}, session=session))
+        tickets = list(mongo.db.tickets.find({"registration_id": {"$in": [str(reg['_id']) for reg in regs]}},
+                                             session=session))
+        # Copy first (idempotent upserts), then delete exactly what was copied
+        for reg in regs:
+            yield archive_of('registrations'), ReplaceOne({"_id": reg['_id']}, {**reg, "archived_at": archived_at},
+                                                          upsert=True)
+        for ticket in tickets:
+            yield archive_of('tickets'), ReplaceOne({"_id": ticket['_id']}, {**ticket, "archived_at": archived_at},
+                                                    upsert=True)
+        if tickets:
+            yield 'tickets', DeleteMany({"_id": {"$in": [ticket['_id'] for ticket in tickets]}})
+        if regs:
+            yield 'registrations', DeleteMany({"_id": {"$in": [reg['_id'] for reg in regs]}})
+
+    run_batched('archive-past-events', find_source(mongo.db.registrations, query, {"_id": 1}), handler,
+                chunk_size, dry_run, resume, transactional=True)
+
+
+# ---- Reservations ------------------------------------------------------------------------------------
+
+@data_cli.command('expire-reservations')
+@job_options
+def expire_reservations(chunk_size, dry_run, resume):
+    """Release paid reservations whose payment was not confirmed in time, and their seats."""
+    now = datetime.utcnow()
+    run_batched('expire-reservations', find_source(mongo.db.registrations, expired_query(now), {"_id": 1}),
+                lambda regs, session: release_reservations(regs, now, session), chunk_size, dry_run, resume,
+                transactional=True)
+
+
+@data_cli.command('process-payments')
+@click.option('--batch-size', type=int, help='Events per transaction (default: PAYMENT_BATCH_SIZE).')
+@click.option('--follow', is_flag=True, help='Keep running and apply new events as they arrive.')
+@click.option('--interval', default=1.0, show_default=True, help='Seconds to wait when no events are pending.')
+def process_payments(batch_size, follow, interval):
+    """Apply pending payment webhooks: confirm and issue tickets, release failed payments, handle refunds."""
+    from flask import current_app
+    from src.services.payment_service import process_batch
+    batch_size = batch_size or current_app.config.get('PAYMENT_BATCH_SIZE', 500)
+    total = Counter()
+    while True:
+        outcomes = process_batch(batch_size)
+        total.update(outcomes)
+        if outcomes:
+            click.echo("  " + ", ".join(f"{outcome}: {count:,}" for outcome, count in sorted(outcomes.items())))
+        if sum(outcomes.values()) < batch_size:
+            # Caught up
+            if not follow:
+                break
+            time.sleep(interval)
+    click.echo(f"Processed {sum(total.values()):,} payment events")
+
+
+@data_cli.command('payment-events')
+@click.option('--retry', 'retry_ids', multiple=True, help='Queue this event for the payments worker again.')
+@click.option('--resolve', 'resolve_ids', multiple=True, help='Close this event, handled by hand.')
+@click.option('--note', default='', help='What was done, stored with --resolve (e.g. "refunded via bKash").')
+@click.option('--limit', default=100, show_default=True)
+def payment_events(retry_ids, resolve_ids, note, limit):
+    """List payment events the worker could not apply; retry or resolve them by _id."""
+    from src.services import payment_service
+    if retry_ids or resolve_ids:
+        if resolve_ids and not note:
+            raise click.ClickException("--note is required with --resolve")
+        retried = payment_service.retry_events([ObjectId(i) for i in retry_ids])
+        resolved = payment_service.resolve_events([ObjectId(i) for i in resolve_ids], note)
+        click.echo(f"Retried {retried:,}, resolved {resolved:,} payment events")
+        return
+    events = payment_service.attention_events(limit)
+    for event in events:
+        click.echo(f"  {event['_id']}  {event['provider']}:{event['provider_event_id']}  {event['type']}  "
+                   f"{event['reference']}  amount={event.get('amount')}  {event['outcome']}"
+                   f"{'  REFUND DUE' if event.get('refund_due') else ''}")
+    click.echo(f"{len(events):,} payment events need attention")
+
+
+@data_cli.command('inventory-slots')
+@click.argument('event_id')
+@click.argument('slots', type=click.IntRange(1, 256))
+def inventory_slots(event_id, slots):
+    """Split an event's seat counters over SLOTS documents (more slots = more concurrent buyers)."""
+    event = docs_by_id(mongo.db.events, [event_id], {"tickets": 1, "capacity": 1}).get(event_id)
+    if not event:
+        raise click.ClickException(f"Event {event_id} not found")
+    with mongo.cx.start_session() as session:
+        # Purchases keep running; a conflicting $inc just retries the transaction
+        session.with_transaction(lambda s: inventory.reshard(event, slots, s))
+    mongo.db.events.update_one({"_id": event['_id']}, {"$set": {"inventory_slots": slots}})
+    for key, total in inventory.limits(event).items():
+        remaining = sum(doc['remaining'] for doc in mongo.db.inventory.find({"event_id": event_id, "key": key}))
+        click.echo(f"  {key}: {remaining:,} of {total:,} left over {slots} slots")
+
+
+@data_cli.command('waiting-room')
+@click.argument('event_id')
+@click.option('--rate', type=click.FloatRange(min=0, min_open=True), help='Buyers admitted per second.')
+@click.option('--opens-at', type=click.DateTime(), help='UTC time admissions start (default: now).')
+@click.option('--admission-minutes', type=int, help='How long an admission token is valid.')
+@click.option('--off', is_flag=True, help='Remove the room; registration is open to everyone again.')
+def waiting_room(event_id, rate, opens_at, admission_minutes, off):
+    """Put an event's ticket drop behind a waiting room that admits --rate buyers per second."""
+    from src.utils.waiting_room import ROOMS_COLLECTION
+    rooms = mongo.db[ROOMS_COLLECTION]
+    if off:
+        rooms.update_one({"_id": event_id}, {"$set": {"enabled": False}})
+        click.echo(f"Waiting room for {event_id} is off (workers notice within WAITING_ROOM_CACHE_SECONDS)")
+        return
+    if not docs_by_id(mongo.db.events, [event_id], {"_id": 1}):
+        raise click.ClickException(f"Event {event_id} not found")
+    room = rooms.find_one({"_id": event_id}) or {}
+    if not rate and not room.get('rate'):
+        raise click.ClickException("--rate is required for a new room")
+    settings = {"enabled": True, "rate": rate or room['rate'],
+                "opens_at": opens_at or room.get('opens_at') or datetime.utcnow()}
+    now = datetime.utcnow()
+    if not opens_at and room.get('enabled') and rate and rate != room['rate'] and room['opens_at'] < now:
+        # Mid-sale rate change: move opens_at so the positions admitted so far stay admitted, without a burst
+        from src.utils.waiting_room import admitted_until
+        settings["opens_at"] = now - timedelta(seconds=admitted_until(room, now) / rate)
+    if admission_minutes:
+        settings["admission_minutes"] = admission_minutes
+    # Queue positions keep counting up if the room is reconfigured
+    rooms.update_one({"_id": event_id}, {"$set": settings, "$setOnInsert": {"allocated": 0}}, upsert=True)
+    click.echo(f"Waiting room for {event_id}: {settings['rate']:g} buyers/s from {settings['opens_at']:%Y-%m-%d %H:%M} UTC")
@@ -0,0 +1,38 @@
+"""
+Database schema commands.
+
+    flask --app app db status      # list applied / pending migrations
+    flask --app app db migrate     # apply pending migrations (run once per deploy)
+"""
+import click
+from flask.cli import AppGroup
+from src.database import mongo
+from src.utils.migrations import MIGRATIONS, MIGRATIONS_COLLECTION, run_migrations
+
+db_cli = AppGroup('db', help='Database migrations.')
+
+
+@db_cli.command('status')
+def db_status():
+    """Show which migrations have been applied."""
+    applied = {doc['_id']: doc for doc in mongo.db[MIGRATIONS_COLLECTION].find()}
+    for version, name, _ in MIGRATIONS:
+        doc = applied.get(version)
+        if doc:
+            click.echo(f"  [x] {version:04d}_{name}  applied {doc.get('applied_at'):%Y-%m-%d %H:%M} "
+                       f"({doc.get('duration_ms', 0)} ms)")
+        else:
+            click.echo(f"  [ ] {version:04d}_{name}  pending")
+
+
+@db_cli.command('migrate')
+@click.option('--dry-run', is_flag=True, help='List pending migrations without applying them.')
+def db_migrate(dry_run):
+    """Apply pending migrations."""
+    versions = run_migrations(mongo.db, dry_run=dry_run)
+    if not versions:
+        click.echo("Database is up to date.")
+    elif dry_run:
+        click.echo(f"Would apply: {', '.join(f'{v:04d}' for v in versions)}")
+    else:
+        click.echo(f"Applied {len(versions)} migration(s).")
@@ -0,0 +1,160 @@
+"""
+Media maintenance commands.
+
+    flask --app app media gc                  # report only
+    flask --app app media gc --delete         # remove unreferenced files
+    flask --app app media gc --fix-broken     # clear references to missing files
+
+Replaces the one-off fix_missing_images.py / list_images.py / swap_image.py
+style scripts with a single pass over references and storage.
+"""
+import time
+import click
+from flask.cli import AppGroup
+from pymongo import UpdateOne
+from src.database import mongo
+from src.services.storage_service import get_storage
+
+media_cli = AppGroup('media', help='Uploaded media maintenance.')
+
+# Every field that can point at an uploaded file
+EVENT_IMAGE_FIELDS = ['background_image_url', 'cover_image']
+EVENT_GALLERY_FIELD = 'gallery_images'
+USER_IMAGE_FIELD = 'avatar_url'
+# Other documents holding a single image URL, uploaded through /api/upload like event images:
+# merchandise (the API stores `image`, the organizer app sends `image_url`) and organizer profiles
+SINGLE_IMAGE_FIELDS = {
+    'users': [USER_IMAGE_FIELD],
+    'merchandise': ['image', 'image_url'],
+    'profiles': ['avatar_url'],
+}
+
+
+def iter_media_references():
+    """
+    Stream (collection, _id, field, url) for every image reference.
+    Each collection is read once with a narrow projection.
+    """
+    projection = {f: 1 for f in EVENT_IMAGE_FIELDS + [EVENT_GALLERY_FIELD]}
+    for event in mongo.db.events.find({}, projection, batch_size=1000):
+        for field in EVENT_IMAGE_FIELDS:
+            if event.get(field):
+                yield 'events', event['_id'], field, event[field]
+        for url in event.get(EVENT_GALLERY_FIELD) or []:
+            if url:
+                yield 'events', event['_id'], EVENT_GALLERY_FIELD, url
+
+    for collection, fields in SINGLE_IMAGE_FIELDS.items():
+        query = {"$or": [{field: {"$nin": [None, ""]}} for field in fields]}
+        for doc in mongo.db[collection].find(query, {field: 1 for field in fields}, batch_size=1000):
+            for field in fields:
+                if isinstance(doc.get(field), str) and doc[field]:
+                    yield collection, doc['_id'], field, doc[field]
+
+
+def scan_media(storage, grace_seconds):
+    """
+    Walk storage once and references once.
+    Returns (orphans, broken_refs, stats) where orphans is a list of
+    (key, size) old enough to delete and broken_refs lists references
+    to files that don't exist.
+    """
+    objects = {}
+    for key, size, modified in storage.list():
+        objects[key] = (size, modified)
+
+    referenced = set()
+    broken_refs = []
+    for collection, doc_id, field, url in iter_media_references():
+        key = storage.key_from_url(url)
+        if key is None:
+            # External URL (or something we don't manage) - leave it alone
+            continue
+        referenced.add(key)
+        if key not in objects:
+            broken_refs.append((collection, doc_id, field, url))
+
+    cutoff = time.time() - grace_seconds
+    orphans = []
+    recent = 0
+    for key, (size, modified) in objects.items():
+        if key in referenced:
+            continue
+        # Give in-flight uploads time to be attached to a document
+        if modified > cutoff:
+            recent += 1
+            continue
+        orphans.append((key, size))
+
+    stats = {
+        "objects": len(objects),
+        "referenced": len(referenced),
+        "orphans": len(orphans),
+        "orphan_bytes": sum(size for _, size in orphans),
+        "within_grace": recent,
+        "broken_refs": len(broken_refs)
+    }
+    return orphans, broken_refs, stats
+
+
+def broken_ref_update(collection, doc_id, field, url):
+    if field == EVENT_GALLERY_FIELD:
+        return UpdateOne({"_id": doc_id}, {"$pull": {field: url}})
+    if collection != 'events':
+        return UpdateOne({"_id": doc_id, field: url}, {"$unset": {field: ""}})
+    # Event code treats an empty string as "no image"
+    return UpdateOne({"_id": doc_id, field: url}, {"$set": {field: ""}})
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+@media_cli.command('gc')
+@click.option('--delete', is_flag=True, help='Delete unreferenced files (default is report only).')
+@click.option('--fix-broken', is_flag=True, help='Clear references to files that no longer exist.')
+@click.option('--grace-hours', default=24.0, show_default=True, help='Skip files newer than this.')
+@click.option('--batch-size', default=500, show_default=True, help='Deletes / updates per batch.')
+@click.option('--verbose', is_flag=True, help='List every orphan and broken reference.')
+def media_gc(delete, fix_broken, grace_hours, batch_size, verbose):
+    """Find (and optionally remove) orphaned media and broken image references."""
+    storage = get_storage()
+    started = time.time()
+    orphans, broken_refs, stats = scan_media(storage, grace_seconds=grace_hours * 3600)
+
+    click.echo(f"Storage backend: {storage.name}")
+    click.echo(f"Objects in storage: {stats['objects']}")
+    click.echo(f"Referenced keys: {stats['referenced']}")
+    click.echo(f"Unreferenced files: {stats['orphans']} ({stats['orphan_bytes'] / 1024 / 1024:.1f} MB)")
+    click.echo(f"Unreferenced but within grace period: {stats['within_grace']}")
+    click.echo(f"Broken references: {stats['broken_refs']}")
+
+    if verbose:
+        for key, size in orphans:
+            click.echo(f"  orphan  {key} ({size} bytes)")
+        for collection, doc_id, field, url in broken_refs:
+            click.echo(f"  broken  {collection}/{doc_id} {field} -> {url}")
+
+    if delete and orphans:
+        deleted = 0
+        for batch in _chunks([key for key, _ in orphans], batch_size):
+            deleted += storage.delete_many(batch)
+            click.echo(f"  deleted {deleted}/{len(orphans)} files")
+        click.echo(f"Deleted {deleted} unreferenced files.")
+
+    if fix_broken and broken_refs:
+        fixed = 0
+        for batch in _chunks(broken_refs, batch_size):
+            by_collection = {}
+            for ref in batch:
+                by_collection.setdefault(ref[0], []).append(broken_ref_update(*ref))
+            for collection, ops in by_collection.items():
+                result = mongo.db[collection].bulk_write(ops, ordered=False)
+                fixed += result.modified_count
+        click.echo(f"Cleared {fixed} broken references.")
+
+    if not delete and not fix_broken:
+        click.echo("Dry run. Re-run with --delete and/or --fix-broken to apply changes.")
+
+    click.echo(f"Done in {time.time() - started:.1f}s")
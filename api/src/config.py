@@ -15,5 +15,107 @@ class Config:
     # Frontend URLs
     ORGANIZER_URL = os.getenv('ORGANIZER_URL', 'http://localhost:5174')
 
-    # Flask-Limiter storage
-    RATELIMIT_STORAGE_URI = os.getenv('MONGODB_URI')
+    # Logging (see src/utils/log_setup.py). Set LOG_LEVEL=DEBUG to see the detailed route output.
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'json') # 'json' or 'text'
+    LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+    LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', 1.0)) # Fraction of requests that get an access log record
+    LOG_ROUTE_SAMPLE_RATES = os.getenv('LOG_ROUTE_SAMPLE_RATES', 'healthz=0') # e.g. "event_bp.get_events=0.1,healthz=0"
+    LOG_SLOW_REQUEST_MS = float(os.getenv('LOG_SLOW_REQUEST_MS', 1000)) # Always logged, regardless of sampling
+
+    # Password hashing (bcrypt). Raising BCRYPT_ROUNDS rehashes users transparently on next login.
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))
+    BCRYPT_WORKERS = int(os.getenv('BCRYPT_WORKERS', os.cpu_count() or 1))
+    BCRYPT_MAX_PENDING = int(os.getenv('BCRYPT_MAX_PENDING', 32)) # Queued + running hashes before shedding with 503
+    BCRYPT_TIMEOUT = float(os.getenv('BCRYPT_TIMEOUT', 10))
+
+    # Paid registrations hold their seats this long before the payment must be confirmed (src/utils/reservations.py)
+    RESERVATION_TTL_MINUTES = int(os.getenv('RESERVATION_TTL_MINUTES', 15))
+    # Counter documents per ticket type (src/utils/inventory.py); per event with `flask data inventory-slots`
+    INVENTORY_SLOTS = int(os.getenv('INVENTORY_SLOTS', 1))
+
+    # Waiting rooms for ticket drops (src/utils/waiting_room.py)
+    WAITING_ROOM_CACHE_SECONDS = float(os.getenv('WAITING_ROOM_CACHE_SECONDS', 2)) # Room settings cached per worker
+    WAITING_ROOM_BLOCK = int(os.getenv('WAITING_ROOM_BLOCK', 50)) # Queue positions reserved per $inc
+    WAITING_ROOM_ADMISSION_MINUTES = int(os.getenv('WAITING_ROOM_ADMISSION_MINUTES', 10)) # Admission token lifetime
+
+    # Idempotency-Key on registration and payment confirmation (src/utils/idempotency.py)
+    IDEMPOTENCY_TTL_HOURS = int(os.getenv('IDEMPOTENCY_TTL_HOURS', 24)) # How long a stored response can be replayed
+    IDEMPOTENCY_LOCK_SECONDS = int(os.getenv('IDEMPOTENCY_LOCK_SECONDS', 60)) # Unfinished keys can be claimed again after
+
+    # Payment webhooks (src/services/payment_service.py). A provider without a secret has no webhook endpoint.
+    PAYMENT_WEBHOOK_SECRETS = {provider: os.getenv(f'{provider.upper()}_WEBHOOK_SECRET')
+                               for provider in ('bkash', 'nagad', 'card')}
+    PAYMENT_WEBHOOK_TOLERANCE_SECONDS = int(os.getenv('PAYMENT_WEBHOOK_TOLERANCE_SECONDS', 300)) # Max signature age
+    PAYMENT_BATCH_SIZE = int(os.getenv('PAYMENT_BATCH_SIZE', 500)) # Events per transaction of the payments worker
+    # false: only webhooks confirm payments, confirm_payment from the browser just reports the status
+    BROWSER_PAYMENT_CONFIRM = os.getenv('BROWSER_PAYMENT_CONFIRM', 'true').lower() == 'true'
+
+    # Flask-Limiter storage: counters live in process memory and sync to MongoDB
+    # every RATELIMIT_SYNC_INTERVAL seconds (see src/utils/ratelimit_storage.py)
+    RATELIMIT_STORAGE_URI = os.getenv('RATELIMIT_STORAGE_URI') or (
+        f"synced+{os.getenv('MONGODB_URI')}" if os.getenv('MONGODB_URI') else "synced+memory://"
+    )
+    RATELIMIT_STORAGE_OPTIONS = {
+        "sync_interval": float(os.getenv('RATELIMIT_SYNC_INTERVAL', 2)),
+        "sync_threshold": int(os.getenv('RATELIMIT_SYNC_THRESHOLD', 10))
+    }
+    RATELIMIT_STRATEGY = os.getenv('RATELIMIT_STRATEGY', 'sliding-window-counter')
+
+    # /metrics (Prometheus). When set, scrapes must send "Authorization: Bearer <token>".
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+    # Query accounting (see src/utils/query_budget.py). Budgets are declared per view with @query_budget(n);
+    # QUERY_BUDGET_DEFAULT applies to views without one (0 = no budget).
+    QUERY_SLOW_MS = float(os.getenv('QUERY_SLOW_MS', 100))
+    QUERY_REPEAT_THRESHOLD = int(os.getenv('QUERY_REPEAT_THRESHOLD', 5)) # Same query shape this many times = N+1
+    QUERY_BUDGET_DEFAULT = int(os.getenv('QUERY_BUDGET_DEFAULT', 0))
+    QUERY_BUDGET_ENFORCE = os.getenv('QUERY_BUDGET_ENFORCE', 'false').lower() == 'true' # Over budget -> 500
+
+    # Response compression (see src/utils/compression.py). JSON smaller than this goes out as is.
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+    COMPRESS_GZIP_LEVEL = int(os.getenv('COMPRESS_GZIP_LEVEL', 5))
+    COMPRESS_BR_LEVEL = int(os.getenv('COMPRESS_BR_LEVEL', 4))
+
+    # Media storage: 'local' (uploads/ folder) or 's3' (any S3-compatible bucket, e.g. MinIO)
+    STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'local')
+    UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'uploads'))
+    MAX_UPLOAD_BYTES = int(os.getenv('MAX_UPLOAD_BYTES', 10 * 1024 * 1024))
+    S3_BUCKET = os.getenv('S3_BUCKET')
+    S3_ENDPOINT_URL = os.getenv('S3_ENDPOINT_URL') # e.g. http://localhost:9000 for MinIO
+    S3_REGION = os.getenv('S3_REGION', 'us-east-1')
+    S3_ACCESS_KEY = os.getenv('S3_ACCESS_KEY')
+    S3_SECRET_KEY = os.getenv('S3_SECRET_KEY')
+    S3_PUBLIC_URL = os.getenv('S3_PUBLIC_URL') # Public/CDN base URL for the bucket, if any
+
+    # Run pending database migrations (indexes) when the app starts. Off in production,
+    # where `flask --app app db migrate` runs once per deploy instead of once per worker.
+    AUTO_MIGRATE = os.getenv('AUTO_MIGRATE', 'false').lower() == 'true'
+
+
+class DevelopmentConfig(Config):
+    DEBUG = True
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+    AUTO_MIGRATE = os.getenv('AUTO_MIGRATE', 'true').lower() == 'true'
+    QUERY_BUDGET_ENFORCE = os.getenv('QUERY_BUDGET_ENFORCE', 'true').lower() == 'true'
+
+
+class ProductionConfig(Config):
+    DEBUG = False
+
+
+class TestingConfig(Config):
+    TESTING = True
+    MONGO_URI = os.getenv('TEST_MONGODB_URI') or Config.MONGO_URI
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'WARNING')
+    RATELIMIT_ENABLED = False
+    AUTO_MIGRATE = False
+    QUERY_BUDGET_ENFORCE = os.getenv('QUERY_BUDGET_ENFORCE', 'true').lower() == 'true'
+
+
+# Selected with APP_ENV (create_app() falls back to production)
+config_by_name = {
+    'development': DevelopmentConfig,
+    'production': ProductionConfig,
+    'testing': TestingConfig
+}
@@ -1,3 +1,4 @@
+from bson.objectid import ObjectId
 from pymongo import MongoClient
 import os
 
@@ -5,6 +6,7 @@ class PyMongo:
     def __init__(self, app=None):
         self.cx = None
         self.db = None
+        self.uri = None
         if app is not None:
             self.init_app(app)
 
@@ -12,8 +14,20 @@ class PyMongo:
         uri = app.config.get("MONGO_URI") or os.getenv("MONGODB_URI")
         if not uri:
             raise RuntimeError("MONGO_URI not found in config or env")
-        
-        self.cx = MongoClient(uri)
+        self.uri = uri
+        self._connect()
+
+    def reconnect(self):
+        """
+        Give a forked worker its own client. With gunicorn --preload the client
+        is created in the master; its sockets and monitor threads must not be
+        shared, so the child drops it (without closing) and opens a new one.
+        """
+        if self.cx is not None:
+            self._connect()
+
+    def _connect(self):
+        self.cx = MongoClient(self.uri)
         # Assuming database name is in URI or default 'eventify'
         # pymongo .get_database() uses the one in URI if present
         try:
@@ -24,4 +38,21 @@ class PyMongo:
         # Backward compatibility for existing code using mongo.db
         # FLask-PyMongo usually exposes db as the database object
 
+def docs_by_id(collection, ids, projection=None):
+    """
+    One $in query instead of a find_one per id. Ids may be ObjectIds or
+    strings (some documents were stored with string _ids), and the result
+    is keyed by str(_id).
+    """
+    keys = set()
+    for value in ids:
+        if value is None:
+            continue
+        keys.add(value)
+        if isinstance(value, str) and ObjectId.is_valid(value):
+            keys.add(ObjectId(value))
+    if not keys:
+        return {}
+    return {str(doc['_id']): doc for doc in collection.find({"_id": {"$in": list(keys)}}, projection)}
+
 mongo = PyMongo()
@@ -1,3 +1,4 @@
+import logging
 from flask import Blueprint, request, jsonify
 from src.database import mongo
 
@@ -5,6 +6,8 @@ from bson import ObjectId
 from datetime import datetime
 from src.utils.decorators import token_required
 
+logger = logging.getLogger(__name__)
+
 admin_bp = Blueprint('admin', __name__)
 
 # Middleware to check if user is admin
@@ -30,22 +33,10 @@ def get_all_applications(current_user):
             query['status'] = status
             
         applications = list(mongo.db.host_applications.find(query).sort('created_at', -1))
-        
-        # Serialize
-        for app in applications:
-            app['_id'] = str(app['_id'])
-            if 'user_id' in app:
-                app['user_id'] = str(app['user_id'])
-            if 'reviewed_by' in app:
-                app['reviewed_by'] = str(app['reviewed_by'])
-            if 'created_at' in app and isinstance(app['created_at'], datetime):
-                app['created_at'] = app['created_at'].isoformat()
-            if 'updated_at' in app and isinstance(app['updated_at'], datetime):
-                app['updated_at'] = app['updated_at'].isoformat()
             
         return jsonify(applications), 200
     except Exception as e:
-        print(f"Error fetching applications: {e}")
+        logger.error("Error fetching applications: %s", e)
         return jsonify({'message': 'Internal Server Error'}), 500
 
 @admin_bp.route('/applications/<id>/approve', methods=['POST'])
@@ -86,11 +77,11 @@ def approve_application(current_user, id):
                 from src.services.email_service import EmailService
                 EmailService.send_organizer_approval_email(email, name)
         except Exception as e:
-            print(f"Failed to send approval email: {e}")
+            logger.warning("Failed to send approval email: %s", e)
         
         return jsonify({'message': 'Application approved'}), 200
     except Exception as e:
-        print(f"Error approving application: {e}")
+        logger.error("Error approving application: %s", e)
         return jsonify({'message': 'Internal Server Error'}), 500
 
 @admin_bp.route('/applications/<id>/reject', methods=['POST'])
@@ -115,7 +106,7 @@ def reject_application(current_user, id):
             
         return jsonify({'message': 'Application rejected'}), 200
     except Exception as e:
-        print(f"Error rejecting application: {e}")
+        logger.error("Error rejecting application: %s", e)
         return jsonify({'message': 'Internal Server Error'}), 500
 
 @admin_bp.route('/events/<id>/feature', methods=['PUT'])
@@ -139,5 +130,5 @@ def toggle_feature_event(current_user, id):
             'is_featured': result.get('is_featured')
         }), 200
     except Exception as e:
-        print(f"Error toggling event feature: {e}")
+        logger.error("Error toggling event feature: %s", e)
         return jsonify({'message': 'Internal Server Error'}), 500
@@ -1,7 +1,11 @@
+import logging
 from flask import Blueprint, jsonify
 from src.database import mongo
+from src.utils.archive import find_with_archive
 from bson.objectid import ObjectId
 
+logger = logging.getLogger(__name__)
+
 analytics_bp = Blueprint('analytics_bp', __name__)
 
 @analytics_bp.route('/public/<user_id>/stats', methods=['GET'])
@@ -33,7 +37,7 @@ def get_public_organizer_stats(user_id):
 
         # Fetch registrations for these events
         # Note: ensuring event_id in registrations matches string format
-        registrations = list(mongo.db.registrations.find({"event_id": {"$in": event_ids}}))
+        registrations = find_with_archive('registrations', {"event_id": {"$in": event_ids}})
         
         total_revenue = 0.0
         total_tickets_sold = 0
@@ -98,7 +102,5 @@ def get_public_organizer_stats(user_id):
         }), 200
 
     except Exception as e:
-        print(f"Error fetching public stats: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error fetching public stats: %s", e)
         return jsonify({"message": "Error fetching stats"}), 500
@@ -3,7 +3,7 @@ from flask import Blueprint, request, jsonify
 from src.models.user_model import User
 from src.models.password_reset import PasswordReset
 from src.services.email_service import EmailService
-from src.utils.security import Security
+from src.utils.security import Security, PasswordHashingBusy
 from email_validator import validate_email, EmailNotValidError
 from src.utils.limiter import limiter
 from datetime import datetime
@@ -129,6 +129,16 @@ def login():
     if not user.get('is_verified', False):
         return jsonify({'message': 'Account not verified. Please verify your email.'}), 403
 
+    # Upgrade the hash transparently when BCRYPT_ROUNDS has changed
+    if Security.needs_rehash(user['password']):
+        try:
+            mongo.db.users.update_one(
+                {"_id": user['_id'], "password": user['password']},
+                {"$set": {"password": Security.hash_password(password)}}
+            )
+        except PasswordHashingBusy:
+            pass # Not critical, we'll try again on the next login
+
     # Generate JWT
     token = Security.generate_token(user['_id'])
     
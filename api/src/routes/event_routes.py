@@ -1,9 +1,14 @@
+import logging
 from flask import Blueprint, jsonify, request
 from src.database import mongo
 from src.utils.decorators import token_required
+from src.services import checkout_service
+from src.utils import inventory
 from bson.objectid import ObjectId
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 event_bp = Blueprint('event_bp', __name__)
 public_bp = Blueprint('public_bp', __name__)
 
@@ -80,7 +85,7 @@ def create_event(current_user):
             "status": new_event['status']
         }), 201
     except Exception as e:
-        print(f"Error creating event: {str(e)}")
+        logger.error("Error creating event: %s", e)
         return jsonify({'message': f'Error creating event: {str(e)}'}), 500
 
 @event_bp.route('/<event_id>', methods=['PUT'])
@@ -120,10 +125,14 @@ def update_event(current_user, event_id):
     # Remove None values to avoid overwriting with null
     update_fields = {k: v for k, v in update_fields.items() if v is not None}
     
-    mongo.db.events.update_one(
-        {"_id": ObjectId(event_id)},
-        {"$set": update_fields}
-    )
+    def write(session):
+        # The seat counters change with the event, re-read here so concurrent edits can't both apply a delta
+        current = mongo.db.events.find_one({"_id": ObjectId(event_id)}, {"tickets": 1, "capacity": 1},
+                                           session=session)
+        mongo.db.events.update_one({"_id": ObjectId(event_id)}, {"$set": update_fields}, session=session)
+        inventory.resize(event_id, current, update_fields, session)
+
+    checkout_service.run_transaction(write)
     
     return jsonify({"message": "Event updated successfully"}), 200
 
@@ -134,14 +143,11 @@ def get_event(event_id):
         if not event:
             return jsonify({"message": "Event not found"}), 404
             
-        # Convert ObjectId to string
-        event['id'] = str(event['_id'])
-        del event['_id']
+        event['id'] = event.pop('_id')
         
         # Enrich with creator details
         if 'created_by' in event:
             creator_id = event['created_by']
-            event['created_by'] = str(creator_id)
             
             try:
                 # Fetch creator details
@@ -155,7 +161,7 @@ def get_event(event_id):
                     event['creator_avatar'] = user.get('avatar_url')
                     event['creator_organization'] = org_name
             except Exception as e:
-                print(f"Error fetching creator details: {e}")
+                logger.error("Error fetching creator details: %s", e)
 
         return jsonify(event), 200
     except:
@@ -183,9 +189,7 @@ def get_events():
     if is_featured == 'true':
         query['is_featured'] = True
 
-    print(f"Query: {query}")
-    print(f"Database: {mongo.db.name}")
-    print(f"Collection: events")
+    logger.debug("get_events query=%s db=%s", query, mongo.db.name)
     
     cursor = mongo.db.events.find(query)
     
@@ -195,18 +199,14 @@ def get_events():
     else:
         cursor = cursor.sort(sort_by, 1)
         
+    # ObjectIds and datetimes are encoded by the app's JSON provider
     events = []
     for doc in cursor.limit(limit):
-        doc['id'] = str(doc['_id'])
-        del doc['_id']
-        if 'created_by' in doc:
-            doc['created_by'] = str(doc['created_by'])
+        doc['id'] = doc.pop('_id')
         events.append(doc)
     
-    print(f"[EVENTS] Returning {len(events)} events")
-    if events:
-        print(f"[EVENTS] First event ID: {events[0].get('id')}, Title: {events[0].get('title')}")
-        
+    logger.debug("Returning %s events", len(events))
+
     return jsonify({"events": events}), 200
 
 # Public Routes (Ticket checking etc) staying mostly same but connected to DB
@@ -1,9 +1,12 @@
+import logging
 from flask import Blueprint, jsonify, request
 from src.database import mongo
 from src.utils.decorators import token_required
 from bson.objectid import ObjectId
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 follow_bp = Blueprint('follow_bp', __name__)
 
 @follow_bp.route('/check/<target_id>', methods=['GET'])
@@ -25,7 +28,7 @@ def check_follow_status(current_user, target_id):
         }), 200
 
     except Exception as e:
-        print(f"Error checking follow status: {e}")
+        logger.error("Error checking follow status: %s", e)
         return jsonify({"message": "Error checking follow status", "isFollowing": False}), 500
 
 @follow_bp.route('/check/<target_id>', methods=['POST'])
@@ -61,7 +64,7 @@ def toggle_follow(current_user, target_id):
         }), 200
 
     except Exception as e:
-        print(f"Error toggling follow: {e}")
+        logger.error("Error toggling follow: %s", e)
         return jsonify({"message": "Error processing request"}), 500
 
 @follow_bp.route('/count/<target_id>', methods=['GET'])
@@ -70,5 +73,5 @@ def get_follower_count(target_id):
         count = mongo.db.follows.count_documents({"followed_id": ObjectId(target_id)})
         return jsonify({"count": count}), 200
     except Exception as e:
-        print(f"Error fetching follower count: {e}")
+        logger.error("Error fetching follower count: %s", e)
         return jsonify({"message": "Error fetching follower count", "count": 0}), 500
@@ -1,9 +1,12 @@
+import logging
 from flask import Blueprint, request, jsonify
 from src.database import mongo
 from src.utils.decorators import token_required
 from bson.objectid import ObjectId
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 form_bp = Blueprint('form_bp', __name__)
 
 @form_bp.route('', methods=['POST'])
@@ -32,7 +35,7 @@ def create_form(current_user):
             "id": str(result.inserted_id)
         }), 201
     except Exception as e:
-        print(f"Error creating form: {e}")
+        logger.error("Error creating form: %s", e)
         return jsonify({"message": "Error creating form"}), 500
 
 @form_bp.route('/organizer', methods=['GET'])
@@ -43,16 +46,12 @@ def get_organizer_forms(current_user):
         
         results = []
         for form in forms:
-            form['id'] = str(form['_id'])
-            del form['_id']
-            # Convert ObjectId to str for organizer_id if needed, though usually we just delete/ignore it in response if not needed
-            if 'organizer_id' in form:
-                form['organizer_id'] = str(form['organizer_id'])
+            form['id'] = form.pop('_id')
             results.append(form)
             
         return jsonify(results), 200
     except Exception as e:
-        print(f"Error fetching forms: {e}")
+        logger.error("Error fetching forms: %s", e)
         return jsonify({"message": "Error fetching forms"}), 500
 
 @form_bp.route('/<form_id>', methods=['GET'])
@@ -62,13 +61,11 @@ def get_form(form_id):
         if not form:
             return jsonify({"message": "Form not found"}), 404
             
-        form['id'] = str(form['_id'])
-        del form['_id']
-        form['organizer_id'] = str(form['organizer_id'])
+        form['id'] = form.pop('_id')
         
         return jsonify(form), 200
     except Exception as e:
-        print(f"Error fetching form: {e}")
+        logger.error("Error fetching form: %s", e)
         return jsonify({"message": "Error fetching form"}), 500
 
 @form_bp.route('/<form_id>', methods=['PUT'])
@@ -102,7 +99,7 @@ def update_form(current_user, form_id):
         
         return jsonify({"message": "Form updated successfully"}), 200
     except Exception as e:
-        print(f"Error updating form: {e}")
+        logger.error("Error updating form: %s", e)
         return jsonify({"message": "Error updating form"}), 500
 
 @form_bp.route('/<form_id>', methods=['DELETE'])
@@ -119,5 +116,5 @@ def delete_form(current_user, form_id):
             
         return jsonify({"message": "Form deleted successfully"}), 200
     except Exception as e:
-        print(f"Error deleting form: {e}")
+        logger.error("Error deleting form: %s", e)
         return jsonify({"message": "Error deleting form"}), 500
@@ -1,3 +1,4 @@
+import logging
 from flask import Blueprint, request, jsonify
 from src.database import mongo
 
@@ -5,6 +6,8 @@ from bson import ObjectId
 from datetime import datetime
 from src.utils.decorators import token_required
 
+logger = logging.getLogger(__name__)
+
 host_application_bp = Blueprint('host_applications', __name__)
 
 @host_application_bp.route('', methods=['POST'])
@@ -51,7 +54,7 @@ def submit_host_application(current_user):
         return jsonify({'message': 'Application submitted successfully'}), 201
 
     except Exception as e:
-        print(f"Error submitting host application: {e}")
+        logger.error("Error submitting host application: %s", e)
         return jsonify({'message': 'Internal Server Error'}), 500
 
 @host_application_bp.route('/me', methods=['GET'])
@@ -62,11 +65,7 @@ def get_my_application(current_user):
         if not app:
             return jsonify(None), 200 # Or 404
         
-        # Serialize ObjectId
-        app['_id'] = str(app['_id'])
-        app['user_id'] = str(app['user_id'])
-        
         return jsonify(app), 200
     except Exception as e:
-        print(f"Error getting application: {e}")
+        logger.error("Error getting application: %s", e)
         return jsonify({'message': 'Internal Server Error'}), 500
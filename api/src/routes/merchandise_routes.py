@@ -1,9 +1,12 @@
+import logging
 from flask import Blueprint, jsonify, request
 from src.database import mongo
 from src.utils.decorators import token_required
 from bson.objectid import ObjectId
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 merchandise_bp = Blueprint('merchandise_bp', __name__)
 
 @merchandise_bp.route('', methods=['GET'])
@@ -29,13 +32,12 @@ def get_merchandise(current_user):
         
         results = []
         for item in items:
-            item['id'] = str(item['_id'])
-            del item['_id']
+            item['id'] = item.pop('_id')
             results.append(item)
             
         return jsonify(results), 200
     except Exception as e:
-        print(f"Error fetching merchandise: {e}")
+        logger.error("Error fetching merchandise: %s", e)
         return jsonify({"message": "Error fetching merchandise"}), 500
 
 @merchandise_bp.route('', methods=['POST'])
@@ -71,7 +73,7 @@ def create_merchandise(current_user):
         }), 201
         
     except Exception as e:
-        print(f"Error creating merchandise: {e}")
+        logger.error("Error creating merchandise: %s", e)
         return jsonify({"message": "Error creating merchandise"}), 500
 
 @merchandise_bp.route('/<item_id>', methods=['PUT'])
@@ -94,7 +96,7 @@ def update_merchandise(current_user, item_id):
         )
         return jsonify({"message": "Product updated"}), 200
     except Exception as e:
-         print(f"Error update merchandise: {e}")
+         logger.error("Error update merchandise: %s", e)
          return jsonify({"message": "Error updating product"}), 500
 
 @merchandise_bp.route('/<item_id>', methods=['DELETE'])
@@ -1,13 +1,21 @@
+import logging
 from flask import Blueprint, jsonify, request
-from src.database import mongo
+from src.database import mongo, docs_by_id
+from src.utils.archive import find_with_archive
 from src.utils.decorators import token_required
+from src.services import checkout_service
+from src.utils import inventory
+from src.utils.query_budget import query_budget
 from bson.objectid import ObjectId
 from datetime import datetime, timedelta
 import calendar
 
+logger = logging.getLogger(__name__)
+
 organizer_bp = Blueprint('organizer_bp', __name__)
 
 @organizer_bp.route('/events', methods=['GET'])
+@query_budget(4)
 @token_required
 def get_organizer_events(current_user):
     if not current_user.get('is_organizer'):
@@ -19,21 +27,22 @@ def get_organizer_events(current_user):
             {"created_by": str(current_user['_id'])}
         ]}
         events = list(mongo.db.events.find(query).sort("created_at", -1))
+        by_event = {}
+        for reg in find_with_archive('registrations', {"event_id": {"$in": [str(e['_id']) for e in events]}},
+                                     {"event_id": 1, "quantity": 1, "price": 1}):
+            by_event.setdefault(reg.get('event_id'), []).append(reg)
         
         results = []
         for event in events:
             event_id = str(event['_id'])
             
             # Calculate stats for this event
-            registrations = list(mongo.db.registrations.find({"event_id": event_id}))
+            registrations = by_event.get(event_id, [])
             tickets_sold = sum(reg.get('quantity', 1) for reg in registrations)
             revenue = sum(reg.get('price', 0) for reg in registrations)
             
-            # Helper to safely serialize ObjectId
-            event_data = {k: str(v) if isinstance(v, ObjectId) else v for k, v in event.items()}
-            event_data['id'] = event_id
-            if '_id' in event_data:
-                del event_data['_id']
+            event_data = event
+            event_data['id'] = event_data.pop('_id')
                 
             # Add stats
             event_data['ticketsSold'] = tickets_sold
@@ -44,10 +53,11 @@ def get_organizer_events(current_user):
             
         return jsonify(results), 200
     except Exception as e:
-        print(f"Error fetching organizer events: {e}")
+        logger.error("Error fetching organizer events: %s", e)
         return jsonify({"message": "Error fetching events"}), 500
 
 @organizer_bp.route('/tickets', methods=['GET'])
+@query_budget(4)
 @token_required
 def get_organizer_tickets(current_user):
     if not current_user.get('is_organizer'):
@@ -60,12 +70,16 @@ def get_organizer_tickets(current_user):
             {"created_by": str(current_user['_id'])}
         ]}
         events = list(mongo.db.events.find(query))
+        by_event = {}
+        for reg in find_with_archive('registrations', {"event_id": {"$in": [str(e['_id']) for e in events]}},
+                                     {"event_id": 1, "ticket_type": 1, "quantity": 1}):
+            by_event.setdefault(reg.get('event_id'), []).append(reg)
         
         results = []
         
         for event in events:
             event_id = str(event['_id'])
-            registrations = list(mongo.db.registrations.find({"event_id": event_id}))
+            registrations = by_event.get(event_id, [])
             
             # Count sales per ticket type
             sales_map = {}
@@ -115,7 +129,7 @@ def get_organizer_tickets(current_user):
         return jsonify(results), 200
         
     except Exception as e:
-        print(f"Error fetching organizer tickets: {e}")
+        logger.error("Error fetching organizer tickets: %s", e)
         return jsonify({"message": "Error fetching tickets"}), 500
 
 @organizer_bp.route('/transactions', methods=['GET'])
@@ -130,14 +144,15 @@ def get_organizer_transactions(current_user):
         event_ids = list(event_map.keys())
         
         # Get registrations
-        registrations = list(mongo.db.registrations.find({"event_id": {"$in": event_ids}}).sort("registered_at", -1).limit(50))
+        registrations = find_with_archive('registrations', {"event_id": {"$in": event_ids}},
+                                          sort=[("registered_at", -1)], limit=50)
         
         results = []
         for reg in registrations:
             user = mongo.db.users.find_one({"_id": ObjectId(reg['user_id'])})
             
             results.append({
-                "id": str(reg['_id']),
+                "id": reg['_id'],
                 "user_name": user.get('name', 'Anonymous') if user else 'Anonymous',
                 "user_email": user.get('email', '-') if user else '-',
                 "event_title": event_map.get(reg['event_id'], 'Unknown Event'),
@@ -151,10 +166,11 @@ def get_organizer_transactions(current_user):
             
         return jsonify(results), 200
     except Exception as e:
-        print(f"Error fetching transactions: {e}")
+        logger.error("Error fetching transactions: %s", e)
         return jsonify({"message": "Error fetching transactions"}), 500
 
 @organizer_bp.route('/attendees', methods=['GET'])
+@query_budget(7)
 @token_required
 def get_organizer_attendees(current_user):
     if not current_user.get('is_organizer'):
@@ -176,19 +192,25 @@ def get_organizer_attendees(current_user):
         
         # Get registrations (Attendees)
         # Limit to last 100 for performance
-        registrations = list(mongo.db.registrations.find({"event_id": {"$in": event_ids}}).sort("registered_at", -1).limit(100))
-        
+        registrations = find_with_archive('registrations', {"event_id": {"$in": event_ids}},
+                                          sort=[("registered_at", -1)], limit=100)
+        
+        users = docs_by_id(mongo.db.users, [reg.get('user_id') for reg in registrations], {"name": 1, "email": 1})
+        # Associated tickets (for check-in status), first one per registration
+        tickets = {}
+        for ticket in find_with_archive('tickets', {"registration_id": {"$in": [str(reg['_id']) for reg in registrations]}},
+                                        {"registration_id": 1, "status": 1, "ticket_id": 1}):
+            tickets.setdefault(ticket['registration_id'], ticket)
+
         results = []
         for reg in registrations:
-            user = mongo.db.users.find_one({"_id": ObjectId(reg['user_id'])})
-            
-            # Find associated ticket to get status
-            ticket = mongo.db.tickets.find_one({"registration_id": str(reg['_id'])})
+            user = users.get(str(reg.get('user_id')))
+            ticket = tickets.get(str(reg['_id']))
             status = ticket.get('status') if ticket else 'unknown'
             
             results.append({
-                "id": str(reg['_id']),
-                "user_id": str(reg['user_id']),
+                "id": reg['_id'],
+                "user_id": reg['user_id'],
                 "display_name": user.get('name', 'Anonymous') if user else 'Anonymous',
                 "email": user.get('email', '') if user else '',
                 "registered_at": reg['registered_at'],
@@ -203,7 +225,7 @@ def get_organizer_attendees(current_user):
         return jsonify(results), 200
 
     except Exception as e:
-        print(f"Error fetching attendees: {e}")
+        logger.error("Error fetching attendees: %s", e)
         return jsonify({"message": "Error fetching attendees"}), 500
 
 @organizer_bp.route('/stats', methods=['GET'])
@@ -215,7 +237,7 @@ def get_organizer_stats(current_user):
         events = list(mongo.db.events.find({"created_by": current_user['_id']}))
         event_ids = [str(e['_id']) for e in events]
         
-        registrations = list(mongo.db.registrations.find({"event_id": {"$in": event_ids}}))
+        registrations = find_with_archive('registrations', {"event_id": {"$in": event_ids}})
         
         total_revenue = sum(reg.get('price', 0) for reg in registrations)
         total_tickets_sold = sum(reg.get('quantity', 1) for reg in registrations)
@@ -238,7 +260,7 @@ def get_dashboard_data(current_user):
         # 1. Fetch all datasets
         events = list(mongo.db.events.find({"created_by": current_user['_id']}))
         event_ids = [str(e['_id']) for e in events]
-        registrations = list(mongo.db.registrations.find({"event_id": {"$in": event_ids}}))
+        registrations = find_with_archive('registrations', {"event_id": {"$in": event_ids}})
         
         # 2. Calculate Headline Metrics
         total_revenue = sum(float(reg.get('price', 0) or 0) for reg in registrations)
@@ -321,9 +343,8 @@ def get_dashboard_data(current_user):
             
             # Using standardized string comparison
             if e_date_str and e_date_str > now_iso and e.get('status') == 'published':
-                e_data = {k: str(v) if isinstance(v, ObjectId) else v for k, v in e.items()}
-                e_data['id'] = str(e['_id'])
-                if '_id' in e_data: del e_data['_id']
+                e_data = dict(e)
+                e_data['id'] = e_data.pop('_id')
                 upcoming.append(e_data)
                 if len(upcoming) >= 5: break
                 
@@ -344,7 +365,7 @@ def get_dashboard_data(current_user):
             # Find event title
             e_title = next((e['title'] for e in events if str(e['_id']) == r.get('event_id')), 'Unknown Event')
             recent_activity.append({
-                "id": str(r['_id']),
+                "id": r['_id'],
                 "type": "registration",
                 "message": f"New ticket sold for {e_title}",
                 "time": r.get('registered_at')
@@ -367,7 +388,7 @@ def get_dashboard_data(current_user):
     except Exception as e:
         import traceback
         trace = traceback.format_exc()
-        print(f"Error fetching dashboard data: {trace}")
+        logger.exception("Error fetching dashboard data")
         return jsonify({"message": f"Error: {str(e)}", "trace": trace}), 500
 
 @organizer_bp.route('/earnings', methods=['GET'])
@@ -381,7 +402,7 @@ def get_organizer_earnings(current_user):
         event_ids = [str(e['_id']) for e in events]
         
         # Get registrations (revenue source)
-        registrations = list(mongo.db.registrations.find({"event_id": {"$in": event_ids}}))
+        registrations = find_with_archive('registrations', {"event_id": {"$in": event_ids}})
         
         total_earnings = sum(reg.get('price', 0) for reg in registrations)
         
@@ -417,7 +438,7 @@ def get_organizer_earnings(current_user):
         }), 200
 
     except Exception as e:
-        print(f"Error fetching earnings: {e}")
+        logger.error("Error fetching earnings: %s", e)
         return jsonify({"message": "Error fetching earnings"}), 500
 
 @organizer_bp.route('/reviews', methods=['GET'])
@@ -439,7 +460,7 @@ def get_organizer_reviews(current_user):
         for r in reviews:
             user = mongo.db.users.find_one({"_id": ObjectId(r.get('user_id'))})
             results.append({
-                "id": str(r['_id']),
+                "id": r['_id'],
                 "attendeeName": user.get('name', 'Anonymous') if user else 'Anonymous',
                 "eventTitle": event_map.get(str(r['event_id']), 'Unknown Event'),
                 "rating": r.get('rating', 0),
@@ -452,7 +473,7 @@ def get_organizer_reviews(current_user):
         return jsonify(results), 200
 
     except Exception as e:
-        print(f"Error fetching reviews: {e}")
+        logger.error("Error fetching reviews: %s", e)
         return jsonify({"message": "Error fetching reviews"}), 500
 
 @organizer_bp.route('/events', methods=['POST'])
@@ -547,7 +568,7 @@ def create_event(current_user):
         }), 201
 
     except Exception as e:
-        print(f"Error creating event: {e}")
+        logger.error("Error creating event: %s", e)
         return jsonify({"message": "Error creating event"}), 500
 
 
@@ -620,10 +641,14 @@ def update_event_details(current_user, event_id):
         # but typically organizer form sends full state.
         # For array fields, we trust the frontend sends the complete new list.
         
-        mongo.db.events.update_one(
-            {"_id": ObjectId(event_id)},
-            {"$set": update_fields}
-        )
+        def write(session):
+            # The seat counters change with the event, re-read here so concurrent edits can't both apply a delta
+            current = mongo.db.events.find_one({"_id": ObjectId(event_id)}, {"tickets": 1, "capacity": 1},
+                                               session=session)
+            mongo.db.events.update_one({"_id": ObjectId(event_id)}, {"$set": update_fields}, session=session)
+            inventory.resize(event_id, current, update_fields, session)
+
+        checkout_service.run_transaction(write)
         
         # Handle Promotions (Full Replace Strategy for simplicity and consistency)
         # 1. Remove existing promotions for this event
@@ -654,5 +679,5 @@ def update_event_details(current_user, event_id):
         }), 200
 
     except Exception as e:
-        print(f"Error updating event: {e}")
+        logger.error("Error updating event: %s", e)
         return jsonify({"message": "Error updating event"}), 500
@@ -0,0 +1,38 @@
+import logging
+from flask import Blueprint, current_app, jsonify, request
+from pymongo.errors import DuplicateKeyError
+from src.services import payment_service
+from src.utils.metrics import PAYMENT_WEBHOOKS
+from src.utils.query_budget import query_budget
+
+logger = logging.getLogger(__name__)
+
+payment_bp = Blueprint('payment_bp', __name__)
+
+
+@payment_bp.route('/webhooks/<provider>', methods=['POST'])
+@query_budget(1)
+def webhook(provider):
+    """Verify and record a provider's payment event; the payments worker applies it (one insert, no other work)"""
+    secret = current_app.config.get('PAYMENT_WEBHOOK_SECRETS', {}).get(provider)
+    if provider not in payment_service.PROVIDERS or not secret:
+        return jsonify({"message": "Unknown payment provider"}), 404
+    body = request.get_data()
+    if not payment_service.verify_signature(secret, body, request.headers.get(payment_service.SIGNATURE_HEADER),
+                                            current_app.config.get('PAYMENT_WEBHOOK_TOLERANCE_SECONDS', 300)):
+        PAYMENT_WEBHOOKS.labels(provider, 'bad_signature').inc()
+        return jsonify({"message": "Invalid signature"}), 401
+    try:
+        event = payment_service.parse_event(provider, body)
+    except ValueError as e:
+        PAYMENT_WEBHOOKS.labels(provider, 'bad_payload').inc()
+        return jsonify({"message": str(e)}), 400
+
+    try:
+        payment_service.record_event(event)
+    except DuplicateKeyError:
+        # A provider retry; acknowledge it so the provider stops
+        PAYMENT_WEBHOOKS.labels(provider, 'duplicate').inc()
+        return jsonify({"status": "duplicate"}), 200
+    PAYMENT_WEBHOOKS.labels(provider, 'accepted').inc()
+    return jsonify({"status": "accepted"}), 202
@@ -1,9 +1,12 @@
+import logging
 from flask import Blueprint, jsonify, request
 from src.database import mongo
 from src.utils.decorators import token_required
 from bson.objectid import ObjectId
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 promotion_bp = Blueprint('promotion_bp', __name__)
 
 @promotion_bp.route('', methods=['GET'])
@@ -31,8 +34,7 @@ def get_promotions(current_user):
         
         results = []
         for promo in promotions:
-           promo['id'] = str(promo['_id'])
-           del promo['_id']
+           promo['id'] = promo.pop('_id')
            
            # Resolve Event Title
            event_id = promo.get('event_id')
@@ -48,7 +50,7 @@ def get_promotions(current_user):
            
         return jsonify(results), 200
     except Exception as e:
-        print(f"Error fetching promotions: {e}")
+        logger.error("Error fetching promotions: %s", e)
         return jsonify({"message": "Error fetching promotions"}), 500
 
 @promotion_bp.route('', methods=['POST'])
@@ -94,7 +96,7 @@ def create_promotion(current_user):
         }), 201
         
     except Exception as e:
-        print(f"Error creating promotion: {e}")
+        logger.error("Error creating promotion: %s", e)
         return jsonify({"message": "Error creating promotion"}), 500
 
 @promotion_bp.route('/<promo_id>', methods=['PUT'])
@@ -122,5 +124,5 @@ def delete_promotion(current_user, promo_id):
         mongo.db.promotions.delete_one({"_id": ObjectId(promo_id)})
         return jsonify({"message": "Promotion deleted"}), 200
     except Exception as e:
-        print(f"Error deleting promotion: {e}")
+        logger.error("Error deleting promotion: %s", e)
         return jsonify({"message": "Error deleting promotion"}), 500
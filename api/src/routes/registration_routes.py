@@ -1,12 +1,24 @@
-from flask import Blueprint, jsonify, request
-from src.database import mongo
+import logging
+from flask import Blueprint, current_app, jsonify, request
+from src.database import mongo, docs_by_id
+from src.services import checkout_service
+from src.utils.archive import find_with_archive
 from src.utils.decorators import token_required
+from src.utils.idempotency import idempotent
+from src.utils.inventory import SoldOut
+from src.utils.waiting_room import AdmissionError, check_admission
+from src.utils.query_budget import query_budget
+from src.utils.reservations import is_expired
 from bson.objectid import ObjectId
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 registration_bp = Blueprint('registration_bp', __name__)
 
 @registration_bp.route('/event/<event_id>', methods=['GET'])
+@query_budget(5)
 @token_required
 def get_event_registrations(current_user, event_id):
     try:
@@ -19,23 +31,18 @@ def get_event_registrations(current_user, event_id):
         if str(event.get('created_by')) != str(current_user['_id']):
             return jsonify({"message": "Unauthorized"}), 403
 
-        registrations = list(mongo.db.registrations.find({"event_id": ObjectId(event_id)}))
-        # Fallback for string IDs if any exist
-        if not registrations:
-             registrations = list(mongo.db.registrations.find({"event_id": event_id}))
+        # Past events' registrations live in the archive; event_id is stored as a string or (older) ObjectId
+        registrations = find_with_archive('registrations', {"event_id": {"$in": [ObjectId(event_id), event_id]}})
+
+        users = docs_by_id(mongo.db.users, [reg.get('user_id') for reg in registrations],
+                           {"name": 1, "email": 1})
 
         results = []
         for reg in registrations:
             # Populate user details
-            reg_user = None
-            if reg.get('user_id'):
-                try:
-                    reg_user = mongo.db.users.find_one({"_id": ObjectId(reg['user_id'])})
-                except:
-                    pass
+            reg_user = users.get(str(reg.get('user_id')))
             
-            reg['id'] = str(reg['_id'])
-            del reg['_id']
+            reg['id'] = reg.pop('_id')
             
             # Enrich with User Info
             if reg_user:
@@ -56,10 +63,11 @@ def get_event_registrations(current_user, event_id):
             
         return jsonify(results), 200
     except Exception as e:
-        print(f"Error fetching registrations: {e}")
+        logger.error("Error fetching registrations: %s", e)
         return jsonify({"message": "Error fetching registrations"}), 500
 
 @registration_bp.route('', methods=['POST'])
+@idempotent
 def create_registration():
     try:
         data = request.get_json()
@@ -83,12 +91,25 @@ def create_registration():
 
         event_id = data.get('event_id')
         ticket_type = data.get('ticket_type', 'General')
-        price = data.get('price', 0)
         quantity = data.get('quantity', 1)
         payment_method = data.get('payment_method', 'Card') # Default to Card
         
         if not event_id:
             return jsonify({"message": "Event ID required"}), 400
+        if not isinstance(quantity, int) or quantity < 1:
+            return jsonify({"message": "Quantity must be a positive integer"}), 400
+
+        # Ticket drops with a waiting room only take buyers it has admitted
+        try:
+            admission_position = check_admission(str(event_id), request.headers.get('X-Admission-Token')
+                                                 or data.get('admission_token'))
+        except AdmissionError as e:
+            return jsonify({"message": str(e), "waiting_room": f"/api/waiting-room/{event_id}/join"}), 403
+
+        event = docs_by_id(mongo.db.events, [event_id],
+                           {"tickets": 1, "capacity": 1, "inventory_slots": 1, "created_by": 1}).get(str(event_id))
+        if not event:
+            return jsonify({"message": "Event not found"}), 404
         
         # Guest Details
         guest_name = data.get('guest_name')
@@ -106,21 +127,14 @@ def create_registration():
             
         form_data = data.get('form_data', [])
         
-        # Security: Force pending state for paid tickets
-        # Only free tickets can be automatically confirmed
-        is_free = price == 0
-        initial_status = "confirmed" if is_free else "pending"
-        initial_payment_status = "paid" if is_free else "pending"
-        
+        # Price, status and payment fields come from the event's ticket type (checkout_service.price_cart):
+        # only tickets that really cost nothing are confirmed straight away, whatever price the client sent
         new_reg = {
             "user_id": user_id,
             "event_id": event_id,
             "ticket_type": ticket_type,
-            "price": price,
             "quantity": quantity,
             "payment_method": payment_method,
-            "status": initial_status,
-            "payment_status": initial_payment_status,
             "registered_at": datetime.utcnow(),
             "form_data": form_data if isinstance(form_data, list) else [form_data] if form_data else [],
             # Guest Fields
@@ -128,37 +142,52 @@ def create_registration():
             "guest_email": guest_email,
             "guest_phone": guest_phone
         }
-        
-        result = mongo.db.registrations.insert_one(new_reg)
-        registration_id = str(result.inserted_id)
-        
-        ticket_ids = []
-        # Auto-generate tickets ONLY if it's free/confirmed immediately
-        if is_free:
-            from src.utils.ticket_utils import generate_tickets_for_registration
-            ticket_ids = generate_tickets_for_registration(
-                registration_id=registration_id,
-                user_id=user_id,
-                event_id=event_id,
-                quantity=quantity,
-                ticket_type=ticket_type
-            )
-        
+        if admission_position is not None:
+            # Unique per event: one registration per admission
+            new_reg["admission_position"] = admission_position
+
+        # The unit price the buyer was shown, if the client sent one: a different server price is a 409, not a surprise
+        try:
+            client_price = float(data['price']) if data.get('price') is not None else None
+        except (TypeError, ValueError):
+            client_price = None
+
+        # Seats, promo code, registration and (if free) tickets are written in one transaction
+        try:
+            reg, ticket_ids = checkout_service.place_registration(new_reg, event, data.get('promo_code'), client_price)
+        except checkout_service.CartError as e:
+            return jsonify({"message": str(e)}), 400
+        except checkout_service.PriceChanged as e:
+            return jsonify({"message": "Price changed, please review your order", "ticket_type": ticket_type,
+                            "price": e.price}), 409
+        except SoldOut as e:
+            return jsonify({"message": "Sold out", "ticket_type": ticket_type, "sold_out": e.ticket_type}), 409
+        except checkout_service.PromoError as e:
+            return jsonify({"message": str(e)}), 400
+        except (DuplicateKeyError, BulkWriteError) as e:
+            # Any other unique index (e.g. tickets' registration_id + seq) is a bug, not the buyer's fault
+            if not checkout_service.admission_reused(e):
+                raise
+            return jsonify({"message": "Admission token already used"}), 409
+        if reg["status"] == "pending":
+            from src.utils.metrics import RESERVATIONS
+            RESERVATIONS.labels('created').inc()
+
         return jsonify({
             "message": "Registration created",
-            "id": registration_id,
-            "status": initial_status,
-            "payment_status": initial_payment_status,
+            "id": str(reg["_id"]),
+            "status": reg["status"],
+            "payment_status": reg["payment_status"],
+            "price": reg["price"],
             "tickets": ticket_ids
         }), 201
         
     except Exception as e:
-        print(f"Error creating registration: {e}")
-        import traceback
-        print(traceback.format_exc())
+        logger.exception("Error creating registration: %s", e)
         return jsonify({"message": "Error registering"}), 500
 
 @registration_bp.route('/<registration_id>/confirm_payment', methods=['POST'])
+@idempotent
 def confirm_payment(registration_id):
     try:
         # Check for Authentication (Manual/Optional)
@@ -175,7 +204,7 @@ def confirm_payment(registration_id):
                     if user_id:
                          current_user = User.find_by_id(user_id)
             except Exception as auth_err:
-                print(f"Auth check failed (non-fatal for guests): {auth_err}")
+                logger.warning("Auth check failed (non-fatal for guests): %s", auth_err)
 
         # 1. Find the registration
         reg = mongo.db.registrations.find_one({"_id": ObjectId(registration_id)})
@@ -209,27 +238,27 @@ def confirm_payment(registration_id):
                 "status": "confirmed",
                 "tickets": ticket_ids
             }), 200
+        if reg.get('status') != 'pending':
+            # Refunded or released: its seats may be sold again, paying for it can't bring them back
+            return jsonify({"message": f"Registration is {reg.get('status')}, it can't be paid",
+                            "status": reg.get('status')}), 409
+        if not current_app.config.get('BROWSER_PAYMENT_CONFIRM', True):
+            # The provider's webhook confirms it (src/services/payment_service.py); the client polls until then
+            return jsonify({"message": "Waiting for the payment provider", "status": reg.get('status')}), 202
+
+        from src.utils.metrics import RESERVATIONS
+        now = datetime.utcnow()
+        if is_expired(reg, now):
+            RESERVATIONS.labels('rejected_expired').inc()
+            return jsonify({"message": "Reservation expired, please register again", "status": "expired"}), 410
+
+        # 4. Confirm and issue the tickets in one transaction, unless the reservation expired in the meantime
+        ticket_ids = checkout_service.confirm_payment(reg, now)
+        if ticket_ids is None:
+            RESERVATIONS.labels('rejected_expired').inc()
+            return jsonify({"message": "Reservation expired, please register again", "status": "expired"}), 410
+        RESERVATIONS.labels('confirmed').inc()
 
-        # 4. Update status to paid/confirmed
-        mongo.db.registrations.update_one(
-            {"_id": ObjectId(registration_id)},
-            {"$set": {
-                "status": "confirmed",
-                "payment_status": "paid", 
-                "paid_at": datetime.utcnow()
-            }}
-        )
-        
-        # 5. Generate Tickets NOW
-        from src.utils.ticket_utils import generate_tickets_for_registration
-        ticket_ids = generate_tickets_for_registration(
-            registration_id=registration_id,
-            user_id=str(reg.get('user_id')),
-            event_id=str(reg.get('event_id')),
-            quantity=reg.get('quantity', 1),
-            ticket_type=reg.get('ticket_type', 'General')
-        )
-        
         return jsonify({
             "message": "Payment confirmed and tickets generated",
             "status": "confirmed",
@@ -237,9 +266,131 @@ def confirm_payment(registration_id):
         }), 200
 
     except Exception as e:
-        print(f"Error confirming payment: {e}")
-        import traceback
-        print(traceback.format_exc())
+        logger.exception("Error confirming payment: %s", e)
+        return jsonify({"message": "Error confirming payment"}), 500
+
+def _optional_user_id():
+    """The logged-in buyer's id, or None for a guest checkout"""
+    auth_header = request.headers.get('Authorization', '')
+    if not auth_header.startswith("Bearer "):
+        return None
+    from src.utils.security import Security
+    from src.models.user_model import User
+    decoded_user_id = Security.verify_token(auth_header.split(" ")[1])
+    current_user = User.find_by_id(decoded_user_id) if decoded_user_id else None
+    if not current_user:
+        return None
+    return current_user.get('id') or str(current_user.get('_id', ''))
+
+
+@registration_bp.route('/orders', methods=['POST'])
+@idempotent
+@query_budget(15)
+def create_order():
+    """
+    Cart checkout: several ticket types of one event in one request, e.g.
+    {"event_id": ..., "items": [{"ticket_type": "VIP", "quantity": 2}, {"ticket_type": "General", "quantity": 3}]}.
+    Prices come from the event, not the client. One registration per ticket type, sharing an order_id.
+    """
+    try:
+        data = request.get_json() or {}
+        user_id = _optional_user_id()
+        event_id = data.get('event_id')
+        items = data.get('items')
+        if not event_id:
+            return jsonify({"message": "Event ID required"}), 400
+        if not isinstance(items, list) or not items:
+            return jsonify({"message": "Cart is empty"}), 400
+
+        try:
+            admission_position = check_admission(str(event_id), request.headers.get('X-Admission-Token')
+                                                 or data.get('admission_token'))
+        except AdmissionError as e:
+            return jsonify({"message": str(e), "waiting_room": f"/api/waiting-room/{event_id}/join"}), 403
+
+        event = docs_by_id(mongo.db.events, [event_id],
+                           {"tickets": 1, "capacity": 1, "inventory_slots": 1, "created_by": 1}).get(str(event_id))
+        if not event:
+            return jsonify({"message": "Event not found"}), 404
+        if not user_id and (not data.get('guest_email') or not data.get('guest_name')):
+            return jsonify({"message": "Guest Name and Email required"}), 400
+        try:
+            # Validate before any seat is taken
+            checkout_service.price_cart(event, items)
+        except checkout_service.CartError as e:
+            return jsonify({"message": str(e)}), 400
+
+        form_data = data.get('form_data', [])
+        buyer = {
+            "user_id": user_id or "guest",
+            "event_id": event_id,
+            "payment_method": data.get('payment_method', 'Card'),
+            "form_data": form_data if isinstance(form_data, list) else [form_data] if form_data else [],
+            "guest_name": data.get('guest_name'),
+            "guest_email": data.get('guest_email'),
+            "guest_phone": data.get('guest_phone')
+        }
+        try:
+            order = checkout_service.place_order(event, buyer, items, data.get('promo_code'), admission_position)
+        except SoldOut as e:
+            return jsonify({"message": "Sold out", "sold_out": e.ticket_type}), 409
+        except checkout_service.PromoError as e:
+            return jsonify({"message": str(e)}), 400
+        except (DuplicateKeyError, BulkWriteError) as e:
+            # Any other unique index (e.g. tickets' registration_id + seq) is a bug, not the buyer's fault
+            if not checkout_service.admission_reused(e):
+                raise
+            return jsonify({"message": "Admission token already used"}), 409
+        if order['payment_status'] == 'pending':
+            from src.utils.metrics import RESERVATIONS
+            RESERVATIONS.labels('created').inc(len(order['registrations']))
+
+        return jsonify({"message": "Order created", **order}), 201
+
+    except Exception as e:
+        logger.exception("Error creating order: %s", e)
+        return jsonify({"message": "Error creating order"}), 500
+
+
+@registration_bp.route('/orders/<order_id>/confirm_payment', methods=['POST'])
+@idempotent
+@query_budget(9)
+def confirm_order_payment(order_id):
+    """confirm_payment for every registration of a cart order, tickets issued in one write"""
+    try:
+        registrations = list(mongo.db.registrations.find({"order_id": order_id}, {"user_id": 1, "status": 1}))
+        if not registrations:
+            return jsonify({"message": "Order not found"}), 404
+        # Every line must belong to the caller (an order_id shared with someone else's registration confirms nothing)
+        owners = {str(reg.get('user_id')) for reg in registrations}
+        if owners - {"guest", "None"} and owners != {_optional_user_id()}:
+            return jsonify({"message": "Unauthorized"}), 403
+
+        closed = {reg.get('status') for reg in registrations} - {'pending', 'confirmed'}
+        if closed:
+            return jsonify({"message": f"Order is {', '.join(sorted(map(str, closed)))}, it can't be paid",
+                            "order_id": order_id, "status": sorted(map(str, closed))[0]}), 409
+        pending = sum(1 for reg in registrations if reg.get('status') == 'pending')
+        if pending and not current_app.config.get('BROWSER_PAYMENT_CONFIRM', True):
+            return jsonify({"message": "Waiting for the payment provider", "order_id": order_id,
+                            "status": registrations[0].get('status')}), 202
+
+        from src.utils.metrics import RESERVATIONS
+        issued = checkout_service.confirm_registrations([reg['_id'] for reg in registrations], datetime.utcnow())
+        if issued is None:
+            RESERVATIONS.labels('rejected_expired').inc(pending)
+            return jsonify({"message": "Reservation expired, please register again", "status": "expired"}), 410
+        RESERVATIONS.labels('confirmed').inc(pending)
+
+        return jsonify({
+            "message": "Payment confirmed and tickets generated" if pending else "Payment already confirmed",
+            "order_id": order_id,
+            "status": "confirmed",
+            "tickets": issued
+        }), 200
+
+    except Exception as e:
+        logger.exception("Error confirming order payment: %s", e)
         return jsonify({"message": "Error confirming payment"}), 500
 
 from flask_cors import cross_origin
@@ -247,26 +398,26 @@ from flask_cors import cross_origin
 @registration_bp.route('/my', methods=['GET'])
 @token_required
 def get_my_registrations(current_user):
-    print("[DEBUG] ===== get_my_registrations called =====")
-    print(f"[DEBUG] current_user type: {type(current_user)}")
-    print(f"[DEBUG] current_user keys: {current_user.keys() if isinstance(current_user, dict) else 'Not a dict'}")
+    logger.debug("===== get_my_registrations called =====")
+    logger.debug("current_user type: %s", type(current_user))
+    logger.debug("current_user keys: %s", current_user.keys() if isinstance(current_user, dict) else 'Not a dict')
     try:
         # CRITICAL FIX: Auth returns 'id' not '_id'
         user_id = current_user.get('id') or str(current_user.get('_id', ''))
         
         if not user_id:
-            print("[ERROR] No user_id in current_user")
+            logger.warning("No user_id in current_user")
             return jsonify([]), 200  # Return empty array instead of error
         
-        print(f"[DEBUG] Fetching registrations for user_id: {user_id} (type: {type(user_id)})")
+        logger.debug("Fetching registrations for user_id: %s (type: %s)", user_id, type(user_id))
         
         # Database stores user_id as STRING, so query with string
         query = {"user_id": user_id}
-        print(f"[DEBUG] Registration Query: {query}")
+        logger.debug("Registration Query: %s", query)
         
-        registrations = list(mongo.db.registrations.find(query))
+        registrations = find_with_archive('registrations', query)
         
-        print(f"[DEBUG] Found {len(registrations)} registrations")
+        logger.debug("Found %s registrations", len(registrations))
         
         results = []
         for reg in registrations:
@@ -285,57 +436,47 @@ def get_my_registrations(current_user):
                              event = mongo.db.events.find_one({"_id": str(event_id)})
                              
                     except Exception as e:
-                        print(f"[ERROR] Error looking up event {event_id}: {e}")
+                        logger.error("Error looking up event %s: %s", event_id, e)
                         # Try lookup as string directly if ObjectId conversion failed
                         try:
                             event = mongo.db.events.find_one({"_id": str(event_id)})
                         except:
                             pass
                 
-                reg['id'] = str(reg['_id'])
-                del reg['_id']
-                
-                # Ensure registered_at is string for frontend
-                if 'registered_at' in reg and isinstance(reg['registered_at'], datetime):
-                    reg['registered_at'] = reg['registered_at'].isoformat()
-                elif 'registered_at' not in reg:
-                    reg['registered_at'] = datetime.utcnow().isoformat()
+                reg['id'] = reg.pop('_id')
+                reg.setdefault('registered_at', datetime.utcnow())
                 
                 if event:
                     reg['event'] = {
-                        'id': str(event['_id']),
+                        'id': event['_id'],
                         'title': event.get('title', 'Untitled Event'),
                         'date': event.get('date') or event.get('start_date') or 'TBA',
                         'time': event.get('time', '') or event.get('start_time', '') or 'TBA',
                         'address': event.get('address', '') or event.get('venue', '') or event.get('city', '') or 'TBA',
                         'background_image_url': event.get('cover_image') or event.get('background_image_url', ''),
-                        'target_date': event.get('target_date') or event.get('start_date') or datetime.utcnow().isoformat()
+                        'target_date': event.get('target_date') or event.get('start_date') or datetime.utcnow()
                     }
                 else:
                      # Even if event is missing (deleted?), return the registration so user sees it
                      # Use placeholder data
                      reg['event'] = {
-                        'id': str(event_id) if event_id else 'unknown',
+                        'id': event_id or 'unknown',
                         'title': 'Unknown Event (Deleted)',
                         'date': 'N/A',
                         'time': '',
                         'address': '',
                         'background_image_url': '',
-                        'target_date': datetime.utcnow().isoformat()
+                        'target_date': datetime.utcnow()
                     }
 
                 results.append(reg)
             except Exception as e:
-                print(f"[ERROR] Error processing registration {reg.get('_id')}: {e}")
-                import traceback
-                print(f"[ERROR] Traceback: {traceback.format_exc()}")
+                logger.exception("Error processing registration %s: %s", reg.get('_id'), e)
                 # Skip this registration and continue
                 continue
             
         return jsonify(results), 200
     except Exception as e:
-        import traceback
-        print(f"[ERROR] Error in get_my_registrations: {str(e)}")
-        print(f"[ERROR] Traceback: {traceback.format_exc()}")
+        logger.exception("Error in get_my_registrations: %s", e)
         # NEVER crash the My Tickets page - return empty array
         return jsonify([]), 200
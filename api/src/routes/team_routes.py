@@ -1,9 +1,12 @@
+import logging
 from flask import Blueprint, jsonify, request
 from src.database import mongo
 from src.utils.decorators import token_required
 from bson.objectid import ObjectId
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 team_bp = Blueprint('team_bp', __name__)
 
 @team_bp.route('', methods=['GET'])
@@ -18,7 +21,7 @@ def get_team(current_user):
             
         return jsonify(team.get('members', [])), 200
     except Exception as e:
-        print(f"Error fetching team: {e}")
+        logger.error("Error fetching team: %s", e)
         return jsonify({"message": "Error fetching team"}), 500
 
 @team_bp.route('', methods=['POST'])
@@ -53,7 +56,7 @@ def add_team_member(current_user):
         return jsonify({"message": "Team member invited", "member": member_entry}), 201
         
     except Exception as e:
-        print(f"Error adding team member: {e}")
+        logger.error("Error adding team member: %s", e)
         return jsonify({"message": "Error adding team member"}), 500
 
 @team_bp.route('/<email>', methods=['DELETE'])
@@ -66,5 +69,5 @@ def remove_team_member(current_user, email):
         )
         return jsonify({"message": "Team member removed"}), 200
     except Exception as e:
-        print(f"Error removing team member: {e}")
+        logger.error("Error removing team member: %s", e)
         return jsonify({"message": "Error removing team member"}), 500
@@ -1,13 +1,19 @@
+import logging
 from flask import Blueprint, jsonify, request
-from src.database import mongo
+from src.database import mongo, docs_by_id
+from src.utils.archive import docs_by_id_with_archive, find_one_with_archive, find_with_archive
 from src.utils.decorators import token_required
+from src.utils.query_budget import query_budget
 from src.utils.ticket_utils import generate_tickets_for_registration, generate_secure_token
 from bson.objectid import ObjectId
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 ticket_bp = Blueprint('tickets', __name__)
 
 @ticket_bp.route('/my', methods=['GET'])
+@query_budget(6)
 @token_required
 def get_my_tickets(current_user):
     """Get all tickets for the authenticated user"""
@@ -18,43 +24,28 @@ def get_my_tickets(current_user):
         if not user_id:
             return jsonify([]), 200
         
-        # Find all tickets for this user
-        tickets = list(mongo.db.tickets.find({"user_id": user_id}))
+        # Find all tickets for this user, including past events' (archived) ones
+        tickets = find_with_archive('tickets', {"user_id": user_id})
         
+        # Events and registrations in one query each, not one per ticket
+        events = docs_by_id(mongo.db.events, [t.get('event_id') for t in tickets])
+        registrations = docs_by_id_with_archive('registrations', [t.get('registration_id') for t in tickets])
+
         result = []
         for ticket in tickets:
-            # Get event details
-            event_id = ticket.get('event_id')
-            event = None
-            if event_id:
-                try:
-                    event = mongo.db.events.find_one({"_id": ObjectId(event_id)})
-                except:
-                    pass
-                if not event:
-                    event = mongo.db.events.find_one({"_id": str(event_id)})
-            
-            # Get registration details
-            reg_id = ticket.get('registration_id')
-            registration = None
-            if reg_id:
-                try:
-                    registration = mongo.db.registrations.find_one({"_id": ObjectId(reg_id)})
-                except:
-                    pass
-                if not registration:
-                     registration = mongo.db.registrations.find_one({"_id": str(reg_id)})
+            event = events.get(str(ticket.get('event_id')))
+            registration = registrations.get(str(ticket.get('registration_id')))
             
             ticket_data = {
-                "id": str(ticket['_id']),
+                "id": ticket['_id'],
                 "ticket_id": ticket.get('ticket_id'),
                 "status": ticket.get('status'),
                 "ticket_type": ticket.get('ticket_type'),
-                "created_at": ticket.get('created_at').isoformat() if ticket.get('created_at') else None,
-                "used_at": ticket.get('used_at').isoformat() if ticket.get('used_at') else None,
+                "created_at": ticket.get('created_at'),
+                "used_at": ticket.get('used_at'),
                 "qr_token": ticket.get('qr_token'),  # Only show to owner
                 "event": {
-                    "id": str(event['_id']) if event else None,
+                    "id": event['_id'] if event else None,
                     "title": event.get('title') if event else 'Unknown Event',
                     "date": event.get('date') or event.get('start_date') if event else 'TBA',
                     "time": event.get('time', '') or event.get('start_time', '') if event else 'TBA',
@@ -64,7 +55,7 @@ def get_my_tickets(current_user):
                 } if event else None,
                 "registration": {
                     "payment_status": registration.get('payment_status') if registration else 'unknown',
-                    "registered_at": registration.get('registered_at').isoformat() if registration and registration.get('registered_at') else None
+                    "registered_at": registration.get('registered_at')
                 } if registration else None
             }
             
@@ -73,9 +64,7 @@ def get_my_tickets(current_user):
         return jsonify(result), 200
         
     except Exception as e:
-        print(f"[ERROR] Error fetching tickets: {str(e)}")
-        import traceback
-        print(traceback.format_exc())
+        logger.exception("Error fetching tickets: %s", e)
         return jsonify([]), 200
 
 @ticket_bp.route('/<ticket_id>', methods=['GET'])
@@ -86,7 +75,7 @@ def get_ticket_details(current_user, ticket_id):
         user_id = current_user.get('id') or str(current_user.get('_id', ''))
         
         # Find ticket
-        ticket = mongo.db.tickets.find_one({"_id": ObjectId(ticket_id)})
+        ticket = find_one_with_archive('tickets', {"_id": ObjectId(ticket_id)})
         
         if not ticket:
             return jsonify({"message": "Ticket not found"}), 404
@@ -102,15 +91,15 @@ def get_ticket_details(current_user, ticket_id):
         user = mongo.db.users.find_one({"_id": ObjectId(user_id)})
         
         ticket_data = {
-            "id": str(ticket['_id']),
+            "id": ticket['_id'],
             "ticket_id": ticket.get('ticket_id'),
             "status": ticket.get('status'),
             "ticket_type": ticket.get('ticket_type'),
             "qr_token": ticket.get('qr_token'),
-            "created_at": ticket.get('created_at').isoformat() if ticket.get('created_at') else None,
-            "used_at": ticket.get('used_at').isoformat() if ticket.get('used_at') else None,
+            "created_at": ticket.get('created_at'),
+            "used_at": ticket.get('used_at'),
             "event": {
-                "id": str(event['_id']) if event else None,
+                "id": event['_id'] if event else None,
                 "title": event.get('title') if event else 'Unknown Event',
                 "date": event.get('date') or event.get('start_date') if event else 'TBA',
                 "time": event.get('time', '') or event.get('start_time', '') if event else 'TBA',
@@ -127,12 +116,11 @@ def get_ticket_details(current_user, ticket_id):
         return jsonify(ticket_data), 200
         
     except Exception as e:
-        print(f"[ERROR] Error fetching ticket details: {str(e)}")
-        import traceback
-        print(traceback.format_exc())
+        logger.exception("Error fetching ticket details: %s", e)
         return jsonify({"message": "Error fetching ticket"}), 500
 
 @ticket_bp.route('/validate', methods=['POST'])
+@query_budget(5)
 @token_required
 def validate_ticket(current_user):
     """Validate a ticket by QR token (organizer only)"""
@@ -171,7 +159,7 @@ def validate_ticket(current_user):
             return jsonify({
                 "valid": False,
                 "message": "Ticket already used",
-                "used_at": ticket.get('used_at').isoformat() if ticket.get('used_at') else None
+                "used_at": ticket.get('used_at')
             }), 200
         
         # Check if cancelled
@@ -202,7 +190,7 @@ def validate_ticket(current_user):
                     ticket.get('ticket_id')
                 )
         except Exception as email_err:
-            print(f"Failed to send entry email: {email_err}")
+            logger.warning("Failed to send entry email: %s", email_err)
 
         return jsonify({
             "valid": True,
@@ -212,7 +200,5 @@ def validate_ticket(current_user):
         }), 200
         
     except Exception as e:
-        print(f"[ERROR] Error validating ticket: {str(e)}")
-        import traceback
-        print(traceback.format_exc())
+        logger.exception("Error validating ticket: %s", e)
         return jsonify({"valid": False, "message": "Validation error"}), 500
@@ -1,32 +1,37 @@
+import logging
 from flask import Blueprint, request, jsonify
 import os
 from werkzeug.utils import secure_filename
 import uuid
-from PIL import Image
 import io
+from src.config import Config
+from src.services.storage_service import get_storage
+
+logger = logging.getLogger(__name__)
 
 upload_bp = Blueprint('upload_bp', __name__)
 
-# Base upload directory
-UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+# Direct uploads land here first and are moved out by /finalize
+INCOMING_PREFIX = 'incoming/'
 
 def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def ensure_upload_dirs():
-    """Create upload directories if they don't exist"""
-    dirs = [
-        UPLOAD_FOLDER,
-        os.path.join(UPLOAD_FOLDER, 'avatars'),
-        os.path.join(UPLOAD_FOLDER, 'events')
-    ]
-    for dir_path in dirs:
-        os.makedirs(dir_path, exist_ok=True)
+def get_subdir(upload_type):
+    return 'avatars' if upload_type == 'avatars' else 'events'
+
+def build_media_key(subdir, filename):
+    """Unique WebP key for a processed image, e.g. events/poster_1a2b3c4d.webp"""
+    original_name = secure_filename(filename) or 'image'
+    name_without_ext = os.path.splitext(original_name)[0]
+    return f"{subdir}/{name_without_ext}_{uuid.uuid4().hex[:8]}.webp"
 
 def convert_to_webp(file_stream, max_size=1200):
     """Convert image to WebP format and return as bytes"""
+    # Pillow is only needed by upload handlers, so keep it off the boot path
+    from PIL import Image
     try:
         img = Image.open(file_stream)
         
@@ -50,75 +55,131 @@ def convert_to_webp(file_stream, max_size=1200):
         output.seek(0)
         return output
     except Exception as e:
-        print(f"Error converting image to WebP: {e}")
+        logger.error("Error converting image to WebP: %s", e)
         raise
 
 @upload_bp.route('', methods=['POST'], strict_slashes=False)
 def upload_file():
-    """Upload file to local storage - supports both event and avatar uploads"""
-    print(f"[UPLOAD] Received upload request")
-    print(f"[UPLOAD] Request files: {list(request.files.keys())}")
-    print(f"[UPLOAD] Request form: {dict(request.form)}")
-    
-    ensure_upload_dirs()
+    """Upload an image through the API - supports both event and avatar uploads"""
+    logger.debug("[UPLOAD] Received upload request")
     
     # Check for 'image' or 'file' in request
     file_key = 'image' if 'image' in request.files else 'file'
     
     if file_key not in request.files:
-        print(f"[UPLOAD] ERROR: No file part found")
+        logger.debug("[UPLOAD] No file part found")
         return jsonify({"error": "No file part"}), 400
     
     file = request.files[file_key]
-    print(f"[UPLOAD] Filename: {file.filename}")
     
     if file.filename == '':
-        print(f"[UPLOAD] ERROR: Empty filename")
+        logger.debug("[UPLOAD] Empty filename")
         return jsonify({"error": "No selected file"}), 400
     
     if not file or not allowed_file(file.filename):
-        print(f"[UPLOAD] ERROR: File type not allowed")
+        logger.debug("[UPLOAD] File type not allowed")
         return jsonify({"error": "File type not allowed"}), 400
     
     try:
         # Determine upload type from form data (default to 'events')
         upload_type = request.form.get('type', 'events')  # 'avatars' or 'events'
         
-        print(f"[UPLOAD] Upload type: {upload_type}")
-        
         # Convert image to WebP
         webp_stream = convert_to_webp(file.stream)
-        print(f"[UPLOAD] Conversion successful")
-        
-        # Generate unique filename
-        original_name = secure_filename(file.filename)
-        name_without_ext = os.path.splitext(original_name)[0]
-        unique_filename = f"{name_without_ext}_{uuid.uuid4().hex[:8]}.webp"
-        
-        # Determine subdirectory
-        if upload_type == 'avatars':
-            subdir = 'avatars'
-        else:
-            subdir = 'events'
-        
-        # Full file path
-        file_path = os.path.join(UPLOAD_FOLDER, subdir, unique_filename)
-        
-        print(f"[UPLOAD] Saving to: {file_path}")
-        
-        # Save file
-        with open(file_path, 'wb') as f:
-            f.write(webp_stream.read())
         
-        # Return path that frontend can use
-        url_path = f"/uploads/{subdir}/{unique_filename}"
+        key = build_media_key(get_subdir(upload_type), file.filename)
+        url_path = get_storage().save(key, webp_stream.read(), 'image/webp')
         
-        print(f"[UPLOAD] Upload successful! Path: {url_path}")
+        logger.info("[UPLOAD] Upload successful! Path: %s", url_path)
         
         return jsonify({"url": url_path}), 200
         
     except Exception as e:
-        print(f"[UPLOAD] ERROR: Upload failed: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("[UPLOAD] Upload failed: %s", e)
         return jsonify({"error": f"Upload failed: {str(e)}"}), 500
+
+@upload_bp.route('/presign', methods=['POST'])
+def presign_upload():
+    """
+    Start a direct-to-storage upload.
+    The client PUTs the raw file to the returned URL, then calls /finalize with the key.
+    """
+    data = request.get_json() or {}
+    filename = data.get('filename', '')
+    content_type = data.get('content_type') or 'application/octet-stream'
+    
+    if not allowed_file(filename):
+        return jsonify({"error": "File type not allowed"}), 400
+    
+    ext = filename.rsplit('.', 1)[1].lower()
+    key = f"{INCOMING_PREFIX}{uuid.uuid4().hex}.{ext}"
+    
+    try:
+        upload = get_storage().presign_upload(key, content_type)
+    except RuntimeError as e:
+        logger.error("[UPLOAD] Presign refused: %s", e)
+        return jsonify({"error": "Direct uploads are not available"}), 503
+    upload['max_bytes'] = Config.MAX_UPLOAD_BYTES
+    return jsonify(upload), 200
+
+@upload_bp.route('/direct/<path:key>', methods=['PUT'])
+def direct_upload(key):
+    """Receiving end of a presigned upload when using the local storage backend"""
+    storage = get_storage()
+    if storage.name != 'local':
+        return jsonify({"error": "Direct uploads go to object storage"}), 400
+    
+    if not key.startswith(INCOMING_PREFIX) or not allowed_file(key):
+        return jsonify({"error": "Invalid upload key"}), 400
+    
+    if not storage.verify_upload_signature(key, request.args.get('expires'), request.args.get('signature')):
+        return jsonify({"error": "Invalid or expired upload URL"}), 403
+    
+    if request.content_length and request.content_length > Config.MAX_UPLOAD_BYTES:
+        return jsonify({"error": "File too large"}), 413
+    
+    data = request.get_data(cache=False)
+    if len(data) > Config.MAX_UPLOAD_BYTES:
+        return jsonify({"error": "File too large"}), 413
+    
+    storage.save(key, data, request.content_type)
+    return '', 204
+
+def finalize_direct_upload(key, subdir, max_size=1200, dest_key=None):
+    """
+    Transcode a directly uploaded file to WebP and move it to its final key.
+    Returns (url, error). The raw incoming object is always removed.
+    """
+    if not key or not key.startswith(INCOMING_PREFIX) or '..' in key or not allowed_file(key):
+        return None, "Invalid upload key"
+    
+    storage = get_storage()
+    try:
+        raw = storage.read(key)
+    except Exception:
+        return None, "Upload not found"
+    
+    try:
+        if len(raw) > Config.MAX_UPLOAD_BYTES:
+            return None, "File too large"
+        webp_stream = convert_to_webp(io.BytesIO(raw), max_size=max_size)
+        dest_key = dest_key or build_media_key(subdir, os.path.basename(key))
+        return storage.save(dest_key, webp_stream.read(), 'image/webp'), None
+    finally:
+        storage.delete(key)
+
+@upload_bp.route('/finalize', methods=['POST'])
+def finalize_upload():
+    """Process a file uploaded via /presign and return its public URL"""
+    data = request.get_json() or {}
+    
+    try:
+        url_path, error = finalize_direct_upload(data.get('key'), get_subdir(data.get('type', 'events')))
+    except Exception as e:
+        logger.error("[UPLOAD] Finalize failed: %s", e)
+        return jsonify({"error": f"Upload failed: {str(e)}"}), 500
+    
+    if error:
+        return jsonify({"error": error}), 400
+    
+    return jsonify({"url": url_path}), 200
@@ -1,8 +1,12 @@
 
+import logging
+import uuid
 from flask import Blueprint, jsonify
 from src.utils.decorators import token_required
 from src.utils.limiter import limiter
 
+logger = logging.getLogger(__name__)
+
 user_bp = Blueprint('user', __name__)
 
 @user_bp.route('/dashboard', methods=['GET'])
@@ -81,75 +85,55 @@ def get_tickets(current_user):
 @token_required
 @limiter.limit("10 per minute")
 def upload_profile_picture(current_user):
-    """Upload or update user's profile picture to local storage"""
+    """
+    Upload or update user's profile picture.
+    Accepts a multipart file, or JSON {"key": ...} for a file sent via /api/upload/presign.
+    """
     from flask import request
     from src.database import mongo
-    from werkzeug.utils import secure_filename
-    from PIL import Image
-    import os
-    import glob
-    
-    file_key = 'image' if 'image' in request.files else 'file'
-    
-    if file_key not in request.files:
-        return jsonify({"message": "No file provided"}), 400
-    
-    file = request.files[file_key]
-    
-    if file.filename == '':
-        return jsonify({"message": "No file selected"}), 400
+    from src.services.storage_service import get_storage
+    from src.routes.upload_routes import allowed_file, convert_to_webp, finalize_direct_upload
     
-    # Validate file type
-    allowed_extensions = {'png', 'jpg', 'jpeg', 'webp', 'gif'}
-    if not ('.' in file.filename and file.filename.rsplit('.', 1)[1].lower() in allowed_extensions):
-        return jsonify({"message": "Invalid file type"}), 400
+    # A new key per upload: avatars are cached as immutable, so a changed one needs a new URL
+    user_id = str(current_user['_id'])
+    avatar_key = f"avatars/{user_id}.{uuid.uuid4().hex[:12]}.webp"
+    storage = get_storage()
     
     try:
-        # Ensure upload directory exists
-        from flask import current_app
-        upload_dir = os.path.join(current_app.root_path, 'uploads', 'avatars')
-        os.makedirs(upload_dir, exist_ok=True)
-        
-        # Convert to WebP
-        img = Image.open(file.stream)
-        
-        # Resize to 800x800 max
-        if max(img.size) > 800:
-            img.thumbnail((800, 800), Image.Resampling.LANCZOS)
-        
-        # Convert to RGB
-        if img.mode in ('RGBA', 'LA', 'P'):
-            background = Image.new('RGB', img.size, (255, 255, 255))
-            if img.mode == 'P':
-                img = img.convert('RGBA')
-            background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
-            img = background
-        elif img.mode != 'RGB':
-            img = img.convert('RGB')
-        
-        # Use user ID as filename (this replaces old image automatically)
-        user_id = str(current_user['_id'])
-        filename = f"{user_id}.webp"
-        file_path = os.path.join(upload_dir, filename)
+        direct = request.get_json(silent=True) if request.is_json else None
+        if direct and direct.get('key'):
+            avatar_url, error = finalize_direct_upload(direct['key'], 'avatars', max_size=800, dest_key=avatar_key)
+            if error:
+                return jsonify({"message": error}), 400
+        else:
+            file_key = 'image' if 'image' in request.files else 'file'
+            
+            if file_key not in request.files:
+                return jsonify({"message": "No file provided"}), 400
+            
+            file = request.files[file_key]
+            
+            if file.filename == '':
+                return jsonify({"message": "No file selected"}), 400
+            
+            # Validate file type
+            if not allowed_file(file.filename):
+                return jsonify({"message": "Invalid file type"}), 400
+            
+            # Convert to WebP, resized to 800x800 max
+            webp_stream = convert_to_webp(file.stream, max_size=800)
+            avatar_url = storage.save(avatar_key, webp_stream.read(), 'image/webp')
         
-        # Delete old file if it exists (in case of different extension)
-        for old_file in glob.glob(os.path.join(upload_dir, f"{user_id}.*")):
-            if old_file != file_path:
+        # Delete the previous avatars (older versions, or the unversioned avatars/<id>.webp)
+        for old_key, _, _ in list(storage.list(f"avatars/{user_id}.")):
+            if old_key != avatar_key:
                 try:
-                    os.remove(old_file)
-                    print(f"Deleted old avatar: {old_file}")
+                    storage.delete(old_key)
+                    logger.info("Deleted old avatar: %s", old_key)
                 except:
                     pass
         
-        # Save as WebP
-        img.save(file_path, format='WEBP', quality=85)
-        
-        print(f"[AVATAR] Saved to: {file_path}")
-        
-        # Create URL path
-        avatar_url = f"/uploads/avatars/{filename}"
-        
-        print(f"[AVATAR] URL: {avatar_url}")
+        logger.debug("[AVATAR] URL: %s", avatar_url)
         
         # Update user document
         mongo.db.users.update_one(
@@ -163,9 +147,7 @@ def upload_profile_picture(current_user):
         }), 200
         
     except Exception as e:
-        print(f"Profile picture upload error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Profile picture upload error: %s", e)
         return jsonify({"message": f"Upload failed: {str(e)}"}), 500
 
 @user_bp.route('/profile-picture', methods=['DELETE'])
@@ -183,5 +165,5 @@ def delete_profile_picture(current_user):
         
         return jsonify({"message": "Profile picture removed successfully"}), 200
     except Exception as e:
-        print(f"Error removing profile picture: {e}")
+        logger.error("Error removing profile picture: %s", e)
         return jsonify({"message": "Failed to remove profile picture"}), 500
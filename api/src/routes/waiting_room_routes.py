@@ -0,0 +1,71 @@
+import logging
+import math
+from datetime import datetime
+from flask import Blueprint, jsonify, request
+from src.utils import waiting_room
+from src.utils.query_budget import query_budget
+
+logger = logging.getLogger(__name__)
+
+waiting_room_bp = Blueprint('waiting_room_bp', __name__)
+
+
+def _queue_token():
+    return request.headers.get('X-Queue-Token') or request.args.get('token')
+
+
+def _poll_after(seconds):
+    # Poll less often the further back in the queue, so a big crowd doesn't turn into a big request rate
+    return int(min(max(seconds / 10, 2), 30))
+
+
+@waiting_room_bp.route('/<event_id>/join', methods=['POST'])
+@query_budget(2)
+def join(event_id):
+    """Take a place in the queue"""
+    room = waiting_room.get_room(event_id)
+    if room is None:
+        return jsonify({"status": "open", "message": "No waiting room, registration is open"}), 200
+    position = waiting_room.next_position(event_id)
+    if position is None:
+        return jsonify({"message": "Waiting room not found"}), 404
+    wait = max((waiting_room.admit_time(room, position) - datetime.utcnow()).total_seconds(), 0)
+    return jsonify({
+        "status": "waiting",
+        "queue_token": waiting_room.queue_token(event_id, position),
+        "position": position,
+        "estimated_wait_seconds": math.ceil(wait),
+        "poll_after": _poll_after(wait)
+    }), 201
+
+
+@waiting_room_bp.route('/<event_id>/status', methods=['GET'])
+@query_budget(1)
+def status(event_id):
+    """Where a queue token stands; returns the admission token once it is its turn"""
+    room = waiting_room.get_room(event_id)
+    if room is None:
+        return jsonify({"status": "open", "message": "No waiting room, registration is open"}), 200
+    try:
+        position = waiting_room.read_queue_token(_queue_token(), event_id)
+    except waiting_room.AdmissionError as e:
+        return jsonify({"message": str(e)}), 401
+
+    now = datetime.utcnow()
+    admitted = waiting_room.admitted_until(room, now)
+    if position >= admitted:
+        wait = (waiting_room.admit_time(room, position) - now).total_seconds()
+        return jsonify({
+            "status": "waiting",
+            "position": position,
+            "ahead": position - admitted,
+            "estimated_wait_seconds": math.ceil(wait),
+            "poll_after": _poll_after(wait)
+        }), 200
+
+    token, expires_at = waiting_room.admission_token(room, event_id, position)
+    return jsonify({
+        "status": "admitted",
+        "admission_token": token,
+        "expires_at": expires_at.isoformat() + 'Z'
+    }), 200
@@ -0,0 +1,302 @@
+"""
+Checkout writes.
+
+A checkout takes seats (src/utils/inventory.py), redeems the promo code,
+inserts the registration and, when nothing is left to pay, issues the
+tickets. Done as separate writes, a crash in between left half-finished
+checkouts behind (seats taken by no one, redeemed codes without an order).
+Here they run in one MongoDB transaction:
+
+    reg, ticket_ids = place_registration(new_reg, event, promo_code)   # priced from the event
+    order = place_order(event, buyer, items, promo_code)    # a cart of several ticket types
+    ticket_ids = confirm_payment(reg, now)      # None: expired, or no longer pending
+    issued = confirm_registrations(ids, now)    # a whole order
+
+run_transaction uses ClientSession.with_transaction, which retries the whole
+callback on TransientTransactionError (e.g. two buyers hitting the same
+inventory slot) and the commit on UnknownTransactionCommitResult. Callbacks
+must therefore be safe to run more than once and build their documents
+inside. Transactions need a replica set (Atlas always is; locally
+`mongod --replSet rs0`). Compare with the separate writes with
+`python bench_checkout.py`.
+"""
+import logging
+from datetime import datetime
+from bson.objectid import ObjectId
+from pymongo.errors import BulkWriteError
+from pymongo.write_concern import WriteConcern
+from src.database import mongo
+from src.utils.inventory import reserve, reserve_many
+from src.utils.reservations import is_expired, reservation_expiry
+from src.utils.ticket_utils import generate_tickets_for_registration, issue_tickets
+
+logger = logging.getLogger(__name__)
+
+
+class PromoError(Exception):
+    pass
+
+
+class CartError(Exception):
+    pass
+
+
+class PriceChanged(Exception):
+    """The client showed the buyer a different unit price than the event charges"""
+    def __init__(self, price):
+        super().__init__(f"Price is {price}")
+        self.price = price
+
+
+def admission_reused(exc):
+    """
+    True when a DuplicateKeyError / BulkWriteError came from the unique
+    (event_id, admission_position) index, i.e. a waiting room admission used twice
+    """
+    errors = exc.details.get('writeErrors', []) if isinstance(exc, BulkWriteError) else [exc.details or {}]
+    # keyPattern names the index's fields; older servers only have the index name in the message
+    return any(error.get('code', 11000) == 11000 and
+               ('admission_position' in (error.get('keyPattern') or {})
+                or 'admission_position' in str(error.get('errmsg', '')))
+               for error in errors)
+
+
+def run_transaction(callback):
+    """callback(session) in a transaction, committed with w:majority; returns its result"""
+    with mongo.cx.start_session() as session:
+        return session.with_transaction(callback, write_concern=WriteConcern('majority'))
+
+
+def redeem_promo(code, event, session=None):
+    """Count one use of an active, unexpired promo code for the event; raises PromoError"""
+    now = datetime.utcnow()
+    promo = mongo.db.promotions.find_one_and_update(
+        {"code": code.strip().upper(), "status": "active",
+         "$and": [
+             # An event's own code, or an organizer-wide one
+             {"$or": [{"event_id": str(event['_id'])},
+                      {"event_id": None, "created_by": event.get('created_by')}]},
+             # expiry_date is an ISO string, which sorts like the date
+             {"$or": [{"expiry_date": None}, {"expiry_date": ""},
+                      {"expiry_date": {"$gte": now.isoformat()}}]},
+             {"$or": [{"usage_limit": {"$in": [0, None]}}, {"$expr": {"$lt": ["$used_count", "$usage_limit"]}}]},
+         ]},
+        {"$inc": {"used_count": 1}},
+        projection={"code": 1, "type": 1, "amount": 1},
+        session=session
+    )
+    if promo is None:
+        raise PromoError("Invalid or expired promo code")
+    return promo
+
+
+def place_registration(new_reg, event, promo_code=None, client_price=None):
+    """
+    Price new_reg's ticket type from the event (see price_cart), take the
+    seats, redeem promo_code and insert it (plus its tickets when nothing is
+    left to pay) in one transaction. The price, status and payment fields
+    are set here, never taken from the client; a client_price that differs
+    raises PriceChanged instead of charging something the buyer didn't see.
+    Returns (registration, ticket_ids). Raises CartError, SoldOut, PromoError, or
+    DuplicateKeyError (admission_reused() for a waiting room admission used
+    twice); nothing is written in those cases.
+    """
+    code = promo_code.strip().upper() if promo_code else None
+
+    def write(session):
+        reg = dict(new_reg)
+        line = _price(event, [{"ticket_type": reg["ticket_type"], "quantity": reg["quantity"]}], code, session)[0]
+        if client_price is not None and abs(client_price - line["price"]) > 0.01:
+            raise PriceChanged(line["price"])
+        is_free = line["price"] == 0
+        reg.update(price=line["price"], status="confirmed" if is_free else "pending",
+                   payment_status="paid" if is_free else "pending")
+        if code:
+            reg["promo_code"] = code
+        if not is_free:
+            # Unpaid reservations are released by `flask data expire-reservations` after this
+            reg["reservation_expires_at"] = reservation_expiry(reg["registered_at"])
+        reg["inventory_holds"] = reserve(event, reg["ticket_type"], reg["quantity"], session=session)
+        registration_id = str(mongo.db.registrations.insert_one(reg, session=session).inserted_id)
+        ticket_ids = []
+        if is_free:
+            ticket_ids = generate_tickets_for_registration(
+                registration_id=registration_id,
+                user_id=reg.get("user_id"),
+                event_id=reg.get("event_id"),
+                quantity=reg["quantity"],
+                ticket_type=reg["ticket_type"],
+                session=session
+            )
+        return reg, ticket_ids
+
+    return run_transaction(write)
+
+
+def _number(value):
+    try:
+        return max(float(value or 0), 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _ticket_configs(event):
+    # Events without ticket types sell free General tickets (as organizer_routes shows them)
+    return {str(t.get('name', 'General')): t for t in event.get('tickets') or []} or {"General": {"price": 0}}
+
+
+def _ticket_discount(config, code):
+    """A discount the organizer put on the ticket type itself (what the event page applies)"""
+    for discount in config.get('discounts') or []:
+        if code and str(discount.get('code', '')).strip().upper() == code:
+            return discount
+    return None
+
+
+def price_cart(event, items, promo_code=None, promo=None):
+    """
+    Price a cart server-side in one pass over the event's ticket types:
+    [{ticket_type, quantity, price}] with price per ticket after the
+    discount. Lines of the same type are merged. Raises CartError.
+    """
+    configs = _ticket_configs(event)
+    code = promo_code.strip().upper() if promo_code else None
+    quantities = {}
+    for item in items:
+        if not isinstance(item, dict):
+            raise CartError("Invalid cart item")
+        ticket_type = str(item.get('ticket_type') or 'General')
+        quantity = item.get('quantity', 1)
+        if ticket_type not in configs:
+            raise CartError(f"Unknown ticket type: {ticket_type}")
+        if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity < 1:
+            raise CartError("Quantity must be a positive integer")
+        quantities[ticket_type] = quantities.get(ticket_type, 0) + quantity
+
+    lines = []
+    for ticket_type, quantity in quantities.items():
+        config = configs[ticket_type]
+        limit = _number(config.get('limitPerOrder'))
+        if limit and quantity > limit:
+            raise CartError(f"At most {limit:g} {ticket_type} tickets per order")
+        price = _number(config.get('price'))
+        discount = _ticket_discount(config, code) or promo
+        if discount:
+            amount = _number(discount.get('amount'))
+            price -= price * amount / 100 if str(discount.get('type', '')).startswith('percent') else amount
+        lines.append({"ticket_type": ticket_type, "quantity": quantity, "price": round(max(price, 0), 2)})
+    return lines
+
+
+def _price(event, items, code, session):
+    """price_cart, redeeming code first when it is a promotions code rather than one on the ticket types"""
+    configs = _ticket_configs(event)
+    lines = price_cart(event, items, code)
+    # Codes on the ticket types themselves are not counted; promotions codes are
+    if code and not any(_ticket_discount(configs[line['ticket_type']], code) for line in lines):
+        lines = price_cart(event, items, code, redeem_promo(code, event, session))
+    return lines
+
+
+def place_order(event, buyer, items, promo_code=None, admission_position=None):
+    """
+    Cart checkout: price the items, redeem promo_code, take the seats of
+    every line and insert one registration per ticket type (sharing an
+    order_id), plus all their tickets if nothing is left to pay, in one
+    transaction with a fixed number of writes. buyer holds the fields every
+    registration gets (user_id, event_id, payment_method, guest details...).
+    Raises CartError, PromoError, SoldOut or BulkWriteError (admission_reused()
+    for a waiting room admission used twice); nothing is written then.
+    """
+    code = promo_code.strip().upper() if promo_code else None
+
+    def write(session):
+        lines = _price(event, items, code, session)
+        holds = reserve_many(event, {line['ticket_type']: line['quantity'] for line in lines}, session)
+
+        order_id = str(ObjectId())
+        now = datetime.utcnow()
+        total = round(sum(line['price'] * line['quantity'] for line in lines), 2)
+        is_free = total == 0
+        registrations = []
+        for line in lines:
+            reg = {**buyer, **line, "order_id": order_id, "registered_at": now,
+                   "status": "confirmed" if is_free else "pending",
+                   "payment_status": "paid" if is_free else "pending",
+                   "inventory_holds": holds[line['ticket_type']]}
+            if code:
+                reg["promo_code"] = code
+            if not is_free:
+                reg["reservation_expires_at"] = reservation_expiry(now)
+            registrations.append(reg)
+        if admission_position is not None:
+            # One admission per order; unique per event
+            registrations[0]["admission_position"] = admission_position
+        mongo.db.registrations.insert_many(registrations, session=session)
+        issued = issue_tickets(registrations, session) if is_free else {}
+
+        return {
+            "order_id": order_id,
+            "status": registrations[0]["status"],
+            "payment_status": registrations[0]["payment_status"],
+            "total": total,
+            "registrations": [{"id": str(reg['_id']), "ticket_type": reg['ticket_type'], "quantity": reg['quantity'],
+                               "price": reg['price'], "tickets": issued.get(str(reg['_id']), [])}
+                              for reg in registrations],
+        }
+
+    return run_transaction(write)
+
+
+def confirm_registrations(registration_ids, now):
+    """
+    Mark pending registrations (e.g. a cart order) paid and issue all their
+    tickets with one insert_many, in one transaction. Returns
+    {registration_id: ticket IDs}, including those already confirmed, or
+    None when a reservation expired or one is neither pending nor confirmed
+    (e.g. refunded: its seats are back on sale).
+    """
+    def confirm(session):
+        registrations = list(mongo.db.registrations.find(
+            {"_id": {"$in": registration_ids}},
+            {"status": 1, "payment_status": 1, "reservation_expires_at": 1, "user_id": 1, "event_id": 1,
+             "quantity": 1, "ticket_type": 1},
+            session=session
+        ))
+        pending = [reg for reg in registrations if reg.get('status') == 'pending']
+        if len(registrations) != len(registration_ids) or any(is_expired(reg, now) for reg in pending):
+            return None
+        if any(reg.get('status') not in ('pending', 'confirmed') for reg in registrations):
+            return None
+
+        issued = {}
+        if pending:
+            # A concurrent confirm changed these since they were read: write conflict, the transaction is retried
+            mongo.db.registrations.update_many(
+                {"_id": {"$in": [reg['_id'] for reg in pending]}, "status": "pending"},
+                {"$set": {"status": "confirmed", "payment_status": "paid", "paid_at": now},
+                 "$unset": {"reservation_expires_at": ""}},
+                session=session
+            )
+            issued = issue_tickets([{**reg, "user_id": str(reg.get('user_id')), "event_id": str(reg.get('event_id'))}
+                                    for reg in pending], session)
+        confirmed = [str(reg['_id']) for reg in registrations if reg.get('status') == 'confirmed']
+        if confirmed:
+            issued.update({registration_id: [] for registration_id in confirmed})
+            for ticket in mongo.db.tickets.find({"registration_id": {"$in": confirmed}}, {"registration_id": 1},
+                                                session=session).sort([("registration_id", 1), ("seq", 1)]):
+                issued[ticket['registration_id']].append(str(ticket['_id']))
+        return issued
+
+    return run_transaction(confirm)
+
+
+def confirm_payment(reg, now):
+    """
+    Mark a pending registration paid and issue its tickets in one
+    transaction. Returns the ticket IDs (the existing ones if a concurrent
+    call confirmed it first), or None when the reservation expired or the
+    registration is no longer pending.
+    """
+    issued = confirm_registrations([reg['_id']], now)
+    return None if issued is None else issued[str(reg['_id'])]
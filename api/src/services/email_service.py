@@ -1,14 +1,19 @@
 
-import resend
+import logging
 from src.config import Config
+from src.utils.metrics import EMAILS_SENT
+
+logger = logging.getLogger(__name__)
 
 class EmailService:
     @staticmethod
     def send_email(to_email, subject, body):
+        # Imported on first use: the SDK pulls in requests and adds ~70 ms to every worker boot
+        import resend
         resend.api_key = Config.RESEND_SMTP_PASS # The password field usually holds the API key for Resend
 
         try:
-            print(f"Attempting to send email to {to_email} via Resend SDK...")
+            logger.debug("Attempting to send email to %s via Resend SDK...", to_email)
             
             # Try primary domain first
             sender = "Eventify <noreply@eventify.fun>"
@@ -20,18 +25,16 @@ class EmailService:
                 "html": body,
             }
 
-            # Development logging
-            print("\n" + "="*50)
-            print(f"EMAIL TO: {to_email}")
-            print(f"SUBJECT: {subject}")
-            print(f"BODY:\n{body}")
-            print("="*50 + "\n")
+            # Development logging (LOG_LEVEL=DEBUG)
+            logger.debug("EMAIL TO: %s\nSUBJECT: %s\nBODY:\n%s", to_email, subject, body)
 
             email = resend.Emails.send(params)
-            print(f"Email sent successfully: {email}")
+            logger.info("Email sent successfully: %s", email)
+            EMAILS_SENT.labels('sent').inc()
             return True
         except Exception as e:
-            print(f"Failed to send email to {to_email}: {str(e)}")
+            logger.warning("Failed to send email to %s: %s", to_email, e)
+            EMAILS_SENT.labels('failed').inc()
             # Fallback/Retry logic could go here if we wanted to try another domain
             # But let's stick to the requested one.
             return False
@@ -0,0 +1,235 @@
+"""
+Payment webhooks (bKash, Nagad, card).
+
+The webhook endpoint (src/routes/payment_routes.py) only verifies the
+signature and appends the raw event to `payment_events`; a unique
+(provider, provider_event_id) index turns provider retries into no-ops.
+`flask --app app data process-payments --follow` (a worker) then applies
+pending events in batches, each batch in one transaction with a fixed
+number of writes:
+
+- payment.succeeded  confirm the referenced registrations and issue their tickets
+- payment.failed     release pending registrations and their seats right away
+- payment.refunded   mark them refunded, cancel their tickets, give the seats back
+
+Events that can't be applied (no such order, wrong amount, a reservation
+already released) stay `needs_attention`, with refund_due when money was
+taken: `flask --app app data payment-events` lists, retries or resolves them.
+
+A burst of webhooks at sale time is then a burst of small inserts, and
+confirmations run at the worker's pace instead of competing with buyers.
+
+Every provider's gateway adapter posts the same signed envelope:
+
+    X-Eventify-Signature: t=<unix time>,v1=<hex HMAC-SHA256(secret, "<t>.<body>")>
+    {"id": "evt_1", "type": "payment.succeeded",
+     "data": {"reference": "<order_id or registration id>", "amount": 1400, "transaction_id": "..."}}
+
+`python simulate_payment_webhooks.py` sends such events to a local API.
+"""
+import hashlib
+import hmac
+import json
+import logging
+import time
+from collections import Counter
+from datetime import datetime
+from bson.objectid import ObjectId
+from pymongo import DeleteMany, UpdateMany, UpdateOne
+from src.database import mongo
+from src.services.checkout_service import run_transaction
+from src.utils.inventory import INVENTORY_COLLECTION, release_ops
+from src.utils.ticket_utils import issue_tickets
+
+logger = logging.getLogger(__name__)
+
+EVENTS_COLLECTION = 'payment_events'
+PROVIDERS = ('bkash', 'nagad', 'card')
+SIGNATURE_HEADER = 'X-Eventify-Signature'
+EVENT_TYPES = ('payment.succeeded', 'payment.failed', 'payment.refunded')
+# Outcomes a person has to look at (`flask data payment-events`); a payment behind one is due for a refund
+ATTENTION_OUTCOMES = ('unknown_reference', 'amount_mismatch', 'not_payable')
+
+
+def sign(secret, body, timestamp=None):
+    """The signature header value for a webhook body (bytes)"""
+    timestamp = int(timestamp if timestamp is not None else time.time())
+    digest = hmac.new(secret.encode(), f"{timestamp}.".encode() + body, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={digest}"
+
+
+def verify_signature(secret, body, header, tolerance):
+    """True when header signs body with secret, less than `tolerance` seconds ago (so it can't be replayed later)"""
+    try:
+        parts = dict(part.split('=', 1) for part in (header or '').split(','))
+        timestamp = int(parts['t'])
+    except (KeyError, ValueError):
+        return False
+    if abs(time.time() - timestamp) > tolerance:
+        return False
+    return hmac.compare_digest(sign(secret, body, timestamp), f"t={timestamp},v1={parts.get('v1', '')}")
+
+
+def parse_event(provider, body):
+    """The payment_events document for a verified webhook body; raises ValueError"""
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise ValueError("Body is not JSON")
+    data = payload.get('data') if isinstance(payload, dict) else None
+    if not isinstance(data, dict) or not payload.get('id') or not data.get('reference'):
+        raise ValueError("Expected {id, type, data: {reference, ...}}")
+    amount = data.get('amount')
+    if amount is not None and not isinstance(amount, (int, float)):
+        raise ValueError("amount must be a number")
+    return {
+        "provider": provider,
+        "provider_event_id": str(payload['id']),
+        "type": str(payload.get('type')),
+        "reference": str(data['reference']),
+        "amount": amount,
+        "transaction_id": data.get('transaction_id'),
+        "payload": payload,
+        "received_at": datetime.utcnow(),
+        "status": "pending",
+    }
+
+
+def record_event(event):
+    """Append an event; raises DuplicateKeyError when the provider already sent it"""
+    mongo.db[EVENTS_COLLECTION].insert_one(event)
+
+
+def _references(events, session):
+    """{reference: [registrations]}, a reference being an order_id or a registration _id"""
+    references = {event['reference'] for event in events}
+    registrations = mongo.db.registrations.find(
+        {"$or": [{"order_id": {"$in": list(references)}},
+                 {"_id": {"$in": [ObjectId(ref) for ref in references if ObjectId.is_valid(ref)]}}]},
+        {"order_id": 1, "status": 1, "payment_status": 1, "user_id": 1, "event_id": 1, "ticket_type": 1,
+         "quantity": 1, "price": 1, "inventory_holds": 1},
+        session=session
+    )
+    by_reference = {}
+    for reg in registrations:
+        for reference in (reg.get('order_id'), str(reg['_id'])):
+            if reference in references:
+                by_reference.setdefault(reference, []).append(reg)
+    return by_reference
+
+
+def _apply(event, registrations, changes, now):
+    """Apply one event to the in-memory registrations; returns its outcome"""
+    if not registrations:
+        return 'unknown_reference'
+    if event['type'] == 'payment.succeeded':
+        pending = [reg for reg in registrations if reg.get('status') == 'pending']
+        if not pending:
+            # Paid for a reservation that was released or refunded in the meantime
+            confirmed = any(reg.get('status') == 'confirmed' for reg in registrations)
+            return 'already_confirmed' if confirmed else 'not_payable'
+        # What this payment is for: lines already confirmed or released are not in it
+        expected = sum(float(reg.get('price') or 0) * reg.get('quantity', 1) for reg in pending)
+        if event['amount'] is not None and abs(event['amount'] - expected) > 0.01:
+            return 'amount_mismatch'
+        for reg in pending:
+            # The registration still exists, so its seats are still held, even past its expiry
+            reg.update(status='confirmed', payment_status='paid', paid_at=now, payment_provider=event['provider'],
+                       payment_transaction_id=event['transaction_id'])
+            changes[reg['_id']] = 'confirmed'
+        return 'confirmed'
+    if event['type'] == 'payment.failed':
+        pending = [reg for reg in registrations if reg.get('status') == 'pending']
+        for reg in pending:
+            reg.update(status='released')
+            changes[reg['_id']] = 'released'
+        return 'released' if pending else 'ignored'
+    if event['type'] == 'payment.refunded':
+        paid = [reg for reg in registrations if reg.get('status') == 'confirmed']
+        for reg in paid:
+            reg.update(status='refunded', payment_status='refunded', refunded_at=now)
+            # Confirmed earlier in this batch: its tickets were never issued
+            changes[reg['_id']] = 'refunded' if changes.get(reg['_id']) != 'confirmed' else 'refunded_unissued'
+        return 'refunded' if paid else 'ignored'
+    return 'ignored'
+
+
+def process_batch(limit=500):
+    """Apply up to `limit` pending events (oldest first) in one transaction; returns Counter({outcome: n})"""
+    def process(session):
+        events = list(mongo.db[EVENTS_COLLECTION].find({"status": "pending"}, session=session)
+                      .sort("_id", 1).limit(limit))
+        if not events:
+            return Counter()
+        now = datetime.utcnow()
+        by_reference = _references(events, session)
+        registrations = {reg['_id']: reg for regs in by_reference.values() for reg in regs}
+        changes = {}
+        outcomes = {}
+        for event in events:
+            regs = [registrations[reg['_id']] for reg in by_reference.get(event['reference'], [])]
+            outcomes[event['_id']] = _apply(event, regs, changes, now)
+
+        confirmed = [registrations[reg_id] for reg_id, change in changes.items() if change == 'confirmed']
+        released = [registrations[reg_id] for reg_id, change in changes.items() if change == 'released']
+        refunded = [registrations[reg_id] for reg_id, change in changes.items() if change.startswith('refunded')]
+
+        reg_ops = [UpdateOne({"_id": reg['_id']},
+                             {"$set": {field: reg.get(field) for field in
+                                       ('status', 'payment_status', 'paid_at', 'payment_provider',
+                                        'payment_transaction_id', 'refunded_at') if field in reg},
+                              "$unset": {"reservation_expires_at": ""}})
+                   for reg in confirmed + refunded]
+        if released:
+            reg_ops.append(DeleteMany({"_id": {"$in": [reg['_id'] for reg in released]}}))
+        if reg_ops:
+            mongo.db.registrations.bulk_write(reg_ops, ordered=False, session=session)
+        if confirmed:
+            issue_tickets([{**reg, "user_id": str(reg.get('user_id')), "event_id": str(reg.get('event_id'))}
+                           for reg in confirmed], session)
+        if refunded:
+            mongo.db.tickets.update_many({"registration_id": {"$in": [str(reg['_id']) for reg in refunded]}},
+                                         {"$set": {"status": "cancelled"}}, session=session)
+        seats = release_ops([hold for reg in released + refunded for hold in reg.get('inventory_holds') or []])
+        if seats:
+            mongo.db[INVENTORY_COLLECTION].bulk_write(seats, ordered=False, session=session)
+
+        event_ops = [UpdateMany({"_id": {"$in": [event_id for event_id, o in outcomes.items() if o == outcome]}},
+                                {"$set": {"status": "processed", "outcome": outcome, "processed_at": now}})
+                     for outcome in set(outcomes.values()) - set(ATTENTION_OUTCOMES)]
+        # Not closed: e.g. a payment for a reservation expire-reservations already swept, the buyer has no tickets
+        event_ops += [UpdateOne({"_id": event['_id']},
+                                {"$set": {"status": "needs_attention", "needs_attention": True,
+                                          "outcome": outcomes[event['_id']], "processed_at": now,
+                                          "refund_due": event['type'] == 'payment.succeeded'}})
+                      for event in events if outcomes[event['_id']] in ATTENTION_OUTCOMES]
+        mongo.db[EVENTS_COLLECTION].bulk_write(event_ops, ordered=False, session=session)
+        return Counter(outcomes.values())
+
+    outcomes = run_transaction(process)
+    for outcome in ATTENTION_OUTCOMES:
+        if outcomes.get(outcome):
+            logger.warning("%s payment events need attention: %s", outcomes[outcome], outcome)
+    return outcomes
+
+
+def attention_events(limit=100):
+    """Events left for a person (see ATTENTION_OUTCOMES), oldest first"""
+    return list(mongo.db[EVENTS_COLLECTION].find({"needs_attention": True}, {"payload": 0}).sort("_id", 1).limit(limit))
+
+
+def retry_events(event_ids):
+    """Put needs_attention events back in the queue (e.g. after fixing the order they reference)"""
+    return mongo.db[EVENTS_COLLECTION].update_many(
+        {"_id": {"$in": event_ids}, "needs_attention": True},
+        {"$set": {"status": "pending"}, "$unset": {"needs_attention": "", "outcome": "", "refund_due": ""}}
+    ).modified_count
+
+
+def resolve_events(event_ids, note):
+    """Close needs_attention events handled by hand (e.g. refunded through the provider)"""
+    return mongo.db[EVENTS_COLLECTION].update_many(
+        {"_id": {"$in": event_ids}, "needs_attention": True},
+        {"$set": {"status": "resolved", "resolution": note, "resolved_at": datetime.utcnow()},
+         "$unset": {"needs_attention": ""}}
+    ).modified_count
@@ -0,0 +1,252 @@
+"""
+Media storage backends.
+
+Uploads used to be written straight into the local `uploads/` folder of
+whichever instance handled the request. Everything now goes through a
+storage backend so several API nodes can share the same media:
+
+- LocalStorage: files on disk under Config.UPLOAD_FOLDER (development / single node)
+- S3Storage: any S3-compatible bucket (AWS S3, Cloudflare R2, local MinIO)
+
+Keys are always relative paths like "events/foo_1a2b3c4d.webp". The public
+URL stored on documents is produced by `url_for(key)`.
+"""
+import hashlib
+import hmac
+import os
+import time
+from src.config import Config
+
+
+class LocalStorage:
+    name = 'local'
+
+    def __init__(self, root, secret_key=None):
+        self.root = root
+        # Without a secret anyone could sign upload URLs, so direct uploads are refused instead
+        self.secret_key = secret_key
+
+    def _path(self, key):
+        # Refuse anything that would escape the uploads root
+        path = os.path.normpath(os.path.join(self.root, key))
+        if not path.startswith(os.path.normpath(self.root) + os.sep):
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+    def save(self, key, data, content_type=None):
+        """Write bytes under key and return the public URL"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file first so readers never see a half-written image
+        tmp_path = f"{path}.part"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return self.url_for(key)
+
+    def read(self, key):
+        with open(self._path(key), 'rb') as f:
+            return f.read()
+
+    def exists(self, key):
+        return os.path.isfile(self._path(key))
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def delete_many(self, keys):
+        """Delete several keys, returns how many were removed"""
+        return sum(1 for key in keys if self.delete(key))
+
+    def list(self, prefix=''):
+        """Yield (key, size, modified_timestamp) for every object under prefix"""
+        base = self.root
+        for dirpath, _, filenames in os.walk(base):
+            for filename in filenames:
+                full_path = os.path.join(dirpath, filename)
+                key = os.path.relpath(full_path, base).replace(os.sep, '/')
+                if not key.startswith(prefix):
+                    continue
+                try:
+                    stat = os.stat(full_path)
+                except FileNotFoundError:
+                    continue
+                yield key, stat.st_size, stat.st_mtime
+
+    def url_for(self, key):
+        return f"/uploads/{key}"
+
+    def key_from_url(self, url):
+        """Inverse of url_for; returns None for URLs that aren't ours"""
+        return _key_from_upload_path(url)
+
+    def local_path(self, key):
+        """Path on disk, used by the /uploads route to stream the file"""
+        return self._path(key)
+
+    # --- Direct uploads ---
+    # The local backend has no presigning service, so the API signs a short
+    # lived URL pointing at its own PUT endpoint instead.
+
+    def _signature(self, key, expires):
+        if not self.secret_key:
+            raise RuntimeError("Direct uploads need JWT_SECRET to sign upload URLs")
+        message = f"{key}:{expires}".encode('utf-8')
+        return hmac.new(self.secret_key.encode('utf-8'), message, hashlib.sha256).hexdigest()
+
+    def presign_upload(self, key, content_type, expires_in=900):
+        expires = int(time.time()) + expires_in
+        signature = self._signature(key, expires)
+        return {
+            "url": f"/api/upload/direct/{key}?expires={expires}&signature={signature}",
+            "method": "PUT",
+            "headers": {"Content-Type": content_type},
+            "key": key,
+            "expires_at": expires
+        }
+
+    def verify_upload_signature(self, key, expires, signature):
+        try:
+            expires = int(expires)
+        except (TypeError, ValueError):
+            return False
+        if expires < time.time() or not self.secret_key:
+            return False
+        return hmac.compare_digest(self._signature(key, expires), signature or '')
+
+
+class S3Storage:
+    name = 's3'
+
+    def __init__(self, bucket, endpoint_url=None, region=None,
+                 access_key=None, secret_key=None, public_url=None):
+        # boto3 is only needed when the S3 backend is selected
+        try:
+            import boto3
+            from botocore.config import Config as BotoConfig
+        except ImportError:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires boto3 (pip install boto3)")
+
+        self.bucket = bucket
+        self.public_url = public_url.rstrip('/') if public_url else None
+        self.client = boto3.client(
+            's3',
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key,
+            # MinIO and most S3-compatible services need path-style addressing
+            config=BotoConfig(signature_version='s3v4', s3={'addressing_style': 'path'})
+        )
+
+    def save(self, key, data, content_type=None):
+        extra = {"ContentType": content_type} if content_type else {}
+        # Every key is written once (new uploads and avatars get new names), so it can be cached forever
+        extra["CacheControl"] = "public, max-age=31536000, immutable"
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=data, **extra)
+        return self.url_for(key)
+
+    def read(self, key):
+        response = self.client.get_object(Bucket=self.bucket, Key=key)
+        return response['Body'].read()
+
+    def exists(self, key):
+        from botocore.exceptions import ClientError
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except ClientError:
+            return False
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+        return True
+
+    def delete_many(self, keys):
+        keys = list(keys)
+        deleted = 0
+        # DeleteObjects accepts at most 1000 keys per call
+        for i in range(0, len(keys), 1000):
+            chunk = keys[i:i + 1000]
+            response = self.client.delete_objects(
+                Bucket=self.bucket,
+                Delete={"Objects": [{"Key": k} for k in chunk], "Quiet": True}
+            )
+            deleted += len(chunk) - len(response.get('Errors', []))
+        return deleted
+
+    def list(self, prefix=''):
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            for obj in page.get('Contents', []):
+                yield obj['Key'], obj['Size'], obj['LastModified'].timestamp()
+
+    def url_for(self, key):
+        # Without a public bucket URL, /uploads/<key> redirects to a signed GET
+        if self.public_url:
+            return f"{self.public_url}/{key}"
+        return f"/uploads/{key}"
+
+    def key_from_url(self, url):
+        if self.public_url and url and url.startswith(self.public_url + '/'):
+            return url[len(self.public_url) + 1:].split('?', 1)[0] or None
+        return _key_from_upload_path(url)
+
+    def presigned_get_url(self, key, expires_in=3600):
+        return self.client.generate_presigned_url(
+            'get_object',
+            Params={"Bucket": self.bucket, "Key": key},
+            ExpiresIn=expires_in
+        )
+
+    def presign_upload(self, key, content_type, expires_in=900):
+        url = self.client.generate_presigned_url(
+            'put_object',
+            Params={"Bucket": self.bucket, "Key": key, "ContentType": content_type},
+            ExpiresIn=expires_in
+        )
+        return {
+            "url": url,
+            "method": "PUT",
+            "headers": {"Content-Type": content_type},
+            "key": key,
+            "expires_at": int(time.time()) + expires_in
+        }
+
+
+def _key_from_upload_path(url):
+    # Stored references come in a few shapes: "/uploads/events/x.webp",
+    # "uploads/events/x.webp?v=123" or an absolute URL to this API
+    if not url or not isinstance(url, str):
+        return None
+    path = url.split('?', 1)[0].split('#', 1)[0]
+    if '://' in path:
+        path = '/' + path.split('://', 1)[1].split('/', 1)[-1]
+    path = path.lstrip('/')
+    if not path.startswith('uploads/'):
+        return None
+    return path[len('uploads/'):] or None
+
+
+_storage = None
+
+def get_storage():
+    """Return the configured storage backend (created once per process)"""
+    global _storage
+    if _storage is None:
+        if Config.STORAGE_BACKEND == 's3':
+            _storage = S3Storage(
+                bucket=Config.S3_BUCKET,
+                endpoint_url=Config.S3_ENDPOINT_URL,
+                region=Config.S3_REGION,
+                access_key=Config.S3_ACCESS_KEY,
+                secret_key=Config.S3_SECRET_KEY,
+                public_url=Config.S3_PUBLIC_URL
+            )
+        else:
+            _storage = LocalStorage(Config.UPLOAD_FOLDER, secret_key=Config.SECRET_KEY)
+    return _storage
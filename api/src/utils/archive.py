@@ -0,0 +1,72 @@
+"""
+Hot/cold storage for registrations and tickets.
+
+`flask --app app data archive-past-events` moves the registrations (and
+their tickets) of events that ended a while ago into `registrations_archive`
+and `tickets_archive`, so the hot collections - and their indexes - only
+hold what live traffic touches.
+
+Views that show history (my registrations/tickets, organizer attendees,
+transactions and revenue totals) read through the helpers below, which
+query the hot collection and its archive. Checkout, payment and gate scans
+only ever deal with current events and keep using mongo.db directly.
+"""
+from datetime import datetime
+from src.database import mongo, docs_by_id
+
+ARCHIVED_COLLECTIONS = {
+    'registrations': 'registrations_archive',
+    'tickets': 'tickets_archive',
+}
+
+
+def archive_of(name):
+    return ARCHIVED_COLLECTIONS[name]
+
+
+def find_with_archive(name, query, projection=None, sort=None, limit=0):
+    """
+    find() over a collection and its archive, as one list. With sort/limit
+    each side is sorted and limited by the server, then merged here.
+    """
+    docs = []
+    for collection in (mongo.db[name], mongo.db[archive_of(name)]):
+        cursor = collection.find(query, projection)
+        if sort:
+            cursor = cursor.sort(sort)
+        if limit:
+            cursor = cursor.limit(limit)
+        docs.extend(cursor)
+    for field, direction in reversed(sort or []):
+        # (present, value) keeps documents without the field from being compared to ones with it
+        docs.sort(key=lambda doc: (doc.get(field) is not None, doc.get(field) or 0), reverse=direction < 0)
+    return docs[:limit] if limit else docs
+
+
+def find_one_with_archive(name, query, projection=None):
+    return mongo.db[name].find_one(query, projection) or mongo.db[archive_of(name)].find_one(query, projection)
+
+
+def docs_by_id_with_archive(name, ids, projection=None):
+    """docs_by_id that falls back to the archive for the ids not found in the hot collection"""
+    ids = [value for value in ids if value is not None]
+    docs = docs_by_id(mongo.db[name], ids, projection)
+    missing = [value for value in ids if str(value) not in docs]
+    if missing:
+        docs.update(docs_by_id(mongo.db[archive_of(name)], missing, projection))
+    return docs
+
+
+def _event_end(event):
+    end = event.get('end_date') or event.get('start_date') or event.get('date') or event.get('target_date')
+    if isinstance(end, datetime):
+        return end.strftime('%Y-%m-%d')
+    return str(end)[:10] if end else None
+
+
+def ended_event_ids(cutoff):
+    """ids (as strings) of events whose end date, or start date, is before cutoff"""
+    day = cutoff.strftime('%Y-%m-%d')
+    projection = {"end_date": 1, "start_date": 1, "date": 1, "target_date": 1}
+    return [str(event['_id']) for event in mongo.db.events.find({}, projection)
+            if _event_end(event) and _event_end(event) < day]
@@ -0,0 +1,147 @@
+"""
+Batched maintenance jobs.
+
+A job streams documents from a server-side cursor in _id order, hands them
+to a handler one chunk at a time and writes whatever operations the
+handler returns with unordered bulk_write calls, instead of one
+update_one/delete_one round trip per document.
+
+    run_batched('fix-user-names', find_source(mongo.db.users, query, projection), handler)
+
+- handler(docs) gets a list of up to chunk_size documents and returns
+  (collection_name, pymongo write op) pairs. Looking related documents up
+  for the whole chunk at once (src.database.docs_by_id) keeps jobs free of
+  per-document queries.
+- dry_run counts the operations without sending them.
+- After every chunk is written, the last _id is saved in
+  `maintenance_checkpoints`, so an interrupted job continues where it
+  stopped with resume=True. The checkpoint is removed when the job finishes.
+- transactional=True writes each chunk, and its checkpoint, in one
+  transaction (replica set / Atlas only): jobs that move documents between
+  collections never leave a chunk half copied. The handler is then called
+  as handler(docs, session) inside the transaction, so what it reads
+  (with session=session) is what gets written; on a write conflict the
+  whole chunk, handler included, is retried.
+"""
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+import click
+from pymongo.errors import BulkWriteError
+from src.database import mongo
+
+CHECKPOINTS_COLLECTION = 'maintenance_checkpoints'
+
+# bulk_write result fields, reported as e.g. "modified 10, deleted 3"
+_RESULT_FIELDS = (('nInserted', 'inserted'), ('nMatched', 'matched'), ('nModified', 'modified'),
+                  ('nRemoved', 'deleted'), ('nUpserted', 'upserted'))
+
+
+def find_source(collection, query=None, projection=None, batch_size=1000):
+    """Source for run_batched: a find() in _id order, restartable after a given _id"""
+    def source(after):
+        filters = dict(query or {})
+        if after is not None:
+            filters = {"$and": [filters, {"_id": {"$gt": after}}]} if filters else {"_id": {"$gt": after}}
+        return collection.find(filters, projection, batch_size=batch_size).sort('_id', 1)
+    return source
+
+
+def load_checkpoint(name):
+    doc = mongo.db[CHECKPOINTS_COLLECTION].find_one({"_id": name})
+    return doc.get('after') if doc else None
+
+
+def save_checkpoint(name, after, stats, session=None):
+    mongo.db[CHECKPOINTS_COLLECTION].update_one(
+        {"_id": name},
+        {"$set": {"after": after, "scanned": stats['scanned'], "updated_at": datetime.utcnow()}},
+        upsert=True, session=session
+    )
+
+
+def clear_checkpoint(name):
+    mongo.db[CHECKPOINTS_COLLECTION].delete_one({"_id": name})
+
+
+def _write(collection, ops, chunk_size, session=None):
+    """Returns the bulk_write results; inside a transaction a write error aborts it instead"""
+    results = []
+    for i in range(0, len(ops), chunk_size):
+        try:
+            results.append(mongo.db[collection].bulk_write(ops[i:i + chunk_size], ordered=False,
+                                                           session=session).bulk_api_result)
+        except BulkWriteError as e:
+            if session is not None:
+                raise
+            # Unordered: everything but the failed operations went through
+            results.append(e.details)
+    return results
+
+
+def run_batched(name, source, handler, chunk_size=1000, dry_run=False, resume=False, progress_every=2.0,
+                transactional=False):
+    """
+    Run a job to completion and return its stats (a Counter).
+    source(after) must yield documents in ascending _id order; `after` is
+    None or the _id to continue after.
+    """
+    after = load_checkpoint(name) if resume else None
+    if after is not None:
+        click.echo(f"{name}: resuming after {after}")
+    elif not dry_run:
+        clear_checkpoint(name)
+
+    stats = Counter(scanned=0, ops=0)
+    started = last_report = time.perf_counter()
+
+    def flush(chunk):
+        def commit(session=None):
+            writes = defaultdict(list)
+            for collection, op in (handler(chunk, session) if transactional else handler(chunk)) or ():
+                writes[collection].append(op)
+            if dry_run:
+                return writes, []
+            results = [result for collection, ops in writes.items()
+                       for result in _write(collection, ops, chunk_size, session)]
+            save_checkpoint(name, chunk[-1]['_id'], stats, session)
+            return writes, results
+
+        if transactional and not dry_run:
+            with mongo.cx.start_session() as session:
+                # Retried as a whole on transient errors, so stats are only tallied once it commits
+                writes, results = session.with_transaction(commit)
+        else:
+            writes, results = commit()
+        for ops in writes.values():
+            stats['ops'] += len(ops)
+            if dry_run:
+                stats.update(f"would {type(op).__name__}" for op in ops)
+        for result in results:
+            stats['errors'] += len(result.get('writeErrors', []))
+            for field, label in _RESULT_FIELDS:
+                stats[label] += result.get(field, 0)
+
+    chunk = []
+    for doc in source(after):
+        chunk.append(doc)
+        stats['scanned'] += 1
+        if len(chunk) >= chunk_size:
+            flush(chunk)
+            chunk = []
+            now = time.perf_counter()
+            if now - last_report >= progress_every:
+                last_report = now
+                click.echo(f"  {name}: {stats['scanned']:,} scanned, {stats['ops']:,} writes, "
+                           f"{stats['scanned'] / (now - started):,.0f} docs/s")
+    if chunk:
+        flush(chunk)
+    if not dry_run:
+        clear_checkpoint(name)
+
+    elapsed = time.perf_counter() - started
+    details = ', '.join(f"{key} {value:,}" for key, value in stats.items() if key not in ('scanned', 'ops') and value)
+    click.echo(f"{name}{' (dry run)' if dry_run else ''}: {stats['scanned']:,} scanned, {stats['ops']:,} writes"
+               f"{' (' + details + ')' if details else ''} in {elapsed:.1f}s "
+               f"({stats['scanned'] / max(elapsed, 1e-9):,.0f} docs/s)")
+    return stats
@@ -0,0 +1,84 @@
+"""
+Negotiated response compression.
+
+JSON (and other text) responses above COMPRESS_MIN_SIZE bytes are
+compressed with brotli or gzip, whichever the client prefers in
+Accept-Encoding. Levels are kept low (gzip 5, brotli 4): past that the
+payload barely shrinks while CPU time per response keeps climbing.
+
+Files under /uploads are never touched - WebP images are already
+compressed and are streamed from disk.
+"""
+import gzip
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/html', 'text/plain', 'text/css', 'text/csv',
+                          'application/javascript'}
+
+
+def parse_accept_encoding(header):
+    """'gzip;q=0.8, br' -> {'gzip': 0.8, 'br': 1.0}"""
+    encodings = {}
+    for part in (header or '').split(','):
+        name, _, params = part.strip().partition(';')
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        encodings[name.strip().lower()] = q
+    return encodings
+
+
+def choose_encoding(header):
+    accepted = parse_accept_encoding(header)
+    candidates = (['br'] if brotli is not None else []) + ['gzip']
+    best = None
+    for name in candidates:
+        q = accepted.get(name, accepted.get('*', 0))
+        # On a tie keep the earlier candidate (brotli compresses JSON better)
+        if q > 0 and (best is None or q > best[1]):
+            best = (name, q)
+    return best[0] if best else None
+
+
+def compress(data, encoding, gzip_level=5, br_level=4):
+    if encoding == 'br':
+        return brotli.compress(data, quality=br_level, mode=brotli.MODE_TEXT)
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+
+def init_compression(app):
+    min_size = app.config.get('COMPRESS_MIN_SIZE', 1024)
+    gzip_level = app.config.get('COMPRESS_GZIP_LEVEL', 5)
+    br_level = app.config.get('COMPRESS_BR_LEVEL', 4)
+
+    @app.after_request
+    def compress_response(response):
+        if response.status_code < 200 or response.status_code in (204, 304):
+            return response
+        # Streamed files (send_from_directory) and anything already encoded
+        if response.direct_passthrough or response.is_streamed or 'Content-Encoding' in response.headers:
+            return response
+        if request.path.startswith('/uploads/') or response.mimetype not in COMPRESSIBLE_MIMETYPES:
+            return response
+
+        response.vary.add('Accept-Encoding')
+        if (response.content_length or 0) < min_size:
+            return response
+        encoding = choose_encoding(request.headers.get('Accept-Encoding'))
+        if encoding is None:
+            return response
+
+        response.set_data(compress(response.get_data(), encoding, gzip_level, br_level))
+        response.headers['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,97 @@
+"""
+Idempotency-Key support for POST endpoints that must not run twice.
+
+    @registration_bp.route('', methods=['POST'])
+    @idempotent
+    def create_registration(): ...
+
+A request with an `Idempotency-Key` header first claims the key by
+inserting it into `idempotency_keys` (_id = method + path + caller + key,
+so the unique _id index rejects concurrent duplicates). The caller is a
+hash of the Authorization header, so one buyer can't replay another's
+response by guessing their key. When the view returns,
+its response is stored on the key, and a retry with the same key gets that
+response back, with `Idempotent-Replayed: true`, without running the view.
+
+- A duplicate arriving while the first request is still running gets a
+  409 and should retry shortly.
+- Reusing a key with a different body is a 422.
+- 5xx responses and exceptions release the key, so the retry runs again.
+- Keys expire after IDEMPOTENCY_TTL_HOURS (TTL index, migration 7). A key
+  whose request died mid-way can be claimed again after
+  IDEMPOTENCY_LOCK_SECONDS.
+
+Requests without the header behave exactly as before.
+"""
+import functools
+import hashlib
+from datetime import datetime, timedelta
+from flask import current_app, jsonify, make_response, request
+from pymongo.errors import DuplicateKeyError
+from src.database import mongo
+
+KEYS_COLLECTION = 'idempotency_keys'
+HEADER = 'Idempotency-Key'
+
+
+def _claim(key_id, body_hash, now):
+    keys = mongo.db[KEYS_COLLECTION]
+    doc = {"_id": key_id, "status": "processing", "request_hash": body_hash, "locked_at": now,
+           "expires_at": now + timedelta(hours=current_app.config.get('IDEMPOTENCY_TTL_HOURS', 24))}
+    try:
+        keys.insert_one(doc)
+        return None
+    except DuplicateKeyError:
+        pass
+    # Take over a key whose request never finished (worker killed mid-request)
+    stale = now - timedelta(seconds=current_app.config.get('IDEMPOTENCY_LOCK_SECONDS', 60))
+    if keys.find_one_and_update({"_id": key_id, "status": "processing", "request_hash": body_hash,
+                                 "locked_at": {"$lt": stale}}, {"$set": {"locked_at": now}}):
+        return None
+    return keys.find_one({"_id": key_id}) or {"status": "processing", "request_hash": body_hash}
+
+
+def _replay(existing, body_hash):
+    if existing.get('request_hash') != body_hash:
+        return jsonify({"message": f"{HEADER} was already used for a different request"}), 422
+    if existing.get('status') != 'completed':
+        response = make_response(jsonify({"message": "A request with this Idempotency-Key is in progress"}), 409)
+        response.headers['Retry-After'] = '1'
+        return response
+    response = make_response(existing['body'], existing['status_code'])
+    response.mimetype = existing.get('mimetype') or 'application/json'
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(view):
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return view(*args, **kwargs)
+        if len(key) > 255:
+            return jsonify({"message": f"{HEADER} is too long"}), 400
+
+        caller = hashlib.sha256(request.headers.get('Authorization', '').encode()).hexdigest()[:16]
+        key_id = f"{request.method} {request.path} {caller} {key}"
+        body_hash = hashlib.sha256(request.get_data()).hexdigest()
+        existing = _claim(key_id, body_hash, datetime.utcnow())
+        if existing is not None:
+            return _replay(existing, body_hash)
+
+        keys = mongo.db[KEYS_COLLECTION]
+        try:
+            response = make_response(view(*args, **kwargs))
+        except Exception:
+            keys.delete_one({"_id": key_id})
+            raise
+        if response.status_code >= 500:
+            keys.delete_one({"_id": key_id})
+            return response
+        keys.update_one({"_id": key_id}, {"$set": {
+            "status": "completed", "status_code": response.status_code,
+            "body": response.get_data(as_text=True), "mimetype": response.mimetype
+        }})
+        return response
+    return wrapper
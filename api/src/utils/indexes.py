@@ -1,21 +1,131 @@
 
+import logging
 from datetime import datetime
 from src.database import mongo
 import pymongo
 
-def create_indexes():
+logger = logging.getLogger(__name__)
+
+def create_indexes(db=None):
+    db = db if db is not None else mongo.db
     # User indexes
-    mongo.db.users.create_index("email", unique=True)
-    mongo.db.users.create_index("verification_token", unique=True, sparse=True)
+    db.users.create_index("email", unique=True)
+    db.users.create_index("verification_token", unique=True, sparse=True)
     
     # TTL Index for unverified users (7 days)
     # Using 'verification_expires_at' which is set 7 days in future.
     # expireAfterSeconds=0 means it expires at the specific time in the field.
-    mongo.db.users.create_index("verification_expires_at", expireAfterSeconds=0)
+    db.users.create_index("verification_expires_at", expireAfterSeconds=0)
 
     # Password Reset indexes
-    mongo.db.password_resets.create_index("token", unique=True)
+    db.password_resets.create_index("token", unique=True)
     # TTL for password resets
-    mongo.db.password_resets.create_index("expires_at", expireAfterSeconds=0)
+    db.password_resets.create_index("expires_at", expireAfterSeconds=0)
     
-    print("Indexes created successfully.")
+    logger.info("Indexes created successfully.")
+
+
+def create_route_indexes(db=None):
+    """Indexes behind the route queries (check with python check_query_plans.py)"""
+    db = db if db is not None else mongo.db
+    ASC, DESC = pymongo.ASCENDING, pymongo.DESCENDING
+
+    # Public feed / homepage: status (+ featured) filter, newest first; organizer event lists
+    db.events.create_index([("status", ASC), ("created_at", DESC)])
+    db.events.create_index([("status", ASC), ("is_featured", ASC), ("created_at", DESC)])
+    db.events.create_index([("created_by", ASC), ("created_at", DESC)])
+
+    # Organizer attendees/transactions (event_id $in, newest first) and "my registrations"
+    db.registrations.create_index([("event_id", ASC), ("registered_at", DESC)])
+    db.registrations.create_index([("user_id", ASC), ("registered_at", DESC)])
+
+    # Gate scans, ticket generation and "my tickets"
+    db.tickets.create_index("qr_token")
+    db.tickets.create_index("registration_id")
+    db.tickets.create_index("user_id")
+    db.tickets.create_index([("event_id", ASC), ("status", ASC)])
+
+    db.follows.create_index([("follower_id", ASC), ("followed_id", ASC)])
+    db.follows.create_index("followed_id")
+    db.forms.create_index("organizer_id")
+    db.host_applications.create_index("user_id")
+    db.reviews.create_index([("event_id", ASC), ("created_at", DESC)])
+
+    logger.info("Route indexes created successfully.")
+
+
+def create_archive_indexes(db=None):
+    """The history queries that also read registrations_archive / tickets_archive"""
+    db = db if db is not None else mongo.db
+    ASC, DESC = pymongo.ASCENDING, pymongo.DESCENDING
+
+    db.registrations_archive.create_index([("event_id", ASC), ("registered_at", DESC)])
+    db.registrations_archive.create_index([("user_id", ASC), ("registered_at", DESC)])
+    db.tickets_archive.create_index("registration_id")
+    db.tickets_archive.create_index("user_id")
+
+    logger.info("Archive indexes created successfully.")
+
+
+def create_reservation_indexes(db=None):
+    """Expired reservation sweep: only pending registrations are indexed"""
+    db = db if db is not None else mongo.db
+    db.registrations.create_index("reservation_expires_at",
+                                  partialFilterExpression={"payment_status": "pending"})
+    logger.info("Reservation indexes created successfully.")
+
+
+def create_inventory_indexes(db=None):
+    """Slot lookup when a purchase's random slot is short"""
+    db = db if db is not None else mongo.db
+    db.inventory.create_index([("event_id", pymongo.ASCENDING), ("key", pymongo.ASCENDING)])
+    logger.info("Inventory indexes created successfully.")
+
+
+def create_waiting_room_indexes(db=None):
+    """One registration per waiting room admission"""
+    db = db if db is not None else mongo.db
+    db.registrations.create_index([("event_id", pymongo.ASCENDING), ("admission_position", pymongo.ASCENDING)],
+                                  unique=True, partialFilterExpression={"admission_position": {"$exists": True}})
+    logger.info("Waiting room indexes created successfully.")
+
+
+def create_idempotency_indexes(db=None):
+    """Idempotency keys expire IDEMPOTENCY_TTL_HOURS after the first request"""
+    db = db if db is not None else mongo.db
+    db.idempotency_keys.create_index("expires_at", expireAfterSeconds=0)
+    logger.info("Idempotency key indexes created successfully.")
+
+
+def create_ticket_seq_indexes(db=None):
+    """Ticket n of a registration has seq n; one ticket per (registration_id, seq)"""
+    db = db if db is not None else mongo.db
+    db.tickets.create_index([("registration_id", pymongo.ASCENDING), ("seq", pymongo.ASCENDING)], unique=True)
+    # The unique index covers every lookup by registration_id
+    if "registration_id_1" in db.tickets.index_information():
+        db.tickets.drop_index("registration_id_1")
+    logger.info("Ticket seq indexes created successfully.")
+
+
+def create_order_indexes(db=None):
+    """Registrations of a cart order"""
+    db = db if db is not None else mongo.db
+    db.registrations.create_index("order_id", sparse=True)
+    logger.info("Order indexes created successfully.")
+
+
+def create_payment_event_indexes(db=None):
+    """One payment event per (provider, provider_event_id); the pending ones in arrival order"""
+    db = db if db is not None else mongo.db
+    db.payment_events.create_index([("provider", pymongo.ASCENDING), ("provider_event_id", pymongo.ASCENDING)],
+                                   unique=True)
+    db.payment_events.create_index([("status", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)],
+                                   partialFilterExpression={"status": "pending"})
+    logger.info("Payment event indexes created successfully.")
+
+
+def create_payment_attention_indexes(db=None):
+    """Payment events waiting for a person (needs_attention is only set on those)"""
+    db = db if db is not None else mongo.db
+    db.payment_events.create_index("needs_attention", sparse=True)
+    logger.info("Payment attention indexes created successfully.")
@@ -0,0 +1,287 @@
+"""
+Ticket inventory.
+
+Each limited ticket type (tickets[].quantity) and the event as a whole
+(capacity, key '*') has a `remaining` counter in the `inventory`
+collection, split over `inventory_slots` documents (INVENTORY_SLOTS by
+default) so a flash sale's writes don't all queue on one document.
+
+A purchase takes seats with conditional $inc's, which never go below zero:
+
+    holds = reserve(event, 'VIP', 2)      # raises SoldOut
+    release(holds)                        # expired reservation, refund, failed insert
+    reserve_many(event, {'VIP': 2, 'General': 3}, session)   # a cart, in a transaction
+
+Checkout passes its transaction's session (src/services/checkout_service.py);
+then nothing needs releasing on failure, the abort gives the seats back.
+
+The holds ({counter, quantity} pairs) are stored on the registration so
+whoever releases it gives the seats back to the same slots. Counters are
+created on the first purchase of an event, from what its registrations
+already hold, so existing events need no migration.
+"""
+import random
+from collections import Counter
+from datetime import datetime
+from bson.objectid import ObjectId
+from flask import current_app
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from src.database import mongo
+
+INVENTORY_COLLECTION = 'inventory'
+EVENT_WIDE = '*'
+
+
+class SoldOut(Exception):
+    def __init__(self, ticket_type):
+        super().__init__(f"{ticket_type} is sold out")
+        self.ticket_type = ticket_type
+
+
+def _total(value):
+    try:
+        return max(int(value or 0), 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def limits(event):
+    """{key: total} for every limited ticket type and the event capacity; 0 = unlimited, left out"""
+    result = {str(t.get('name', 'General')): _total(t.get('quantity')) for t in event.get('tickets') or []}
+    result[EVENT_WIDE] = _total(event.get('capacity'))
+    return {key: total for key, total in result.items() if total}
+
+
+def counter_id(event_id, key, slot):
+    return f"{event_id}:{key}:{slot}"
+
+
+def slot_count(event):
+    return max(int(event.get('inventory_slots') or current_app.config.get('INVENTORY_SLOTS', 1)), 1)
+
+
+def slot_shares(total, slots):
+    return [total // slots + (1 if i < total % slots else 0) for i in range(slots)]
+
+
+def _held(event_id, keys, session=None):
+    """{key: seats} taken by registrations made before the counters existed (expired reservations excluded)"""
+    match = {"event_id": {"$in": [event_id] + ([ObjectId(event_id)] if ObjectId.is_valid(event_id) else [])},
+             "$nor": [{"payment_status": "pending", "reservation_expires_at": {"$lte": datetime.utcnow()}}]}
+    if EVENT_WIDE not in keys:
+        match["ticket_type"] = {"$in": list(keys)}
+    rows = mongo.db.registrations.aggregate([
+        {"$match": match},
+        {"$group": {"_id": "$ticket_type", "quantity": {"$sum": {"$ifNull": ["$quantity", 1]}}}},
+    ], session=session)
+    by_type = {str(row['_id']): row['quantity'] for row in rows}
+    return {key: sum(by_type.values()) if key == EVENT_WIDE else by_type.get(key, 0) for key in keys}
+
+
+def ensure_counters(event_id, totals, slots, session=None):
+    """
+    Create the slots of counters ({key: total}) that don't exist yet
+    (concurrent callers: the first insert wins)
+    """
+    held = _held(event_id, totals, session)
+    ops = [InsertOne({"_id": counter_id(event_id, key, slot), "event_id": event_id, "key": key, "slot": slot,
+                      "remaining": share})
+           for key, total in totals.items()
+           for slot, share in enumerate(slot_shares(max(total - held[key], 0), slots))]
+    try:
+        mongo.db[INVENTORY_COLLECTION].bulk_write(ops, ordered=False, session=session)
+    except BulkWriteError:
+        # In a transaction a concurrent creator is a write conflict instead, and the transaction is retried
+        if session is not None:
+            raise
+
+
+def _take(event_id, key, total, quantity, slots, session=None):
+    counters = mongo.db[INVENTORY_COLLECTION]
+    # Fast path: one random slot, one round trip
+    hold_id = counter_id(event_id, key, random.randrange(slots))
+    if counters.update_one({"_id": hold_id, "remaining": {"$gte": quantity}},
+                           {"$inc": {"remaining": -quantity}}, session=session).modified_count:
+        return [{"counter": hold_id, "quantity": quantity}]
+
+    # That slot is short: take what is left wherever it is, fullest slots first
+    taken = []
+    needed = quantity
+    for attempt in range(2):
+        docs = list(counters.find({"event_id": event_id, "key": key}, {"remaining": 1}, session=session))
+        if not docs and attempt == 0:
+            ensure_counters(event_id, {key: total}, slots, session)
+            continue
+        for doc in sorted(docs, key=lambda d: -d['remaining']):
+            take = min(needed, doc['remaining'])
+            if take <= 0:
+                break
+            if counters.update_one({"_id": doc['_id'], "remaining": {"$gte": take}},
+                                   {"$inc": {"remaining": -take}}, session=session).modified_count:
+                taken.append({"counter": doc['_id'], "quantity": take})
+                needed -= take
+                if not needed:
+                    return taken
+        break
+    if session is None:
+        release(taken)
+    raise SoldOut(key)
+
+
+def reserve(event, ticket_type, quantity, session=None):
+    """Take `quantity` seats of ticket_type and of the event capacity; returns the holds"""
+    event_id = str(event['_id'])
+    event_limits = limits(event)
+    slots = slot_count(event)
+    holds = []
+    try:
+        for key in (str(ticket_type), EVENT_WIDE):
+            if key in event_limits:
+                holds.extend(_take(event_id, key, event_limits[key], quantity, slots, session))
+    except SoldOut:
+        if session is None:
+            release(holds)
+        raise
+    return holds
+
+
+def _plan(docs, quantity):
+    """Holds for quantity seats from counter docs: one random slot with enough left, else the fullest first"""
+    enough = [doc for doc in docs if doc['remaining'] >= quantity]
+    if enough:
+        return [{"counter": random.choice(enough)['_id'], "quantity": quantity}]
+    holds = []
+    for doc in sorted(docs, key=lambda d: -d['remaining']):
+        take = min(quantity, doc['remaining'])
+        if take <= 0:
+            break
+        holds.append({"counter": doc['_id'], "quantity": take})
+        quantity -= take
+    return holds if not quantity else None
+
+
+def _split(holds, quantities):
+    """Cut a list of holds into consecutive shares of the given quantities"""
+    pending = [dict(hold) for hold in holds]
+    shares = []
+    for quantity in quantities:
+        share = []
+        while quantity:
+            take = min(quantity, pending[0]['quantity'])
+            share.append({"counter": pending[0]['counter'], "quantity": take})
+            pending[0]['quantity'] -= take
+            quantity -= take
+            if not pending[0]['quantity']:
+                pending.pop(0)
+        shares.append(share)
+    return shares
+
+
+def reserve_many(event, quantities, session):
+    """
+    Take the seats of a whole cart ({ticket_type: quantity}) in a
+    transaction: one find for all its counters, one bulk_write for all the
+    takes, the event capacity taken once for the total. Returns
+    {ticket_type: holds}, each line with its share of the capacity.
+
+    The takes are planned from what the find returned; a counter changed
+    since is a write conflict, and the transaction is retried.
+    """
+    event_id = str(event['_id'])
+    event_limits = limits(event)
+    wanted = {str(ticket_type): quantity for ticket_type, quantity in quantities.items()
+              if str(ticket_type) in event_limits}
+    if EVENT_WIDE in event_limits:
+        wanted[EVENT_WIDE] = sum(quantities.values())
+    holds = {ticket_type: [] for ticket_type in quantities}
+    if not wanted:
+        return holds
+
+    counters = mongo.db[INVENTORY_COLLECTION]
+    by_key = {}
+    for attempt in range(2):
+        by_key = {}
+        for doc in counters.find({"event_id": event_id, "key": {"$in": list(wanted)}}, {"key": 1, "remaining": 1},
+                                 session=session):
+            by_key.setdefault(doc['key'], []).append(doc)
+        missing = [key for key in wanted if key not in by_key]
+        if not missing or attempt:
+            break
+        ensure_counters(event_id, {key: event_limits[key] for key in missing}, slot_count(event), session)
+
+    ops = []
+    for key, quantity in wanted.items():
+        planned = _plan(by_key.get(key, []), quantity)
+        if planned is None:
+            raise SoldOut(key)
+        ops.extend(UpdateOne({"_id": hold['counter'], "remaining": {"$gte": hold['quantity']}},
+                             {"$inc": {"remaining": -hold['quantity']}}) for hold in planned)
+        if key == EVENT_WIDE:
+            # Each registration gives back its own share when it is released
+            for ticket_type, share in zip(quantities, _split(planned, quantities.values())):
+                holds[ticket_type].extend(share)
+        else:
+            holds[next(t for t in quantities if str(t) == key)].extend(planned)
+    if counters.bulk_write(ops, ordered=False, session=session).modified_count != len(ops):
+        raise RuntimeError("Inventory changed during the transaction")
+    return holds
+
+
+def release_ops(holds):
+    """One $inc per counter for a batch of holds (e.g. a chunk of expired registrations)"""
+    quantities = Counter()
+    for hold in holds:
+        quantities[hold['counter']] += hold['quantity']
+    return [UpdateOne({"_id": counter}, {"$inc": {"remaining": quantity}}) for counter, quantity in quantities.items()]
+
+
+def release(holds, session=None):
+    ops = release_ops(holds or [])
+    if ops:
+        mongo.db[INVENTORY_COLLECTION].bulk_write(ops, ordered=False, session=session)
+
+
+def resize(event_id, old_event, new_event, session=None):
+    """
+    Apply an organizer's quantity/capacity edit to existing counters (run in
+    a transaction, with the event update). Each changed counter's remaining
+    seats move by the difference and are spread again over its slots, so no
+    slot keeps selling its old share. Below zero (more held than the new
+    total) slot 0 carries the deficit and the others are empty. Types removed
+    or made unlimited lose their counters; counters not created yet will
+    start from the new totals.
+    """
+    old, new = limits(old_event), limits({**old_event, **new_event})
+    counters = mongo.db[INVENTORY_COLLECTION]
+    for key in old.keys() - new.keys():
+        counters.delete_many({"event_id": event_id, "key": key}, session=session)
+    for key, total in new.items():
+        if key not in old or total == old[key]:
+            continue
+        docs = sorted(counters.find({"event_id": event_id, "key": key}, {"remaining": 1, "slot": 1}, session=session),
+                      key=lambda doc: doc.get('slot', 0))
+        if not docs:
+            continue
+        remaining = sum(doc['remaining'] for doc in docs) + total - old[key]
+        shares = slot_shares(remaining, len(docs)) if remaining > 0 else [remaining] + [0] * (len(docs) - 1)
+        counters.bulk_write([UpdateOne({"_id": doc['_id']}, {"$set": {"remaining": share}})
+                             for doc, share in zip(docs, shares)], ordered=False, session=session)
+
+
+def reshard(event, slots, session=None):
+    """Spread each counter's remaining seats over `slots` documents (run in a transaction)"""
+    event_id = str(event['_id'])
+    counters = mongo.db[INVENTORY_COLLECTION]
+    for key in limits(event):
+        docs = list(counters.find({"event_id": event_id, "key": key}, {"remaining": 1, "slot": 1}, session=session))
+        if not docs:
+            continue
+        remaining = sum(doc['remaining'] for doc in docs)
+        shares = slot_shares(remaining, slots) if remaining > 0 else [remaining] + [0] * (slots - 1)
+        ops = [UpdateOne({"_id": counter_id(event_id, key, slot)},
+                         {"$set": {"remaining": share, "event_id": event_id, "key": key, "slot": slot}}, upsert=True)
+               for slot, share in enumerate(shares)]
+        # Slots beyond the new count stay (empty), holds still point at them
+        ops += [UpdateOne({"_id": doc['_id']}, {"$set": {"remaining": 0}}) for doc in docs if doc['slot'] >= slots]
+        counters.bulk_write(ops, ordered=False, session=session)
@@ -0,0 +1,54 @@
+"""
+Flask JSON provider backed by orjson.
+
+Routes can hand MongoDB documents straight to jsonify():
+- ObjectId   -> "65f0c3..." (hex string)
+- datetime   -> "2024-05-01T18:30:00.123000Z" (ISO 8601; naive values are UTC, as pymongo returns them)
+- date       -> "2024-05-01"
+- Decimal128 -> number
+
+orjson serializes lists of documents several times faster than the
+stdlib encoder and writes bytes directly, without an intermediate str.
+"""
+from decimal import Decimal
+import orjson
+from bson import ObjectId
+from bson.decimal128 import Decimal128
+from flask.json.provider import JSONProvider
+
+_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def _default(value):
+    # Only called for types orjson doesn't handle itself
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Decimal128):
+        return float(value.to_decimal())
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='replace')
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps_bytes(obj, indent=False):
+    return orjson.dumps(obj, default=_default, option=_OPTIONS | (orjson.OPT_INDENT_2 if indent else 0))
+
+
+class OrjsonProvider(JSONProvider):
+    mimetype = 'application/json'
+
+    def dumps(self, obj, **kwargs):
+        return dumps_bytes(obj, indent=bool(kwargs.get('indent'))).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        # Pretty print in debug mode, like Flask's default provider
+        body = dumps_bytes(obj, indent=self._app.debug)
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -1,5 +1,7 @@
 
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+# Registers the synced+mongodb:// / synced+memory:// storage schemes
+import src.utils.ratelimit_storage
 
 limiter = Limiter(key_func=get_remote_address)
@@ -0,0 +1,185 @@
+"""
+Structured, asynchronous logging.
+
+Route code logs through the standard `logging` module. Records are put on
+an in-memory queue by the request thread and written as JSON lines by a
+background listener thread, so a log call never blocks on stdout.
+
+Every request gets a request ID (X-Request-ID header, generated if missing)
+that is attached to all records logged while handling it. One access record
+is written per request with method, path, status and latency, sampled per
+route (server errors and slow requests are always kept).
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from flask import g, has_request_context, request
+
+access_logger = logging.getLogger('eventify.access')
+
+# Attributes every LogRecord has; anything else came from `extra=` and is emitted as a field
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec='milliseconds'),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        elif record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human readable output for local development"""
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-5s [%(request_id)s] %(name)s: %(message)s")
+
+    def format(self, record):
+        if not hasattr(record, 'request_id'):
+            record.request_id = '-'
+        return super().format(record)
+
+
+class RequestContextQueueHandler(QueueHandler):
+    """
+    Runs on the request thread: attaches the request ID, renders the message
+    and hands the record to the listener. Never blocks - if the queue is full
+    the record is dropped and counted.
+    """
+    dropped = 0
+
+    def prepare(self, record):
+        if has_request_context() and not hasattr(record, 'request_id'):
+            record.request_id = g.get('request_id')
+        # Render now: args may be mutable objects that change before the listener runs
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            RequestContextQueueHandler.dropped += 1
+
+
+_listener = None
+_settings = None
+
+def configure_logging(level='INFO', fmt='json', queue_size=10000):
+    """Route all logging through a bounded queue drained by a background thread"""
+    global _listener, _settings
+    stop_logging()
+    _settings = (level, fmt, queue_size)
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter() if fmt == 'json' else TextFormatter())
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    root = logging.getLogger()
+    root.handlers = [RequestContextQueueHandler(log_queue)]
+    root.setLevel(level)
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+def stop_logging():
+    """Flush and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        try:
+            _listener.stop()
+        except Exception:
+            pass
+        _listener = None
+
+def restart_logging():
+    """
+    Call in a forked worker. The listener thread only exists in the parent and
+    its queue may have been locked mid-operation, so don't touch either -
+    start over with a fresh queue and listener.
+    """
+    global _listener
+    _listener = None
+    if _settings is not None:
+        configure_logging(*_settings)
+
+atexit.register(stop_logging)
+
+
+def log_queue_depth():
+    """Records waiting for the listener thread (exported as a metric)"""
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, RequestContextQueueHandler):
+            return handler.queue.qsize()
+    return 0
+
+
+def parse_sample_rates(value):
+    """'event_bp.get_events=0.1,healthz=0' -> {'event_bp.get_events': 0.1, 'healthz': 0.0}"""
+    rates = {}
+    for part in (value or '').split(','):
+        if '=' in part:
+            endpoint, rate = part.split('=', 1)
+            rates[endpoint.strip()] = float(rate)
+    return rates
+
+
+def init_request_logging(app):
+    """Request ID + one sampled access record per request"""
+    default_rate = app.config.get('LOG_SAMPLE_RATE', 1.0)
+    route_rates = app.config.get('LOG_ROUTE_SAMPLE_RATES', {})
+    slow_ms = app.config.get('LOG_SLOW_REQUEST_MS', 1000)
+
+    @app.before_request
+    def start_request_timer():
+        g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def log_request(response):
+        started = g.get('request_started')
+        if started is None:
+            return response
+        duration_ms = (time.perf_counter() - started) * 1000
+        response.headers['X-Request-ID'] = g.request_id
+
+        rate = route_rates.get(request.endpoint, default_rate)
+        keep = response.status_code >= 500 or duration_ms >= slow_ms or (rate > 0 and random.random() < rate)
+        if keep and access_logger.isEnabledFor(logging.INFO):
+            access_logger.info(
+                "%s %s %s", request.method, request.path, response.status_code,
+                extra={
+                    "method": request.method,
+                    "path": request.path,
+                    "endpoint": request.endpoint,
+                    "status": response.status_code,
+                    "bytes": response.content_length,
+                    "duration_ms": round(duration_ms, 2),
+                    "queries": g.get('query_count'),
+                    "pid": os.getpid()
+                }
+            )
+        return response
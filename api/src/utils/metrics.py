@@ -0,0 +1,176 @@
+"""
+Prometheus metrics, served at /metrics.
+
+- http_request_duration_seconds{blueprint,endpoint,method}   latency histogram
+- http_requests_total{blueprint,endpoint,method,status}
+- http_request_errors_total{blueprint,endpoint,status}        5xx responses
+- http_requests_in_flight
+- mongodb_command_duration_seconds{collection,command}        from a pymongo CommandListener
+- mongodb_command_errors_total{collection,command}
+- mongodb_pool_connections / mongodb_pool_checked_out / mongodb_pool_checkout_failures_total
+- log_queue_depth, log_records_dropped, password_hash_pending, emails_sent_total{result}
+- query_budget_exceeded_total{endpoint}                        see src/utils/query_budget.py
+- reservations_total{outcome}                                  created / confirmed / rejected_expired paid checkouts
+- payment_webhooks_total{provider,outcome}                     accepted / duplicate / bad_signature / bad_payload
+
+Under gunicorn every worker has its own counters. PROMETHEUS_MULTIPROC_DIR
+(set by gunicorn.conf.py) makes prometheus_client write them to shared
+files, and /metrics aggregates all workers on each scrape.
+"""
+import os
+import threading
+import time
+from flask import Response, g, request
+from prometheus_client import (CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram,
+                               REGISTRY, generate_latest, multiprocess)
+from pymongo import monitoring
+
+# Request latency buckets (seconds), dense around the checkout / gate scan SLO range
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+MONGO_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+REQUEST_LATENCY = Histogram('http_request_duration_seconds', 'Request latency',
+                            ['blueprint', 'endpoint', 'method'], buckets=LATENCY_BUCKETS)
+REQUESTS = Counter('http_requests_total', 'Requests handled',
+                   ['blueprint', 'endpoint', 'method', 'status'])
+REQUEST_ERRORS = Counter('http_request_errors_total', 'Requests that ended in a 5xx',
+                         ['blueprint', 'endpoint', 'status'])
+IN_FLIGHT = Gauge('http_requests_in_flight', 'Requests being handled', multiprocess_mode='livesum')
+
+MONGO_LATENCY = Histogram('mongodb_command_duration_seconds', 'MongoDB command latency',
+                          ['collection', 'command'], buckets=MONGO_BUCKETS)
+MONGO_ERRORS = Counter('mongodb_command_errors_total', 'Failed MongoDB commands', ['collection', 'command'])
+POOL_CONNECTIONS = Gauge('mongodb_pool_connections', 'Open pooled connections', multiprocess_mode='livesum')
+POOL_CHECKED_OUT = Gauge('mongodb_pool_checked_out', 'Connections in use', multiprocess_mode='livesum')
+POOL_CHECKOUT_FAILURES = Counter('mongodb_pool_checkout_failures_total', 'Connection checkouts that failed',
+                                 ['reason'])
+
+LOG_QUEUE_DEPTH = Gauge('log_queue_depth', 'Log records waiting to be written', multiprocess_mode='livesum')
+LOG_DROPPED = Gauge('log_records_dropped', 'Log records dropped because the queue was full',
+                    multiprocess_mode='livesum')
+HASH_PENDING = Gauge('password_hash_pending', 'bcrypt operations queued or running', multiprocess_mode='livesum')
+EMAILS_SENT = Counter('emails_sent_total', 'Outgoing emails', ['result'])
+QUERY_BUDGET_EXCEEDED = Counter('query_budget_exceeded_total', 'Requests that sent more MongoDB commands than '
+                                'their declared budget', ['endpoint'])
+RESERVATIONS = Counter('reservations_total', 'Paid checkout reservations by outcome', ['outcome'])
+PAYMENT_WEBHOOKS = Counter('payment_webhooks_total', 'Payment provider webhooks received', ['provider', 'outcome'])
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Times every command per collection; started events only carry the name"""
+
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _collection(event):
+        name = event.command.get(event.command_name)
+        if event.command_name == 'getMore':
+            name = event.command.get('collection')
+        return name if isinstance(name, str) else '-'
+
+    def started(self, event):
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = self._collection(event)
+
+    def _finish(self, event):
+        with self._lock:
+            return self._pending.pop((event.connection_id, event.request_id), '-')
+
+    def succeeded(self, event):
+        collection = self._finish(event)
+        MONGO_LATENCY.labels(collection, event.command_name).observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        collection = self._finish(event)
+        MONGO_LATENCY.labels(collection, event.command_name).observe(event.duration_micros / 1e6)
+        MONGO_ERRORS.labels(collection, event.command_name).inc()
+
+
+class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def pool_cleared(self, event): pass
+    def pool_closed(self, event): pass
+    def connection_ready(self, event): pass
+    def connection_check_out_started(self, event): pass
+
+    def connection_created(self, event):
+        POOL_CONNECTIONS.inc()
+
+    def connection_closed(self, event):
+        POOL_CONNECTIONS.dec()
+
+    def connection_checked_out(self, event):
+        POOL_CHECKED_OUT.inc()
+
+    def connection_checked_in(self, event):
+        POOL_CHECKED_OUT.dec()
+
+    def connection_check_out_failed(self, event):
+        POOL_CHECKOUT_FAILURES.labels(str(event.reason)).inc()
+
+
+_listeners_registered = False
+
+def register_mongo_listeners():
+    """Must run before MongoClients are created; applies to every client in the process"""
+    global _listeners_registered
+    if not _listeners_registered:
+        monitoring.register(MongoCommandMetrics())
+        monitoring.register(MongoPoolMetrics())
+        _listeners_registered = True
+
+
+def _sample_queues():
+    # Cheap enough to refresh on every request; the values are per worker
+    from src.utils.log_setup import RequestContextQueueHandler, log_queue_depth
+    from src.utils.security import password_hasher
+    LOG_QUEUE_DEPTH.set(log_queue_depth())
+    LOG_DROPPED.set(RequestContextQueueHandler.dropped)
+    HASH_PENDING.set(password_hasher.pending)
+
+
+def init_metrics(app):
+    register_mongo_listeners()
+
+    @app.before_request
+    def start_metrics_timer():
+        g.metrics_started = time.perf_counter()
+        IN_FLIGHT.inc()
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return response
+        IN_FLIGHT.dec()
+        # Unmatched URLs share one label so random paths can't blow up cardinality
+        blueprint = request.blueprint or 'app'
+        endpoint = request.endpoint or 'unmatched'
+        REQUEST_LATENCY.labels(blueprint, endpoint, request.method).observe(time.perf_counter() - started)
+        REQUESTS.labels(blueprint, endpoint, request.method, str(response.status_code)).inc()
+        if response.status_code >= 500:
+            REQUEST_ERRORS.labels(blueprint, endpoint, str(response.status_code)).inc()
+        _sample_queues()
+        return response
+
+    @app.teardown_request
+    def release_in_flight(exc):
+        # after_request is skipped when a response never got built
+        if g.pop('metrics_started', None) is not None:
+            IN_FLIGHT.dec()
+
+    @app.route('/metrics')
+    def metrics():
+        token = app.config.get('METRICS_TOKEN')
+        if token and request.headers.get('Authorization') != f"Bearer {token}":
+            return {"message": "Unauthorized"}, 401
+        _sample_queues()
+        if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = REGISTRY
+        return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
@@ -0,0 +1,150 @@
+"""
+Versioned database migrations.
+
+Index creation used to run in every gunicorn worker on every boot. It is
+now a list of numbered migrations; the ones already applied are recorded
+in the `schema_migrations` collection and skipped, so a deploy costs one
+small query when nothing changed.
+
+    flask --app app db status
+    flask --app app db migrate
+
+To add a migration, write a function taking the database and append it to
+MIGRATIONS with the next version number. Never renumber or edit one that
+has shipped - add a new one instead. Migrations must be safe to re-run
+(create_index is a no-op when the index already exists).
+"""
+import logging
+import time
+from datetime import datetime
+from flask import current_app, has_app_context
+from pymongo import UpdateOne
+from src.utils.indexes import (create_archive_indexes, create_idempotency_indexes, create_indexes,
+                               create_inventory_indexes, create_order_indexes, create_payment_attention_indexes,
+                               create_payment_event_indexes, create_reservation_indexes, create_route_indexes,
+                               create_ticket_seq_indexes, create_waiting_room_indexes)
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_COLLECTION = 'schema_migrations'
+
+
+def initial_indexes(db):
+    """Users, verification and password reset indexes"""
+    create_indexes(db)
+
+
+def route_query_indexes(db):
+    """Events, registrations, tickets and follows indexes for the route queries"""
+    create_route_indexes(db)
+
+
+def archive_indexes(db):
+    """registrations_archive and tickets_archive indexes for the history views"""
+    create_archive_indexes(db)
+
+
+def reservation_expiry(db):
+    """Give pending registrations from before reservations existed an expiry, and index it"""
+    # Same TTL as src/utils/reservations.reservation_expiry (scripts may migrate outside an app context)
+    ttl_minutes = current_app.config.get('RESERVATION_TTL_MINUTES', 15) if has_app_context() else 15
+    db.registrations.update_many(
+        {"payment_status": "pending", "reservation_expires_at": {"$exists": False}},
+        [{"$set": {"reservation_expires_at": {"$add": [{"$ifNull": ["$registered_at", "$$NOW"]},
+                                                       ttl_minutes * 60 * 1000]}}}]
+    )
+    create_reservation_indexes(db)
+
+
+def inventory_indexes(db):
+    """Ticket inventory counters"""
+    create_inventory_indexes(db)
+
+
+def waiting_room_indexes(db):
+    """Unique (event_id, admission_position) on registrations"""
+    create_waiting_room_indexes(db)
+
+
+def idempotency_indexes(db):
+    """TTL index on idempotency_keys"""
+    create_idempotency_indexes(db)
+
+
+def ticket_seq(db):
+    """Number existing tickets per registration (oldest first), then make (registration_id, seq) unique"""
+    groups = db.tickets.aggregate([
+        {"$match": {"seq": {"$exists": False}}},
+        {"$sort": {"_id": 1}},
+        {"$group": {"_id": "$registration_id", "ticket_ids": {"$push": "$_id"}}},
+    ], allowDiskUse=True)
+    ops = []
+    for group in groups:
+        ops.extend(UpdateOne({"_id": ticket_id}, {"$set": {"seq": seq}})
+                   for seq, ticket_id in enumerate(group['ticket_ids']))
+        if len(ops) >= 1000:
+            db.tickets.bulk_write(ops, ordered=False)
+            ops = []
+    if ops:
+        db.tickets.bulk_write(ops, ordered=False)
+    create_ticket_seq_indexes(db)
+
+
+def order_indexes(db):
+    """registrations.order_id for cart orders"""
+    create_order_indexes(db)
+
+
+def payment_event_indexes(db):
+    """payment_events: provider retries deduplicated, pending events for the payments worker"""
+    create_payment_event_indexes(db)
+
+
+def payment_attention_indexes(db):
+    """payment_events left for a person by the payments worker"""
+    create_payment_attention_indexes(db)
+
+
+# (version, name, function) - applied in order
+MIGRATIONS = [
+    (1, 'initial_indexes', initial_indexes),
+    (2, 'route_query_indexes', route_query_indexes),
+    (3, 'archive_indexes', archive_indexes),
+    (4, 'reservation_expiry', reservation_expiry),
+    (5, 'inventory_indexes', inventory_indexes),
+    (6, 'waiting_room_indexes', waiting_room_indexes),
+    (7, 'idempotency_indexes', idempotency_indexes),
+    (8, 'ticket_seq', ticket_seq),
+    (9, 'order_indexes', order_indexes),
+    (10, 'payment_event_indexes', payment_event_indexes),
+    (11, 'payment_attention_indexes', payment_attention_indexes),
+]
+
+
+def applied_versions(db):
+    return {doc['_id'] for doc in db[MIGRATIONS_COLLECTION].find({}, {'_id': 1})}
+
+
+def pending_migrations(db):
+    applied = applied_versions(db)
+    return [m for m in MIGRATIONS if m[0] not in applied]
+
+
+def run_migrations(db, dry_run=False):
+    """Apply pending migrations in order, returns the list of versions applied"""
+    done = []
+    for version, name, func in pending_migrations(db):
+        if dry_run:
+            done.append(version)
+            continue
+        started = time.perf_counter()
+        func(db)
+        duration_ms = round((time.perf_counter() - started) * 1000, 1)
+        db[MIGRATIONS_COLLECTION].update_one(
+            {'_id': version},
+            {'$set': {'name': name, 'applied_at': datetime.utcnow(), 'duration_ms': duration_ms}},
+            upsert=True
+        )
+        logger.info("Applied migration %04d_%s in %.1f ms", version, name, duration_ms)
+        done.append(version)
+    return done
@@ -0,0 +1,177 @@
+"""
+Per-request MongoDB query accounting.
+
+A pymongo CommandListener counts the commands issued while a request is
+being handled (the listener runs on the thread that sent the command, so
+the Flask request context is available) and records each query's shape:
+command, collection and filter keys with the values stripped.
+
+- The same shape issued QUERY_REPEAT_THRESHOLD times in one request is an
+  N+1 and is logged with the endpoint and the repeated shape.
+- Any single command slower than QUERY_SLOW_MS is logged as a slow query
+  with the endpoint that issued it.
+- Views declare how many commands they may send with @query_budget(n).
+  Over budget is a warning in production; with QUERY_BUDGET_ENFORCE (on in
+  the development and testing profiles) the request fails with a 500 that
+  lists the offending shapes, so a regression shows up before deploy.
+
+Cursor bookkeeping (getMore, killCursors, endSessions) is not counted.
+"""
+import logging
+import threading
+from collections import Counter
+from flask import current_app, g, has_request_context, jsonify, request
+from pymongo import monitoring
+
+logger = logging.getLogger('eventify.queries')
+
+IGNORED_COMMANDS = {'getMore', 'killCursors', 'endSessions'}
+
+# Where each command keeps its filter
+_FILTER_FIELDS = {'find': 'filter', 'count': 'query', 'distinct': 'query', 'findAndModify': 'query'}
+_BULK_FIELDS = {'update': ('updates', 'q'), 'delete': ('deletes', 'q')}
+
+
+def query_budget(limit):
+    """Declare the most MongoDB commands a view may send per request"""
+    def decorator(f):
+        f.query_budget = limit
+        return f
+    return decorator
+
+
+def _shape(value):
+    if isinstance(value, dict):
+        return '{' + ','.join(f"{k}:{_shape(v)}" for k, v in sorted(value.items())) + '}'
+    if isinstance(value, (list, tuple)):
+        # $in: [a, b, c] and $in: [a] are the same query
+        return '[' + ','.join(dict.fromkeys(_shape(v) for v in value)) + ']'
+    return '?'
+
+
+def query_shape(command_name, command):
+    """'find events {_id:?}' for {"find": "events", "filter": {"_id": ObjectId(...)}}"""
+    collection = command.get(command_name)
+    collection = collection if isinstance(collection, str) else '-'
+    if command_name in _FILTER_FIELDS:
+        predicate = _shape(command.get(_FILTER_FIELDS[command_name]) or {})
+    elif command_name in _BULK_FIELDS:
+        field, key = _BULK_FIELDS[command_name]
+        predicate = ','.join(dict.fromkeys(_shape(op.get(key) or {}) for op in command.get(field) or []))
+    elif command_name == 'aggregate':
+        predicate = '|'.join(
+            f"{next(iter(stage), '?')}{_shape(stage['$match']) if '$match' in stage else ''}"
+            for stage in command.get('pipeline') or []
+        )
+    else:
+        predicate = ''
+    return f"{command_name} {collection} {predicate}".rstrip()
+
+
+class RequestQueries:
+    """What one request sent to MongoDB"""
+
+    def __init__(self):
+        self.count = 0
+        self.shapes = Counter()
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def repeated(self, threshold):
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+
+class QueryBudgetListener(monitoring.CommandListener):
+    def started(self, event):
+        if event.command_name in IGNORED_COMMANDS or not has_request_context():
+            return
+        queries = g.get('queries')
+        if queries is None:
+            return
+        shape = query_shape(event.command_name, event.command)
+        with queries.lock:
+            queries.count += 1
+            queries.shapes[shape] += 1
+            queries.pending[(event.connection_id, event.request_id)] = shape
+
+    def _finish(self, event):
+        if not has_request_context():
+            return
+        queries = g.get('queries')
+        if queries is None:
+            return
+        with queries.lock:
+            shape = queries.pending.pop((event.connection_id, event.request_id), None)
+        if shape is None:
+            return
+        duration_ms = event.duration_micros / 1000
+        if duration_ms >= current_app.config.get('QUERY_SLOW_MS', 100):
+            logger.warning(
+                "Slow query on %s: %s (%.1f ms)", request.endpoint, shape, duration_ms,
+                extra={"endpoint": request.endpoint, "shape": shape,
+                       "command": event.command_name, "duration_ms": round(duration_ms, 2)}
+            )
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+
+
+_listener_registered = False
+
+def register_query_listener():
+    """Like the metrics listeners, must run before MongoClients are created"""
+    global _listener_registered
+    if not _listener_registered:
+        monitoring.register(QueryBudgetListener())
+        _listener_registered = True
+
+
+def endpoint_budget(app, endpoint):
+    view = app.view_functions.get(endpoint)
+    budget = getattr(view, 'query_budget', None)
+    if budget is None:
+        budget = app.config.get('QUERY_BUDGET_DEFAULT') or None
+    return budget
+
+
+def init_query_budget(app):
+    register_query_listener()
+    repeat_threshold = app.config.get('QUERY_REPEAT_THRESHOLD', 5)
+
+    @app.before_request
+    def start_query_count():
+        g.queries = RequestQueries()
+
+    @app.after_request
+    def check_query_budget(response):
+        queries = g.pop('queries', None)
+        if queries is None:
+            return response
+        g.query_count = queries.count
+        endpoint = request.endpoint
+
+        for shape, n in queries.repeated(repeat_threshold):
+            logger.warning(
+                "Repeated query on %s: %s x%d", endpoint, shape, n,
+                extra={"endpoint": endpoint, "shape": shape, "repeats": n}
+            )
+
+        budget = endpoint_budget(app, endpoint)
+        if budget is None or queries.count <= budget:
+            return response
+        top = [{"shape": shape, "count": n} for shape, n in queries.shapes.most_common(5)]
+        logger.warning(
+            "Query budget exceeded on %s: %d commands, budget %d", endpoint, queries.count, budget,
+            extra={"endpoint": endpoint, "queries": queries.count, "budget": budget, "shapes": top}
+        )
+        from src.utils.metrics import QUERY_BUDGET_EXCEEDED
+        QUERY_BUDGET_EXCEEDED.labels(endpoint).inc()
+        # Read per request so tools like check_query_plans.py can switch it off
+        if app.config.get('QUERY_BUDGET_ENFORCE'):
+            response = jsonify({"message": "Query budget exceeded", "endpoint": endpoint,
+                                "queries": queries.count, "budget": budget, "shapes": top})
+            response.status_code = 500
+        return response
@@ -0,0 +1,189 @@
+"""
+Node-local rate limit storage with periodic sync to MongoDB.
+
+Flask-Limiter's MongoDB storage costs a round trip to Atlas on every
+rate-limited request. This storage keeps the counters in process memory
+(so a limit check takes microseconds) and a background thread pushes the
+local hits to MongoDB and pulls other nodes' totals every few seconds.
+
+    RATELIMIT_STORAGE_URI = "synced+mongodb+srv://..."   # shared across nodes
+    RATELIMIT_STORAGE_URI = "synced+memory://"           # this process only
+
+Options (RATELIMIT_STORAGE_OPTIONS):
+- sync_interval: max seconds between syncs (accuracy: how stale other nodes' counts can be)
+- sync_threshold: unsynced hits on one key that trigger an early sync (tolerance:
+  worst case a limit is exceeded by nodes * sync_threshold hits)
+
+If MongoDB is unreachable the limits keep working on local counts only.
+"""
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from limits.storage import MemoryStorage
+from pymongo import MongoClient, UpdateOne
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+
+class SyncedMemoryStorage(MemoryStorage):
+    STORAGE_SCHEME = ["synced+mongodb", "synced+mongodb+srv", "synced+memory"]
+
+    def __init__(self, uri=None, wrap_exceptions=False, sync_interval=2.0, sync_threshold=10,
+                 database_name='limits', collection_name='synced_counters', **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions)
+        remote_uri = uri.replace('synced+', '', 1) if uri else None
+        self.remote_uri = remote_uri if remote_uri and remote_uri.startswith('mongodb') else None
+        self.sync_interval = float(sync_interval)
+        self.sync_threshold = int(sync_threshold)
+        self.database_name = database_name
+        self.collection_name = collection_name
+
+        self._sync_lock = threading.Lock()
+        self._pending = Counter()        # local hits not yet pushed
+        self._key_expiry = {}            # key -> expiry seconds, for the remote TTL
+        self._pushed = Counter()         # local hits already pushed, per key
+        self._others = {}                # key -> hits from other nodes at last sync
+        self._wakeup = threading.Event()
+        self._collection = None
+        self._thread = None
+        self._pid = None
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        for name in ('_sync_lock', '_wakeup', '_thread', '_collection'):
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self._sync_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._collection = None
+
+    # --- Counter API used by the fixed / sliding window strategies ---
+
+    def incr(self, key, expiry, amount=1):
+        local = super().incr(key, expiry, amount)
+        if self.remote_uri:
+            self._ensure_sync_thread()
+            with self._sync_lock:
+                self._pending[key] += amount
+                self._key_expiry[key] = expiry
+                if self._pending[key] >= self.sync_threshold:
+                    self._wakeup.set()
+        return local + self._others.get(key, 0)
+
+    def decr(self, key, amount=1):
+        local = super().decr(key, amount)
+        if self.remote_uri:
+            with self._sync_lock:
+                self._pending[key] -= amount
+        return max(local + self._others.get(key, 0), 0)
+
+    def get(self, key):
+        local = super().get(key)
+        if not local and key not in self._others:
+            return 0
+        return local + self._others.get(key, 0)
+
+    def clear(self, key):
+        super().clear(key)
+        with self._sync_lock:
+            self._pending.pop(key, None)
+            self._pushed.pop(key, None)
+            self._others.pop(key, None)
+            self._key_expiry.pop(key, None)
+
+    def reset(self):
+        with self._sync_lock:
+            self._pending.clear()
+            self._pushed.clear()
+            self._others.clear()
+            self._key_expiry.clear()
+        return super().reset()
+
+    # --- Sync with MongoDB ---
+
+    def _get_collection(self):
+        if self._collection is None:
+            client = MongoClient(self.remote_uri, serverSelectionTimeoutMS=2000)
+            collection = client[self.database_name][self.collection_name]
+            collection.create_index("expireAt", expireAfterSeconds=0)
+            self._collection = collection
+        return self._collection
+
+    def _ensure_sync_thread(self):
+        # One sync thread per process; gunicorn forks after import, so check the pid
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._sync_lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._collection = None
+            self._thread = threading.Thread(target=self._sync_loop, name='ratelimit-sync', daemon=True)
+            self._thread.start()
+
+    def _sync_loop(self):
+        while True:
+            self._wakeup.wait(self.sync_interval)
+            self._wakeup.clear()
+            try:
+                self.sync()
+            except Exception as e:
+                # Fail open: keep limiting on local counts until MongoDB is back
+                logger.warning("Rate limit sync failed: %s", e)
+
+    def sync(self):
+        """Push local deltas and refresh other nodes' counts for active keys"""
+        with self._sync_lock:
+            pending = {k: v for k, v in self._pending.items() if v}
+            self._pending.clear()
+            expiries = dict(self._key_expiry)
+
+        now = datetime.utcnow()
+        collection = self._get_collection()
+        if pending:
+            ops = [
+                UpdateOne(
+                    {"_id": key},
+                    {"$inc": {"count": delta},
+                     "$setOnInsert": {"expireAt": now + timedelta(seconds=expiries.get(key, 60))}},
+                    upsert=True
+                )
+                for key, delta in pending.items()
+            ]
+            try:
+                collection.bulk_write(ops, ordered=False)
+            except Exception:
+                # Put the deltas back so they're retried next round
+                with self._sync_lock:
+                    self._pending.update(pending)
+                raise
+            with self._sync_lock:
+                self._pushed.update(pending)
+
+        # Only keys that are still live locally matter
+        active_keys = [k for k in list(self.storage.keys()) if k in expiries]
+        if not active_keys:
+            self._forget_expired_keys()
+            return
+
+        totals = {doc['_id']: doc.get('count', 0)
+                  for doc in collection.find({"_id": {"$in": active_keys}, "expireAt": {"$gt": now}})}
+        with self._sync_lock:
+            for key in active_keys:
+                self._others[key] = max(totals.get(key, 0) - self._pushed.get(key, 0), 0)
+        self._forget_expired_keys()
+
+    def _forget_expired_keys(self):
+        with self._sync_lock:
+            live = set(self.storage.keys())
+            for key in [k for k in self._key_expiry if k not in live and not self._pending.get(k)]:
+                self._key_expiry.pop(key, None)
+                self._pushed.pop(key, None)
+                self._others.pop(key, None)
@@ -0,0 +1,50 @@
+"""
+Expiring reservations for paid checkouts.
+
+A paid registration is created as `pending` with `reservation_expires_at`
+(RESERVATION_TTL_MINUTES from now). It holds its seats
+(src/utils/inventory.py) until then: confirm_payment only accepts it before
+that time, and `flask --app app data expire-reservations` (a cron job)
+deletes the abandoned ones in batches and gives their seats back. Deleting
+them also keeps unpaid checkouts out of every registration scan.
+
+Outcomes are counted in reservations_total{outcome}; the abandonment rate
+is 1 - confirmed / created (see README).
+"""
+from datetime import datetime, timedelta
+from flask import current_app
+from pymongo import DeleteMany
+from src.database import mongo
+from src.utils.inventory import INVENTORY_COLLECTION, release_ops
+
+
+def reservation_expiry(now=None):
+    return (now or datetime.utcnow()) + timedelta(minutes=current_app.config.get('RESERVATION_TTL_MINUTES', 15))
+
+
+def is_expired(reg, now=None):
+    expires_at = reg.get('reservation_expires_at')
+    return reg.get('payment_status') == 'pending' and expires_at is not None and expires_at <= (now or datetime.utcnow())
+
+
+def expired_query(now):
+    # Served by the partial index on reservation_expires_at (migration 4)
+    return {"payment_status": "pending", "reservation_expires_at": {"$lte": now}}
+
+
+def release_reservations(regs, now, session=None):
+    """
+    Write ops that release a chunk of expired reservations: give back their
+    seats and delete them. Meant to run in a transaction - the chunk is
+    re-read there, so a reservation another sweeper (or a late payment)
+    got to first is not released twice.
+    """
+    expired = list(mongo.db.registrations.find(
+        {"$and": [{"_id": {"$in": [reg['_id'] for reg in regs]}}, expired_query(now)]},
+        {"inventory_holds": 1}, session=session
+    ))
+    if not expired:
+        return
+    for op in release_ops([hold for reg in expired for hold in reg.get('inventory_holds') or []]):
+        yield INVENTORY_COLLECTION, op
+    yield 'registrations', DeleteMany({"_id": {"$in": [reg['_id'] for reg in expired]}})
@@ -2,17 +2,108 @@
 import bcrypt
 import jwt
 import datetime
+import os
 import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from src.config import Config
 
+class PasswordHashingBusy(Exception):
+    """Raised when too many bcrypt operations are already queued; mapped to a 503"""
+    pass
+
+def _native_thread_pool(workers):
+    """
+    bcrypt has to run on real OS threads. Under gevent monkey-patching a plain
+    ThreadPoolExecutor runs its tasks as greenlets, so each hash would freeze
+    the whole worker for ~250 ms; gevent's executor uses native threads and
+    waits on them cooperatively.
+    """
+    try:
+        from gevent import monkey
+        if monkey.is_module_patched('threading'):
+            from gevent.threadpool import ThreadPoolExecutor as GeventThreadPoolExecutor
+            return GeventThreadPoolExecutor(max_workers=workers)
+    except ImportError:
+        pass
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a small dedicated thread pool.
+    bcrypt releases the GIL, so hashing doesn't stall other request threads,
+    and the pending counter caps how much CPU a login spike can claim.
+    """
+    def __init__(self, workers, max_pending, timeout):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._executor = None
+        self._pid = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        # Created lazily (and re-created after fork) so preloaded gunicorn
+        # workers don't inherit a pool whose threads only exist in the master
+        if self._executor is None or self._pid != os.getpid():
+            self._executor = _native_thread_pool(self.workers)
+            self._pid = os.getpid()
+            self._pending = 0
+        return self._executor
+
+    def run(self, fn, *args):
+        with self._lock:
+            executor = self._get_executor()
+            if self._pending >= self.max_pending:
+                raise PasswordHashingBusy()
+            self._pending += 1
+        try:
+            future = executor.submit(fn, *args)
+        except Exception:
+            self._release()
+            raise
+        # A slot stays taken until bcrypt is really done: a timed-out hash keeps its thread busy
+        future.add_done_callback(lambda _: self._release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel() # Only helps while it is still queued
+            raise PasswordHashingBusy()
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+
+    @property
+    def pending(self):
+        return self._pending
+
+password_hasher = PasswordHasher(Config.BCRYPT_WORKERS, Config.BCRYPT_MAX_PENDING, Config.BCRYPT_TIMEOUT)
+
 class Security:
     @staticmethod
     def hash_password(password):
-        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+        salt = bcrypt.gensalt(rounds=Config.BCRYPT_ROUNDS)
+        return password_hasher.run(bcrypt.hashpw, password.encode('utf-8'), salt)
 
     @staticmethod
     def check_password(hashed_password, user_password):
-        return bcrypt.checkpw(user_password.encode('utf-8'), hashed_password)
+        if isinstance(hashed_password, str):
+            hashed_password = hashed_password.encode('utf-8')
+        return password_hasher.run(bcrypt.checkpw, user_password.encode('utf-8'), hashed_password)
+
+    @staticmethod
+    def needs_rehash(hashed_password):
+        """True when the stored hash was made with a different work factor"""
+        if isinstance(hashed_password, str):
+            hashed_password = hashed_password.encode('utf-8')
+        try:
+            # Format: $2b$<rounds>$<salt+hash>
+            rounds = int(hashed_password.split(b'$')[2])
+        except (IndexError, ValueError):
+            return False
+        return rounds != Config.BCRYPT_ROUNDS
 
     @staticmethod
     def generate_token(user_id):
@@ -1,47 +1,64 @@
 """
 Ticket generation utilities
 """
+import logging
 from src.database import mongo
 from datetime import datetime
+from pymongo.errors import BulkWriteError
 import secrets
 
+logger = logging.getLogger(__name__)
+
 def generate_secure_token():
     """Generate a cryptographically secure random token for QR codes"""
     return secrets.token_urlsafe(32)
 
-def generate_tickets_for_registration(registration_id, user_id, event_id, quantity=1, ticket_type="General"):
+def issue_tickets(registrations, session=None):
     """
-    Generate tickets for a registration
-    Returns list of created ticket IDs
+    Issue the tickets of one or more registrations with one insert_many;
+    returns {registration_id: [ticket IDs]}.
+
+    Ticket n of a registration has seq n and (registration_id, seq) is
+    unique (migration 8), so a retried or concurrent call only adds the
+    missing ones and then reads back the full set.
     """
-    tickets = []
-    
-    # Idempotency Check
-    existing_count = mongo.db.tickets.count_documents({"registration_id": str(registration_id)})
-    
-    if existing_count >= quantity:
-        print(f"Tickets already generated for registration {registration_id}. Skipping.")
-        # Return existing tickets
-        existing_tickets = mongo.db.tickets.find({"registration_id": str(registration_id)})
-        return [str(t['_id']) for t in existing_tickets]
+    now = datetime.utcnow()
+    tickets = [{
+        "ticket_id": f"TKT-{secrets.token_hex(8).upper()}",
+        "registration_id": str(reg['_id']),
+        "seq": seq,
+        "user_id": reg.get('user_id'),
+        "event_id": reg.get('event_id'),
+        "qr_token": generate_secure_token(),
+        "status": "valid",
+        "ticket_type": reg.get('ticket_type', 'General'),
+        "created_at": now,
+        "used_at": None,
+        "validated_by": None
+    } for reg in registrations for seq in range(reg.get('quantity', 1))]
+    issued = {str(reg['_id']): [] for reg in registrations}
+    if not tickets:
+        return issued
+
+    try:
+        result = mongo.db.tickets.insert_many(tickets, ordered=False, session=session)
+        for ticket, ticket_id in zip(tickets, result.inserted_ids):
+            issued[ticket['registration_id']].append(str(ticket_id))
+        return issued
+    except BulkWriteError as e:
+        # A transaction is aborted by the error, so there is nothing to read back
+        if session is not None or any(error.get('code') != 11000 for error in e.details.get('writeErrors', [])):
+            raise
+        logger.debug("Tickets already generated for registrations %s", list(issued))
+    for ticket in mongo.db.tickets.find({"registration_id": {"$in": list(issued)}}, {"registration_id": 1},
+                                        session=session).sort([("registration_id", 1), ("seq", 1)]):
+        issued[ticket['registration_id']].append(str(ticket['_id']))
+    return issued
+
 
-    tickets_to_create = quantity - existing_count
-    
-    for i in range(tickets_to_create):
-        ticket = {
-            "ticket_id": f"TKT-{secrets.token_hex(8).upper()}",
-            "registration_id": registration_id,
-            "user_id": user_id,
-            "event_id": event_id,
-            "qr_token": generate_secure_token(),
-            "status": "valid",
-            "ticket_type": ticket_type,
-            "created_at": datetime.utcnow(),
-            "used_at": None,
-            "validated_by": None
-        }
-        
-        result = mongo.db.tickets.insert_one(ticket)
-        tickets.append(str(result.inserted_id))
-    
-    return tickets
+def generate_tickets_for_registration(registration_id, user_id, event_id, quantity=1, ticket_type="General",
+                                     session=None):
+    """Issue a registration's tickets (see issue_tickets); returns their IDs"""
+    reg = {"_id": registration_id, "user_id": user_id, "event_id": event_id, "quantity": quantity,
+           "ticket_type": ticket_type}
+    return issue_tickets([reg], session)[str(registration_id)]
@@ -0,0 +1,125 @@
+"""
+Virtual waiting room for high-demand ticket drops.
+
+An event with a room (`flask --app app data waiting-room EVENT_ID --rate 50`)
+only takes registrations that carry an admission token:
+
+1. POST /api/waiting-room/<event_id>/join gives the buyer a signed queue
+   token with their position.
+2. Position p is admitted at opens_at + p / rate, so admissions never
+   exceed `rate` per second however large the crowd is.
+3. GET /api/waiting-room/<event_id>/status checks the token, and once the
+   buyer's turn has come, returns a signed admission token that
+   create_registration accepts (one registration per admission).
+
+Nothing per buyer is stored. Tokens are JWTs signed with SECRET_KEY, room
+settings are cached in each worker for WAITING_ROOM_CACHE_SECONDS, and
+positions are handed out from blocks of WAITING_ROOM_BLOCK reserved with
+one $inc. So polling costs no MongoDB query, and joining costs one per
+block.
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+import jwt
+from flask import current_app
+from pymongo import ReturnDocument
+from src.database import mongo
+
+ROOMS_COLLECTION = 'waiting_rooms'
+# Keeps these tokens from being accepted anywhere a login token is
+AUDIENCE = 'eventify-waiting-room'
+
+
+class AdmissionError(Exception):
+    pass
+
+
+_rooms = {}
+_blocks = {}
+_lock = threading.Lock()
+
+
+def get_room(event_id):
+    """The event's room settings, or None; cached per worker"""
+    now = time.monotonic()
+    cached = _rooms.get(event_id)
+    if cached and now - cached[1] < current_app.config.get('WAITING_ROOM_CACHE_SECONDS', 2):
+        return cached[0]
+    room = mongo.db[ROOMS_COLLECTION].find_one({"_id": event_id, "enabled": True},
+                                               {"rate": 1, "opens_at": 1, "admission_minutes": 1})
+    _rooms[event_id] = (room, now)
+    return room
+
+
+def next_position(event_id):
+    """The next queue position, or None when the room was removed or turned off since get_room cached it"""
+    with _lock:
+        start, end = _blocks.get(event_id, (0, 0))
+        if start >= end:
+            block = current_app.config.get('WAITING_ROOM_BLOCK', 50)
+            room = mongo.db[ROOMS_COLLECTION].find_one_and_update(
+                {"_id": event_id, "enabled": True}, {"$inc": {"allocated": block}},
+                projection={"allocated": 1}, return_document=ReturnDocument.AFTER
+            )
+            if room is None:
+                _rooms.pop(event_id, None)
+                _blocks.pop(event_id, None)
+                return None
+            start, end = room['allocated'] - block, room['allocated']
+        _blocks[event_id] = (start + 1, end)
+        return start
+
+
+def admitted_until(room, now=None):
+    """Positions below this have been admitted"""
+    elapsed = ((now or datetime.utcnow()) - room['opens_at']).total_seconds()
+    return max(int(elapsed * room['rate']), 0)
+
+
+def admit_time(room, position):
+    return room['opens_at'] + timedelta(seconds=position / room['rate'])
+
+
+def _encode(payload):
+    return jwt.encode({**payload, "aud": AUDIENCE}, current_app.config['SECRET_KEY'], algorithm='HS256')
+
+
+def _decode(token, kind, event_id):
+    try:
+        payload = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=['HS256'], audience=AUDIENCE)
+    except jwt.ExpiredSignatureError:
+        raise AdmissionError("Token expired")
+    except jwt.InvalidTokenError:
+        raise AdmissionError("Invalid token")
+    if payload.get('kind') != kind:
+        raise AdmissionError(f"Expected a {kind} token")
+    if payload.get('event_id') != event_id:
+        raise AdmissionError("Token is not for this event")
+    return payload
+
+
+def queue_token(event_id, position):
+    return _encode({"kind": "queue", "event_id": event_id, "position": position, "iat": datetime.utcnow()})
+
+
+def read_queue_token(token, event_id):
+    return _decode(token, 'queue', event_id)['position']
+
+
+def admission_token(room, event_id, position):
+    minutes = room.get('admission_minutes') or current_app.config.get('WAITING_ROOM_ADMISSION_MINUTES', 10)
+    expires_at = datetime.utcnow() + timedelta(minutes=minutes)
+    return _encode({"kind": "admission", "event_id": event_id, "position": position, "exp": expires_at}), expires_at
+
+
+def check_admission(event_id, token):
+    """
+    None when the event has no waiting room, else the admitted position.
+    Raises AdmissionError when a room is on and the token is missing or bad.
+    """
+    if get_room(event_id) is None:
+        return None
+    if not token:
+        raise AdmissionError("Admission required")
+    return _decode(token, 'admission', event_id)['position']
@@ -0,0 +1,132 @@
+"""
+Idempotency-Key tests (src/utils/idempotency.py): a retried POST replays
+the first response instead of running again, a key reused for another body
+is a 422, and a duplicate arriving while the first request runs is a 409.
+
+The tests wrap their own view with @idempotent, so they count exactly how
+often it runs. Runs against the database in TEST_MONGODB_URI (a throwaway
+one, see test_inventory.py):
+    TEST_MONGODB_URI='mongodb://localhost:27017/eventify_test?directConnection=true' python -m pytest test_idempotency.py
+or `python test_idempotency.py`.
+"""
+import os
+import sys
+import threading
+import uuid
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+os.environ.setdefault('JWT_SECRET', 'test-idempotency-secret-not-for-production-use')
+
+PATH = '/test-idempotency'
+
+app = None
+calls = []
+gate = {}
+
+
+def _view():
+    from flask import jsonify, request
+    body = request.get_json()
+    calls.append(body)
+    if body.get('wait'):
+        gate['started'].set()
+        gate['release'].wait(10)
+    if body.get('fail'):
+        return jsonify({"message": "Error"}), 500
+    return jsonify({"id": uuid.uuid4().hex, "echo": body}), 201
+
+
+def setup_module(module=None):
+    global app
+    if not os.getenv('TEST_MONGODB_URI'):
+        import pytest
+        pytest.skip("TEST_MONGODB_URI is not set", allow_module_level=True)
+    from app import create_app
+    app = create_app('testing')
+    _prepare()
+
+
+def _prepare():
+    from src.utils.idempotency import idempotent
+    app.add_url_rule(PATH, 'test_idempotency', idempotent(_view), methods=['POST'])
+
+
+def teardown_module(module=None):
+    from src.database import mongo
+    from src.utils.idempotency import KEYS_COLLECTION
+    mongo.db[KEYS_COLLECTION].delete_many({"_id": {"$regex": f"^POST {PATH} "}})
+
+
+def _post(key, body, token='buyer'):
+    return app.test_client().post(PATH, json=body, headers={'Idempotency-Key': key,
+                                                            'Authorization': f'Bearer {token}'})
+
+
+def test_retry_replays_the_first_response():
+    calls.clear()
+    key = uuid.uuid4().hex
+    first = _post(key, {"ticket_type": "VIP"})
+    retry = _post(key, {"ticket_type": "VIP"})
+    assert first.status_code == retry.status_code == 201
+    assert retry.get_json() == first.get_json()
+    assert retry.headers.get('Idempotent-Replayed') == 'true' and 'Idempotent-Replayed' not in first.headers
+    assert len(calls) == 1
+
+
+def test_same_key_with_a_different_body_is_422():
+    calls.clear()
+    key = uuid.uuid4().hex
+    assert _post(key, {"quantity": 1}).status_code == 201
+    assert _post(key, {"quantity": 2}).status_code == 422
+    assert len(calls) == 1
+
+
+def test_duplicate_while_the_first_runs_is_409():
+    calls.clear()
+    key = uuid.uuid4().hex
+    gate.update(started=threading.Event(), release=threading.Event())
+    first = {}
+    runner = threading.Thread(target=lambda: first.update(response=_post(key, {"wait": True})))
+    runner.start()
+    try:
+        assert gate['started'].wait(10)
+        duplicate = _post(key, {"wait": True})
+        assert duplicate.status_code == 409 and duplicate.headers.get('Retry-After')
+    finally:
+        gate['release'].set()
+        runner.join()
+    assert first['response'].status_code == 201
+    assert _post(key, {"wait": True}).get_json() == first['response'].get_json()
+    assert len(calls) == 1
+
+
+def test_server_error_releases_the_key():
+    calls.clear()
+    key = uuid.uuid4().hex
+    assert _post(key, {"fail": True}).status_code == 500
+    assert _post(key, {"fail": True}).status_code == 500
+    assert len(calls) == 2
+
+
+def test_keys_are_per_caller():
+    calls.clear()
+    key = uuid.uuid4().hex
+    mine = _post(key, {"quantity": 1}, token='buyer')
+    theirs = _post(key, {"quantity": 1}, token='someone-else')
+    assert mine.get_json()['id'] != theirs.get_json()['id']
+    assert len(calls) == 2
+
+
+if __name__ == '__main__':
+    if not os.getenv('TEST_MONGODB_URI'):
+        sys.exit("Set TEST_MONGODB_URI to a throwaway database (see the docstring)")
+    setup_module()
+    try:
+        for name, test in list(globals().items()):
+            if name.startswith('test_') and callable(test):
+                test()
+                print(f"ok  {name}")
+    finally:
+        teardown_module()
@@ -0,0 +1,146 @@
+"""
+Inventory counter tests (src/utils/inventory.py): concurrent buyers never
+take more seats than an event has, whichever slots they land on.
+
+Runs against the database in TEST_MONGODB_URI, which should be a throwaway
+one on a single-node replica set (reserve_many only runs in a transaction):
+    mongod --replSet rs0 --dbpath /tmp/rs0 && mongosh --eval 'rs.initiate()'
+    TEST_MONGODB_URI='mongodb://localhost:27017/eventify_test?directConnection=true' python -m pytest test_inventory.py
+`python test_inventory.py` runs the same tests without pytest. Each test
+removes the counters of the events it created.
+"""
+import os
+import sys
+import threading
+from bson.objectid import ObjectId
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+os.environ.setdefault('JWT_SECRET', 'test-inventory-secret-not-for-production-use')
+
+app = None
+
+
+def setup_module(module=None):
+    global app
+    if not os.getenv('TEST_MONGODB_URI'):
+        import pytest
+        pytest.skip("TEST_MONGODB_URI is not set", allow_module_level=True)
+    from app import create_app
+    app = create_app('testing')
+
+
+def _event(**fields):
+    return {"_id": ObjectId(), "inventory_slots": 4, **fields}
+
+
+def _remaining(event, key):
+    from src.database import mongo
+    from src.utils.inventory import INVENTORY_COLLECTION
+    return [doc['remaining'] for doc in mongo.db[INVENTORY_COLLECTION]
+            .find({"event_id": str(event['_id']), "key": key}).sort("slot", 1)]
+
+
+def _cleanup(event):
+    from src.database import mongo
+    from src.utils.inventory import INVENTORY_COLLECTION
+    mongo.db[INVENTORY_COLLECTION].delete_many({"event_id": str(event['_id'])})
+
+
+def test_concurrent_reserve_never_oversells():
+    from src.utils.inventory import SoldOut, reserve
+    event = _event(capacity=30, tickets=[{"name": "VIP", "quantity": 20}])
+    sold, sold_out, errors = [], [], []
+    start = threading.Barrier(64)
+
+    def buyer():
+        with app.app_context():
+            start.wait()
+            try:
+                sold.append(reserve(event, 'VIP', 1))
+            except SoldOut as e:
+                sold_out.append(e.ticket_type)
+            except Exception as e:
+                errors.append(e)
+
+    buyers = [threading.Thread(target=buyer) for _ in range(64)]
+    for thread in buyers:
+        thread.start()
+    for thread in buyers:
+        thread.join()
+    try:
+        assert not errors, errors
+        assert len(sold) == 20 and sold_out == ['VIP'] * 44
+        assert _remaining(event, 'VIP') == [0, 0, 0, 0]
+        assert sum(_remaining(event, '*')) == 10 and min(_remaining(event, '*')) >= 0
+    finally:
+        _cleanup(event)
+
+
+def test_reserve_spans_slots_and_gives_back_a_partial_take():
+    from src.utils.inventory import SoldOut, reserve
+    event = _event(tickets=[{"name": "VIP", "quantity": 10}])
+    try:
+        with app.app_context():
+            # No slot has 9 seats (3, 3, 2, 2): the take is spread over them
+            holds = reserve(event, 'VIP', 9)
+            assert sum(hold['quantity'] for hold in holds) == 9 and len(holds) > 1
+            assert sum(_remaining(event, 'VIP')) == 1
+            try:
+                reserve(event, 'VIP', 2)
+                assert False, "expected SoldOut"
+            except SoldOut:
+                pass
+            assert sum(_remaining(event, 'VIP')) == 1
+    finally:
+        _cleanup(event)
+
+
+def test_reserve_many_takes_the_capacity_once_per_cart():
+    from src.services.checkout_service import run_transaction
+    from src.utils.inventory import SoldOut, reserve_many
+    event = _event(capacity=5, tickets=[{"name": "VIP", "quantity": 3}, {"name": "General"}])
+    try:
+        with app.app_context():
+            holds = run_transaction(lambda session: reserve_many(event, {"VIP": 2, "General": 3}, session))
+            # Each line carries its own share of the capacity, to give back on release
+            assert sum(h['quantity'] for h in holds['VIP'] if ':*:' in h['counter']) == 2
+            assert sum(h['quantity'] for h in holds['General'] if ':*:' in h['counter']) == 3
+            assert sum(_remaining(event, 'VIP')) == 1 and sum(_remaining(event, '*')) == 0
+            try:
+                run_transaction(lambda session: reserve_many(event, {"VIP": 1}, session))
+                assert False, "expected SoldOut"
+            except SoldOut as e:
+                assert e.ticket_type == '*'
+            # The aborted cart took nothing
+            assert sum(_remaining(event, 'VIP')) == 1
+    finally:
+        _cleanup(event)
+
+
+def test_resize_spreads_the_new_total_over_every_slot():
+    from src.utils.inventory import reserve, resize
+    event = _event(capacity=40)
+    try:
+        with app.app_context():
+            reserve(event, 'General', 6)
+            resize(str(event['_id']), event, {"capacity": 20})
+            remaining = _remaining(event, '*')
+            assert sum(remaining) == 14 and max(remaining) - min(remaining) <= 1
+            # Below what is already held: nothing left to sell anywhere
+            resize(str(event['_id']), {**event, "capacity": 20}, {"capacity": 4})
+            remaining = _remaining(event, '*')
+            assert sum(remaining) == -2 and max(remaining) == 0
+    finally:
+        _cleanup(event)
+
+
+if __name__ == '__main__':
+    if not os.getenv('TEST_MONGODB_URI'):
+        sys.exit("Set TEST_MONGODB_URI to a throwaway database (see the docstring)")
+    setup_module()
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"ok  {name}")
@@ -0,0 +1,132 @@
+"""
+Ticket issuance tests (src/utils/ticket_utils.issue_tickets): a repeated or
+concurrent call never issues extra tickets, because (registration_id, seq)
+is unique (migration 8), and it returns the tickets already issued.
+
+Runs against the database in TEST_MONGODB_URI (a throwaway one on a
+replica set, see test_inventory.py):
+    TEST_MONGODB_URI='mongodb://localhost:27017/eventify_test?directConnection=true' python -m pytest test_ticket_issuance.py
+or `python test_ticket_issuance.py`.
+"""
+import os
+import sys
+import threading
+from datetime import datetime, timedelta
+from bson.objectid import ObjectId
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+os.environ.setdefault('JWT_SECRET', 'test-ticket-issuance-secret-not-for-production-use')
+
+EVENT_ID = str(ObjectId())
+
+app = None
+
+
+def setup_module(module=None):
+    global app
+    if not os.getenv('TEST_MONGODB_URI'):
+        import pytest
+        pytest.skip("TEST_MONGODB_URI is not set", allow_module_level=True)
+    from app import create_app
+    app = create_app('testing')
+    with app.app_context():
+        _prepare()
+
+
+def _prepare():
+    from src.utils.indexes import create_ticket_seq_indexes
+    create_ticket_seq_indexes()
+
+
+def teardown_module(module=None):
+    from src.database import mongo
+    mongo.db.tickets.delete_many({"event_id": EVENT_ID})
+    mongo.db.registrations.delete_many({"event_id": EVENT_ID})
+
+
+def _registration(quantity, **fields):
+    return {"_id": ObjectId(), "user_id": "guest", "event_id": EVENT_ID, "ticket_type": "General",
+            "quantity": quantity, **fields}
+
+
+def _seqs(reg):
+    from src.database import mongo
+    return sorted(ticket['seq'] for ticket in mongo.db.tickets.find({"registration_id": str(reg['_id'])}))
+
+
+def test_second_call_returns_the_existing_tickets():
+    from src.utils.ticket_utils import issue_tickets
+    regs = [_registration(3), _registration(2)]
+    with app.app_context():
+        first = issue_tickets(regs)
+        again = issue_tickets(regs)
+    assert again == first
+    assert [len(first[str(reg['_id'])]) for reg in regs] == [3, 2]
+    assert _seqs(regs[0]) == [0, 1, 2] and _seqs(regs[1]) == [0, 1]
+
+
+def test_only_the_missing_tickets_are_added():
+    from src.database import mongo
+    from src.utils.ticket_utils import issue_tickets
+    reg = _registration(3)
+    # A call that died after its first ticket
+    existing = mongo.db.tickets.insert_one({"registration_id": str(reg['_id']), "seq": 0,
+                                           "event_id": EVENT_ID, "status": "valid"}).inserted_id
+    with app.app_context():
+        issued = issue_tickets([reg])[str(reg['_id'])]
+    assert len(issued) == 3 and issued[0] == str(existing)
+    assert _seqs(reg) == [0, 1, 2]
+
+
+def test_concurrent_calls_issue_each_ticket_once():
+    from src.utils.ticket_utils import issue_tickets
+    reg = _registration(4)
+    results, errors = [], []
+    start = threading.Barrier(16)
+
+    def confirm():
+        with app.app_context():
+            start.wait()
+            try:
+                results.append(issue_tickets([reg])[str(reg['_id'])])
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=confirm) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors, errors
+    assert _seqs(reg) == [0, 1, 2, 3]
+    assert all(sorted(ids) == sorted(results[0]) and len(ids) == 4 for ids in results)
+
+
+def test_confirming_twice_returns_the_same_tickets():
+    from src.database import mongo
+    from src.services.checkout_service import confirm_registrations
+    now = datetime.utcnow()
+    reg = _registration(2, status="pending", payment_status="pending",
+                        reservation_expires_at=now + timedelta(minutes=10))
+    mongo.db.registrations.insert_one(reg)
+    with app.app_context():
+        first = confirm_registrations([reg['_id']], now)
+        again = confirm_registrations([reg['_id']], now)
+    assert first is not None and again == first and len(first[str(reg['_id'])]) == 2
+    assert mongo.db.registrations.find_one({"_id": reg['_id']})['status'] == 'confirmed'
+    assert _seqs(reg) == [0, 1]
+
+
+if __name__ == '__main__':
+    if not os.getenv('TEST_MONGODB_URI'):
+        sys.exit("Set TEST_MONGODB_URI to a throwaway database (see the docstring)")
+    setup_module()
+    try:
+        for name, test in list(globals().items()):
+            if name.startswith('test_') and callable(test):
+                test()
+                print(f"ok  {name}")
+    finally:
+        teardown_module()
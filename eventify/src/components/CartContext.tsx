@@ -10,6 +10,7 @@ export interface CartItem {
     type?: string;
     eventId?: string;
     ticketType?: string;
+    promoCode?: string;
 }
 
 interface CartContextType {
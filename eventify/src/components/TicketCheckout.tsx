@@ -178,9 +178,12 @@ export const TicketCheckout: React.FC<TicketCheckoutProps> = (props) => {
             if (quantity > 0) {
                 // Calculate price with discount if applicable
                 let itemPrice = Number(ticket.price);
+                let promoCode: string | undefined;
                 if (appliedDiscount && ticket.discounts) {
                     const d = ticket.discounts.find(dc => dc.code === appliedDiscount.code);
                     if (d) {
+                        // The server prices the order itself, so it needs the code to give the same discount
+                        promoCode = appliedDiscount.code;
                         if (d.type === 'percent') {
                             itemPrice -= itemPrice * (Number(d.amount) / 100);
                         } else {
@@ -198,7 +201,8 @@ export const TicketCheckout: React.FC<TicketCheckoutProps> = (props) => {
                     quantity: quantity,
                     type: 'ticket',
                     eventId: eventId,
-                    ticketType: ticket.name
+                    ticketType: ticket.name,
+                    promoCode
                 });
             }
         });
@@ -58,6 +58,7 @@ const Checkout = () => {
                             ticket_type: item.ticketType || 'General',
                             quantity: item.quantity,
                             price: item.price,
+                            promo_code: item.promoCode,
                             payment_method: paymentMethod === 'card' ? 'Card' : 'Mobile Banking',
                             guest_name: !user ? guestDetails.name : undefined,
                             guest_email: !user ? guestDetails.email : undefined,
@@ -67,9 +68,14 @@ const Checkout = () => {
                         if (data.id) {
                             pendingRegistrationIds.push(data.id);
                         }
-                    } catch (err) {
+                    } catch (err: any) {
                         console.error(`Failed to init registration for ${item.name}`, err);
-                        toast.error(`Failed to start order for ${item.name}`);
+                        if (err.response?.status === 409 && err.response.data?.price !== undefined) {
+                            // The server charges a different price than the cart shows: don't take the order
+                            toast.error(`The price of ${item.name} is now ৳${Number(err.response.data.price).toLocaleString()}. Please review your cart.`);
+                        } else {
+                            toast.error(err.response?.data?.message || `Failed to start order for ${item.name}`);
+                        }
                         throw err;
                     }
                 }